@@ -0,0 +1,231 @@
+import argparse
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable
+
+from scripts.synthetic_facility import FacilitySpec, build_facilities, use_scratch_database, remove_scratch_database
+
+RESULT_FORMAT_VERSION = 1
+DEFAULT_OUTPUT_DIR = Path(__file__).parents[1] / 'benchmark_results'
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def clear_caches() -> None:
+    from src.reports.components.material import VAPOR_PRESSURE_CACHE
+    from src.reports.components.meteorological import SITE_CLIMATOLOGY_CACHE, METEOROLOGICAL_CHUNK_CACHE
+
+    for cache in [VAPOR_PRESSURE_CACHE, SITE_CLIMATOLOGY_CACHE, METEOROLOGICAL_CHUNK_CACHE]:
+        cache.clear()
+        cache.reset_stats()
+
+
+def time_runs(name: str, repeat: int, items: int, run: Callable[[], None], setup: Callable[[], None] = clear_caches) -> dict:
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    result = {
+        'name': name,
+        'items': items,
+        'repeat': repeat,
+        'times': times,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'items_per_second': items / min(times) if min(times) else None,
+    }
+    print(f'{name:<44} {result["min"] * 1e3:>10.2f} ms (min)  {result["median"] * 1e3:>10.2f} ms (median)  '
+          f'{items} items')
+    return result
+
+
+def benchmark_reports(facilities: list, spec: FacilitySpec, engines: list, workers: int, repeat: int) -> list[dict]:
+    from src.reports.components.time import ReportingPeriod, ReportingTimeFrame
+    from src.reports.emission_report import EmissionReport
+    from src.reports.util import ReportOutputType
+
+    period = ReportingPeriod(
+        ReportingTimeFrame.CUSTOM,
+        custom_start_date=date(spec.start_year, 1, 1),
+        custom_end_date=date(spec.start_year + spec.years - 1, 12, 31),
+    )
+    chunk_count = sum(len(facility.tanks) for facility in facilities) * spec.years * 12
+
+    results = []
+    for engine in engines:
+        def run() -> None:
+            for facility in facilities:
+                report = EmissionReport(facility.facility_id, facility.tanks, period, engine=engine, workers=workers)
+                report.calculate(ReportOutputType.LOG)
+
+        results.append(time_runs(f'report.{engine.name.lower()}.cold', repeat, chunk_count, run))
+        results.append(time_runs(f'report.{engine.name.lower()}.warm', repeat, chunk_count, run, setup=lambda: None))
+
+    return results
+
+
+def benchmark_kernels(facilities: list, spec: FacilitySpec, repeat: int) -> list[dict]:
+    from sqlalchemy.orm import Session
+
+    from src.database import DB_ENGINE
+    from src.database.definitions.facility import Facility
+    from src.reports.calculations.fixed_roof_tank_batch import FixedRoofBatchEmissions
+    from src.reports.components.meteorological import MeteorologicalChunk
+    from src.reports.components.mixture import MixtureShim
+    from src.reports.components.tanks.fixed_roof import FixedRoofTankShim
+    from src.reports.components.time import ReportingChunk
+
+    rng = random.Random(spec.seed)
+    results = []
+    with Session(DB_ENGINE) as session:
+        db_facilities = [session.get(Facility, facility.facility_id) for facility in facilities]
+
+        # Random date ranges within the reporting years
+        first_day = date(spec.start_year, 1, 1)
+        total_days = (date(spec.start_year + spec.years, 1, 1) - first_day).days
+        ranges = []
+        for _ in range(1_000):
+            start = first_day + timedelta(days=rng.randrange(total_days))
+            end = min(start + timedelta(days=rng.randrange(1, 120)), date(spec.start_year + spec.years - 1, 12, 31))
+            ranges.append((start, end))
+
+        def run_meteorological() -> None:
+            for facility in db_facilities:
+                for start, end in ranges:
+                    MeteorologicalChunk.from_site(facility.site, start, end)
+
+        results.append(time_runs('meteorological.from_site', repeat, len(ranges) * len(db_facilities), run_meteorological))
+
+        # Vapor pressure of every mixture over the usual liquid surface temperatures
+        mixtures = {
+            record.mixture.id: record.mixture
+            for facility in db_facilities
+            for tank in facility.fixed_roof_tanks
+            for record in tank.service_records
+        }
+        shims = [MixtureShim.from_mixture(mixture) for mixture in mixtures.values()]
+        temperatures = [Decimal(str(round(rng.uniform(460, 600), 3))) for _ in range(200)]
+
+        def run_vapor_pressure() -> None:
+            for shim in shims:
+                for temperature in temperatures:
+                    shim.calculate_vapor_pressure(temperature)
+
+        results.append(time_runs('mixture.calculate_vapor_pressure', repeat, len(shims) * len(temperatures), run_vapor_pressure))
+
+        # Every monthly chunk of every tank through the batch kernel
+        shim_by_mixture = {shim.db_id: shim for shim in shims}
+        work = []
+        for facility in db_facilities:
+            for tank in facility.fixed_roof_tanks:
+                tank_shim = FixedRoofTankShim(tank)
+                for record in tank.service_records:
+                    work.append((
+                        tank_shim,
+                        ReportingChunk(
+                            start_date=record.start_date,
+                            end_date=record.end_date,
+                            mixture=shim_by_mixture[record.mixture.id],
+                            throughput=record.throughput,
+                            site=MeteorologicalChunk.from_site(facility.site, record.start_date, record.end_date),
+                        ),
+                    ))
+
+        results.append(
+            time_runs('fixed_roof_batch.calculate_total_emissions', repeat, len(work),
+                      lambda: FixedRoofBatchEmissions.calculate_total_emissions(work))
+        )
+
+    return results
+
+
+def compare(results: dict, baseline_path: Path) -> None:
+    baseline_results = json.loads(baseline_path.read_text())
+    baseline = {result['name']: result for result in baseline_results['results']}
+    print(f'\nCompared to {baseline_path.name} ({baseline_results["commit"]}), min time ratio (>1 is slower):')
+    for result in results['results']:
+        if (previous := baseline.get(result['name'])) is not None and previous['min']:
+            print(f'{result["name"]:<44} {result["min"] / previous["min"]:>8.2f}x')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the reporting engine on synthetic facilities')
+    parser.add_argument('--tanks', type=int, default=10, help='Fixed roof tanks per facility')
+    parser.add_argument('--years', type=int, default=1, help='Years of monthly service records')
+    parser.add_argument('--components', type=int, default=3, help='Components per mixture')
+    parser.add_argument('--sites', type=int, default=1, help='Facilities, each at a different site')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--engines', nargs='+', choices=['scalar', 'batch'], default=['scalar', 'batch'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', type=Path, help='JSON file for the results (default: benchmark_results/)')
+    parser.add_argument('--compare', type=Path, help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    scratch_path = use_scratch_database()
+    try:
+        from src.reports.util import CalculationEngine
+
+        spec = FacilitySpec(
+            tank_count=args.tanks,
+            years=args.years,
+            component_count=args.components,
+            site_count=args.sites,
+            seed=args.seed,
+        )
+        facilities = build_facilities(spec)
+        engines = [CalculationEngine[engine.upper()] for engine in args.engines]
+
+        results = {
+            'format_version': RESULT_FORMAT_VERSION,
+            'commit': get_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'spec': asdict(spec),
+            'workers': args.workers,
+            'results': [
+                *benchmark_reports(facilities, spec, engines, args.workers, args.repeat),
+                *benchmark_kernels(facilities, spec, args.repeat),
+            ],
+        }
+    finally:
+        remove_scratch_database(scratch_path)
+
+    output_path = args.output
+    if output_path is None:
+        DEFAULT_OUTPUT_DIR.mkdir(exist_ok=True)
+        output_path = DEFAULT_OUTPUT_DIR / f'{datetime.now():%Y%m%d-%H%M%S}-{results["commit"]}.json'
+    output_path.write_text(json.dumps(results, indent=2))
+    print(f'\nResults written to {output_path}')
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from scripts.synthetic_facility import FacilitySpec, build_facilities, use_scratch_database, remove_scratch_database
+
+# Facilities built by scripts/test_db.py from the AP 42 Chapter 7 sample calculations
+SAMPLE_FACILITY_NAMES = ['Sample Calculation #1 and #2']
+
+# Largest relative error allowed for each fast path against the Decimal engine
+TOLERANCES = {
+    'batch': 1e-9,  # Same equations in float64
+    'batch_tables': 1e-6,  # Batch with vapor pressures interpolated to a relative error of MAXIMUM_RELATIVE_ERROR (1e-7)
+}
+
+# Differences below this are noise around zero (fully insulated tanks have no temperature ranges, ...)
+ABSOLUTE_FLOOR = 1e-12
+
+
+@dataclass
+class Case:
+    name: str
+    facility_id: int
+    tanks: list
+    start: date
+    end: date
+
+
+@dataclass
+class EngineRun:
+    trace: dict[str, np.ndarray]
+    seconds: float
+
+
+def load_sample_cases() -> list[Case]:
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from src.database import DB_ENGINE
+    from src.database.definitions.facility import Facility
+    from src.util.enums import TankType
+
+    cases = []
+    with Session(DB_ENGINE) as session:
+        for name in SAMPLE_FACILITY_NAMES:
+            if (facility := session.scalar(select(Facility).where(Facility.name == name))) is None:
+                print(f'Skipping {name}: not in the database (see scripts/test_db.py)')
+                continue
+
+            tanks = [
+                (TankType.VERTICAL_FIXED_ROOF if tank.is_vertical else TankType.HORIZONTAL_FIXED_ROOF, tank.id)
+                for tank in facility.fixed_roof_tanks
+            ]
+            cases.append(Case(name, facility.id, tanks, date(2024, 1, 1), date(2024, 12, 31)))
+
+    return cases
+
+
+def run_engine(case: Case, engine_name: str, table_dir: Path) -> EngineRun:
+    from src.reports.components.material import VAPOR_PRESSURE_CACHE
+    from src.reports.components.meteorological import SITE_CLIMATOLOGY_CACHE, METEOROLOGICAL_CHUNK_CACHE
+    from src.reports.components.time import ReportingPeriod, ReportingTimeFrame
+    from src.reports.components.vapor_pressure_table import VaporPressureTables
+    from src.reports.emission_report import EmissionReport
+    from src.reports.trace import CalculationTrace
+    from src.reports.util import CalculationEngine, ReportOutputType
+
+    for cache in [VAPOR_PRESSURE_CACHE, SITE_CLIMATOLOGY_CACHE, METEOROLOGICAL_CHUNK_CACHE]:
+        cache.clear()
+
+    trace = CalculationTrace()
+    report = EmissionReport(
+        facility_id=case.facility_id,
+        tanks=case.tanks,
+        reporting_period=ReportingPeriod(ReportingTimeFrame.CUSTOM, custom_start_date=case.start, custom_end_date=case.end),
+        engine=CalculationEngine.SCALAR if engine_name == 'scalar' else CalculationEngine.BATCH,
+        vapor_pressure_tables=VaporPressureTables(table_dir) if engine_name == 'batch_tables' else None,
+        trace=trace,
+    )
+
+    start = time.perf_counter()
+    report.calculate(ReportOutputType.LOG, sinks=[])
+    seconds = time.perf_counter() - start
+
+    # Line the chunks up by tank and date no matter the order the engine calculated them in
+    arrays = trace.to_arrays()
+    order = np.lexsort((arrays['start_date'], arrays['tank_id']))
+    return EngineRun({name: values[order] for name, values in arrays.items()}, seconds)
+
+
+def relative_errors(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    difference = np.abs(reference - candidate)
+    scale = np.maximum(np.abs(reference), np.abs(candidate))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        errors = np.where(difference <= ABSOLUTE_FLOOR, 0.0, difference / scale)
+
+    # NaN in only one of the two is a mismatch, NaN in both is not
+    return np.where(np.isnan(reference) & np.isnan(candidate), 0.0, np.nan_to_num(errors, nan=np.inf))
+
+
+def compare_case(case: Case, engines: list[str], table_dir: Path) -> bool:
+    from src.reports.trace import TRACE_FIELDS
+
+    reference = run_engine(case, 'scalar', table_dir)
+    rows = len(reference.trace['tank_id'])
+    print(f'\n{case.name}: {rows} chunks, reference (scalar Decimal) {reference.seconds * 1e3:.1f} ms')
+
+    passed = True
+    for engine_name in engines:
+        candidate = run_engine(case, engine_name, table_dir)
+        assert np.array_equal(reference.trace['tank_id'], candidate.trace['tank_id']), 'Engines calculated different chunks'
+
+        field_errors = {
+            field: relative_errors(reference.trace[field], candidate.trace[field])
+            for field in TRACE_FIELDS
+        }
+        worst_field = max(field_errors, key=lambda field: field_errors[field].max(initial=0.0))
+        worst_error = field_errors[worst_field].max(initial=0.0)
+        tolerance = TOLERANCES[engine_name]
+        status = 'ok' if worst_error <= tolerance else 'FAIL'
+        passed &= worst_error <= tolerance
+
+        speedup = reference.seconds / candidate.seconds if candidate.seconds else float('inf')
+        print(f'  {engine_name:<14} max relative error {worst_error:.3e} ({worst_field}, tolerance {tolerance:.0e}) '
+              f'{status}; {candidate.seconds * 1e3:.1f} ms, {speedup:.2f}x speedup')
+
+        if status == 'FAIL':
+            for field, errors in field_errors.items():
+                if errors.max(initial=0.0) > tolerance:
+                    row = int(errors.argmax())
+                    print(f'    {field}: {errors[row]:.3e} at tank {reference.trace["tank_name"][row]}, '
+                          f'{reference.trace["start_date"][row]} (reference {reference.trace[field][row]!r}, '
+                          f'{engine_name} {candidate.trace[field][row]!r})')
+
+    return passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Check the fast calculation paths against the Decimal engine')
+    parser.add_argument('--engines', nargs='+', choices=list(TOLERANCES), default=list(TOLERANCES))
+    parser.add_argument('--random-facilities', type=int, default=3, help='Random facilities, each at a different site')
+    parser.add_argument('--tanks', type=int, default=20, help='Fixed roof tanks per random facility')
+    parser.add_argument('--components', type=int, default=4, help='Components per random mixture')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    scratch_path = use_scratch_database()
+    try:
+        cases = load_sample_cases()
+        if args.random_facilities:
+            spec = FacilitySpec(
+                tank_count=args.tanks,
+                component_count=args.components,
+                site_count=args.random_facilities,
+                seed=args.seed,
+            )
+            for index, facility in enumerate(build_facilities(spec)):
+                cases.append(
+                    Case(f'Random #{index + 1} (seed {args.seed})', facility.facility_id, facility.tanks,
+                         date(spec.start_year, 1, 1), date(spec.start_year + spec.years - 1, 12, 31))
+                )
+
+        with tempfile.TemporaryDirectory(prefix='rapid-tanks-tables-') as table_dir:
+            results = [compare_case(case, args.engines, Path(table_dir)) for case in cases]
+    finally:
+        remove_scratch_database(scratch_path)
+
+    passed = all(results)
+    print(f'\n{"All engines within tolerance" if passed else "Engines outside tolerance"} ({len(cases)} cases)')
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
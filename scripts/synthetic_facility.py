@@ -0,0 +1,145 @@
+import calendar
+import os
+import random
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+DB_PATH_VARIABLE = 'RAPID_TANKS_DB_PATH'
+DEV_DB_FILE_PATH = Path(__file__).parents[1] / 'src' / 'database' / 'dev_db.sqlite3'
+
+
+def use_scratch_database() -> Path:
+    """
+    Point the application at a copy of the dev database (reference data included) in a temporary directory.
+    Must be called before anything imports src.database since the engine is bound on import.
+    """
+    scratch_path = Path(tempfile.mkdtemp(prefix='rapid-tanks-')) / 'scratch_db.sqlite3'
+    shutil.copy(DEV_DB_FILE_PATH, scratch_path)
+    os.environ[DB_PATH_VARIABLE] = str(scratch_path)
+
+    import src.database
+    assert src.database.DB_FILE_PATH == scratch_path, 'src.database was imported before switching databases'
+    return scratch_path
+
+
+def remove_scratch_database(path: Path) -> None:
+    from src.database import DB_ENGINE
+
+    DB_ENGINE.dispose()
+    shutil.rmtree(path.parent, ignore_errors=True)
+
+
+@dataclass
+class FacilitySpec:
+    tank_count: int = 10  # Per facility
+    years: int = 1  # Monthly service records per tank
+    component_count: int = 3  # Per mixture
+    site_count: int = 1  # One facility per site
+    start_year: int = 2024
+    seed: int = 0
+
+
+@dataclass
+class SyntheticFacility:
+    facility_id: int
+    tanks: list  # list[tuple[TankType, int]]
+
+
+def build_facilities(spec: FacilitySpec) -> list[SyntheticFacility]:
+    """
+    Random (but repeatable for a seed) fixed roof tanks spread over random sites.
+    Materials are limited to petrochemicals that stay well below atmospheric pressure at ambient temperatures.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from src.database import DB_ENGINE
+    from src.database.definitions.facility import Facility
+    from src.database.definitions.fixed_roof_tank import FixedRoofTank, FixedRoofType, TankInsulationType
+    from src.database.definitions.material import Petrochemical
+    from src.database.definitions.meteorological import MeteorologicalSite
+    from src.database.definitions.mixture import Mixture, MixtureAssociation
+    from src.database.definitions.paint import SolarAbsorptance
+    from src.database.definitions.service_record import FrtServiceRecord
+    from src.util.enums import MixtureMakeupType, TankType
+
+    rng = random.Random(spec.seed)
+    facilities = []
+    with Session(DB_ENGINE) as session:
+        sites = session.scalars(select(MeteorologicalSite)).all()
+        roof_types = session.scalars(select(FixedRoofType)).all()
+        insulation_types = session.scalars(select(TankInsulationType)).all()
+        paints = session.scalars(select(SolarAbsorptance)).all()
+        petrochemicals = [
+            material
+            for material in session.scalars(select(Petrochemical)).all()
+            if material.true_vapor_pressure.to('psi').magnitude < 2
+        ]
+
+        for site_index, site in enumerate(rng.sample(sites, spec.site_count)):
+            facility = Facility(name=f'Synthetic #{site_index + 1}', description='', company='')
+            facility.site = site
+
+            for tank_index in range(spec.tank_count):
+                mixture = Mixture(name=f'Synthetic #{site_index + 1}-{tank_index + 1}', makeup_type_id=MixtureMakeupType.WEIGHT)
+                for material in rng.sample(petrochemicals, spec.component_count):
+                    mixture.components.append(
+                        MixtureAssociation(value=str(rng.randint(1, 1000)), petrochemical=material, petroleum_liquid=None)
+                    )
+
+                is_vertical = rng.random() < 0.8
+                shell_height = Decimal(rng.randint(10, 60))
+                shell_diameter = Decimal(rng.randint(6, 100))
+                tank = FixedRoofTank(
+                    name=f'FRT #{tank_index + 1}',
+                    is_vertical=is_vertical,
+                    shell_height=str(shell_height),
+                    shell_diameter=str(shell_diameter),
+                    roof_height=str((shell_diameter / 2 * Decimal('0.0625')).quantize(Decimal('0.01'))),
+                    roof_radius=str(shell_diameter),
+                    maximum_liquid_height=str(shell_height - 1),
+                    minimum_liquid_height=str(Decimal(rng.randint(1, 5))),
+                    net_throughput=str(rng.randint(1_000, 5_000_000)),
+                    turnovers_per_year=str(rng.randint(1, 60)),
+                )
+                shell_paint = rng.choice(paints)
+                roof_paint = rng.choice(paints)
+                tank.shell_paint_color = shell_paint.color
+                tank.shell_paint_condition = shell_paint.condition
+                tank.roof_paint_color = roof_paint.color
+                tank.roof_paint_condition = roof_paint.condition
+                tank.roof_type = rng.choice(roof_types)
+                tank.insulation = rng.choice(insulation_types)
+
+                monthly_throughput = Decimal(tank.net_throughput) / 12
+                for year in range(spec.start_year, spec.start_year + spec.years):
+                    for month in range(1, 13):
+                        record = FrtServiceRecord(
+                            start_date=date(year, month, 1),
+                            end_date=date(year, month, calendar.monthrange(year, month)[1]),
+                            throughput=str(monthly_throughput.quantize(Decimal('1.00'))),
+                        )
+                        record.mixture = mixture
+                        tank.service_records.append(record)
+
+                facility.fixed_roof_tanks.append(tank)
+
+            session.add(facility)
+            session.flush()
+            facilities.append(
+                SyntheticFacility(
+                    facility_id=facility.id,
+                    tanks=[
+                        (TankType.VERTICAL_FIXED_ROOF if tank.is_vertical else TankType.HORIZONTAL_FIXED_ROOF, tank.id)
+                        for tank in facility.fixed_roof_tanks
+                    ],
+                )
+            )
+
+        session.commit()
+
+    return facilities
@@ -3,12 +3,19 @@ import pint
 
 # Restrict almost all interoperability with Python floats
 # - We want to use Decimals everywhere and this will make it loud if a Python float is used with a Decimal
-decimal.getcontext().traps[decimal.FloatOperation] = True
+decimal.DefaultContext.traps[decimal.FloatOperation] = True
 
 # Use only 12 decimals of precision
-decimal.getcontext().prec = 12
+decimal.DefaultContext.prec = 12
+
+# Contexts are per thread and new threads (e.g. the report worker pool) start from a copy of the default
+# (This thread already has its own context so it is reset to the default as well)
+decimal.setcontext(decimal.DefaultContext.copy())
 
 # Create the unit registry for everything in this package
 unit_registry = pint.UnitRegistry(non_int_type=decimal.Decimal)
 
 unit_registry.define('psi = 51.7 * mm Hg')
+
+# Quantities sent between processes are rebuilt with the application registry
+pint.set_application_registry(unit_registry)
@@ -1,8 +1,12 @@
+import os
 from pathlib import Path
 from sqlalchemy import create_engine
 
 DEV_DB_FILE_PATH = Path(__file__).parent / 'dev_db.sqlite3'
 PROD_DB_FILE_PATH = Path(__file__).parent / 'prod_db.sqlite3'
 
+# Scripts (benchmarks, equivalence checks) can point everything at a scratch copy of the database
+DB_FILE_PATH = Path(os.environ.get('RAPID_TANKS_DB_PATH', DEV_DB_FILE_PATH))
+
 # Create the SQLAlchemy engine
-DB_ENGINE = create_engine(f'sqlite+pysqlite:///{DEV_DB_FILE_PATH}')
+DB_ENGINE = create_engine(f'sqlite+pysqlite:///{DB_FILE_PATH}')
@@ -6,7 +6,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from src.database import DEV_DB_FILE_PATH
+from src.database import DB_FILE_PATH
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -43,7 +43,7 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = f'{URL_PREFIX}{DEV_DB_FILE_PATH}'
+    url = f'{URL_PREFIX}{DB_FILE_PATH}'
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -63,7 +63,7 @@ def run_migrations_online() -> None:
 
     """
     connectable = engine_from_config(
-        {'sqlalchemy.url': f'{URL_PREFIX}{DEV_DB_FILE_PATH}'},
+        {'sqlalchemy.url': f'{URL_PREFIX}{DB_FILE_PATH}'},
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
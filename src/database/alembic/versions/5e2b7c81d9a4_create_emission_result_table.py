@@ -0,0 +1,33 @@
+"""Create emission result table
+
+Revision ID: 5e2b7c81d9a4
+Revises: 97a1251151c8
+Create Date: 2026-10-18 10:12:44.581203
+
+"""
+from alembic import op
+from typing import Sequence
+
+from src.database.definitions import OrmBase
+from src.database.definitions.emission_result import EmissionResult
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b7c81d9a4'
+down_revision: str | None = '97a1251151c8'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    OrmBase.metadata.create_all(
+        bind=op.get_bind(),
+        tables=[EmissionResult.__table__],
+    )
+
+
+def downgrade() -> None:
+    OrmBase.metadata.drop_all(
+        bind=op.get_bind(),
+        tables=[EmissionResult.__table__],
+    )
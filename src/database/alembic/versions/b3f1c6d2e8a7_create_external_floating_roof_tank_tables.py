@@ -0,0 +1,35 @@
+"""Create external floating roof tank tables
+
+Revision ID: b3f1c6d2e8a7
+Revises: 5e2b7c81d9a4
+Create Date: 2026-10-18 15:41:07.318264
+
+"""
+from alembic import op
+from typing import Sequence
+
+from src.database.definitions import OrmBase
+from src.database.definitions.fittings import EfrtFittingAssociation
+from src.database.definitions.floating_roof_tank import ExternalFloatingRoofTank
+from src.database.definitions.service_record import EfrtServiceRecord
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c6d2e8a7'
+down_revision: str | None = '5e2b7c81d9a4'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    OrmBase.metadata.create_all(
+        bind=op.get_bind(),
+        tables=[ExternalFloatingRoofTank.__table__, EfrtFittingAssociation.__table__, EfrtServiceRecord.__table__],
+    )
+
+
+def downgrade() -> None:
+    OrmBase.metadata.drop_all(
+        bind=op.get_bind(),
+        tables=[EfrtServiceRecord.__table__, EfrtFittingAssociation.__table__, ExternalFloatingRoofTank.__table__],
+    )
@@ -0,0 +1,42 @@
+"""Add internal floating roof tank deck construction
+
+Revision ID: d7e2a9c4f1b6
+Revises: b3f1c6d2e8a7
+Create Date: 2026-10-18 17:26:51.904318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from typing import Sequence
+
+from src.util.enums import DeckConstructionType
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e2a9c4f1b6'
+down_revision: str | None = 'b3f1c6d2e8a7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The table is created from the current definition, so new databases already have the column
+    columns = sa.inspect(op.get_bind()).get_columns('internal_floating_roof_tank')
+    if 'deck_construction_id' in [column['name'] for column in columns]:
+        return
+
+    # Existing tanks did not record their deck construction and are taken to have welded decks
+    op.add_column(
+        'internal_floating_roof_tank',
+        sa.Column(
+            'deck_construction_id',
+            sa.Integer(),
+            nullable=False,
+            server_default=str(int(DeckConstructionType.WELDED)),
+        ),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('internal_floating_roof_tank') as batch_op:
+        batch_op.drop_column('deck_construction_id')
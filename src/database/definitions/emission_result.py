@@ -0,0 +1,13 @@
+from datetime import date
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column, MappedAsDataclass
+
+from . import OrmBase
+
+
+class EmissionResult(MappedAsDataclass, OrmBase):
+    __tablename__ = "emission_result"
+
+    input_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # SHA-256 of every calculation input
+    result: Mapped[str]  # JSON encoded TankEmission
+    last_used: Mapped[date]
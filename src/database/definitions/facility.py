@@ -3,7 +3,7 @@ from sqlalchemy.orm import Mapped, mapped_column, MappedAsDataclass, relationshi
 
 from . import OrmBase
 from .fixed_roof_tank import FixedRoofTank
-from .floating_roof_tank import InternalFloatingRoofTank
+from .floating_roof_tank import ExternalFloatingRoofTank, InternalFloatingRoofTank
 from .meteorological import MeteorologicalSite
 
 
@@ -19,3 +19,4 @@ class Facility(MappedAsDataclass, OrmBase):
     site: Mapped[MeteorologicalSite] = relationship(init=False)
     fixed_roof_tanks: Mapped[list[FixedRoofTank]] = relationship(init=False, back_populates="facility")
     internal_floating_roof_tanks: Mapped[list[InternalFloatingRoofTank]] = relationship(init=False, back_populates="facility")
+    external_floating_roof_tanks: Mapped[list[ExternalFloatingRoofTank]] = relationship(init=False, back_populates="facility")
@@ -36,3 +36,14 @@ class IfrtFittingAssociation(MappedAsDataclass, OrmBase):
 
     fitting: Mapped["FittingSecondaryType"] = relationship()
     tank: Mapped["InternalFloatingRoofTank"] = relationship(init=False, back_populates="fittings")
+
+
+class EfrtFittingAssociation(MappedAsDataclass, OrmBase):
+    __tablename__ = "efrt_fitting_association"
+
+    quantity: Mapped[int]
+    tank_id: Mapped[int] = mapped_column(ForeignKey("external_floating_roof_tank.id"), primary_key=True, init=False)
+    fitting_id: Mapped[int] = mapped_column(ForeignKey("fitting_secondary_type.id"), primary_key=True, init=False)
+
+    fitting: Mapped["FittingSecondaryType"] = relationship()
+    tank: Mapped["ExternalFloatingRoofTank"] = relationship(init=False, back_populates="fittings")
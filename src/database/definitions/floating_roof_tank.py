@@ -1,11 +1,13 @@
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship, MappedAsDataclass
 
+from src.util.enums import DeckConstructionType
+
 from . import OrmBase
-from .fittings import IfrtFittingAssociation
+from .fittings import EfrtFittingAssociation, IfrtFittingAssociation
 from .paint import PaintColor, PaintCondition, SolarAbsorptance
 from .seal import SealSecondaryType
-from .service_record import IfrtServiceRecord
+from .service_record import EfrtServiceRecord, IfrtServiceRecord
 from .util import PintQuantity
 
 
@@ -23,6 +25,9 @@ class InternalFloatingRoofTank(MappedAsDataclass, OrmBase):
     autofill_support_column_count: Mapped[bool]
     support_column_count: Mapped[int]
 
+    # DeckConstructionType, tanks without a known deck construction are taken to have welded decks
+    deck_construction_id: Mapped[int] = mapped_column(default=DeckConstructionType.WELDED)
+
     # Relationships
     facility_id = mapped_column(ForeignKey("facility.id"))
     facility: Mapped["Facility"] = relationship(init=False, back_populates="internal_floating_roof_tanks")
@@ -65,3 +70,62 @@ class InternalFloatingRoofTank(MappedAsDataclass, OrmBase):
         back_populates="tank",
         cascade="all, delete-orphan",
     )
+
+
+class ExternalFloatingRoofTank(MappedAsDataclass, OrmBase):
+    __tablename__ = "external_floating_roof_tank"
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    name: Mapped[str]
+    description: Mapped[str]
+
+    # Properties
+    shell_height: Mapped[PintQuantity] = mapped_column(PintQuantity('ft'))
+    shell_diameter: Mapped[PintQuantity] = mapped_column(PintQuantity('ft'))
+
+    # Domed tanks have a self-supporting fixed roof over the floating deck, which keeps the wind off of it
+    is_domed: Mapped[bool]
+
+    # Relationships
+    facility_id = mapped_column(ForeignKey("facility.id"))
+    facility: Mapped["Facility"] = relationship(init=False, back_populates="external_floating_roof_tanks")
+
+    shell_paint_color_id = mapped_column(ForeignKey("paint_color.id"))
+    shell_paint_color: Mapped[PaintColor] = relationship(init=False, foreign_keys=shell_paint_color_id)
+
+    shell_paint_condition_id = mapped_column(ForeignKey("paint_condition.id"))
+    shell_paint_condition: Mapped[PaintCondition] = relationship(init=False, foreign_keys=shell_paint_condition_id)
+
+    shell_solar_absorptance: Mapped[SolarAbsorptance] = relationship(
+        init=False,
+        foreign_keys=[shell_paint_color_id, shell_paint_condition_id],
+        primaryjoin="and_(ExternalFloatingRoofTank.shell_paint_color_id==SolarAbsorptance.color_id,"
+                    "ExternalFloatingRoofTank.shell_paint_condition_id==SolarAbsorptance.condition_id)",
+        viewonly=True,
+    )
+
+    # The floating deck (or the dome of domed tanks)
+    roof_paint_color_id = mapped_column(ForeignKey("paint_color.id"))
+    roof_paint_color: Mapped[PaintColor] = relationship(init=False, foreign_keys=roof_paint_color_id)
+
+    roof_paint_condition_id = mapped_column(ForeignKey("paint_condition.id"))
+    roof_paint_condition: Mapped[PaintCondition] = relationship(init=False, foreign_keys=roof_paint_condition_id)
+
+    roof_solar_absorptance: Mapped[SolarAbsorptance] = relationship(
+        init=False,
+        foreign_keys=[roof_paint_color_id, roof_paint_condition_id],
+        primaryjoin="and_(ExternalFloatingRoofTank.roof_paint_color_id==SolarAbsorptance.color_id,"
+                    "ExternalFloatingRoofTank.roof_paint_condition_id==SolarAbsorptance.condition_id)",
+        viewonly=True,
+    )
+
+    seal_id = mapped_column(ForeignKey("seal_secondary_type.id"))
+    seal: Mapped[SealSecondaryType] = relationship(init=False)
+
+    fittings: Mapped[list[EfrtFittingAssociation]] = relationship(init=False)
+
+    service_records: Mapped[list[EfrtServiceRecord]] = relationship(
+        init=False,
+        back_populates="tank",
+        cascade="all, delete-orphan",
+    )
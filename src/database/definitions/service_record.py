@@ -36,3 +36,19 @@ class IfrtServiceRecord(MappedAsDataclass, OrmBase):
 
     tank: Mapped["InternalFloatingRoofTank"] = relationship(init=False, back_populates="service_records")
     mixture: Mapped[Mixture] = relationship(init=False)
+
+
+class EfrtServiceRecord(MappedAsDataclass, OrmBase):
+    __tablename__ = "efrt_service_record"
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    tank_id = mapped_column(ForeignKey("external_floating_roof_tank.id"))
+    mixture_id = mapped_column(ForeignKey("mixture.id"))
+
+    start_date: Mapped[date]
+    end_date: Mapped[date]
+    sum_liquid_level_decrease: Mapped[PintQuantity] = mapped_column(PintQuantity('ft/yr'), nullable=True)
+    throughput: Mapped[PintQuantity] = mapped_column(PintQuantity('gal/yr'), nullable=True)
+
+    tank: Mapped["ExternalFloatingRoofTank"] = relationship(init=False, back_populates="service_records")
+    mixture: Mapped[Mixture] = relationship(init=False)
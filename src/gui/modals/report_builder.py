@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
 
 from PyQt5.Qt import pyqtSlot
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QProgressBar, QLabel, QMessageBox
 
-from src.reports.emission_report import EmissionReport
-from src.reports.util import ReportOutputType
+from src.reports.util import ReportOutputType, ReportProgress, TankFailure
 from src.database import DB_ENGINE
 from src.database.definitions.facility import Facility
+from src.gui.widgets.reports.report_worker import ReportWorker
 from src.gui.widgets.reports.reporting_period_box import ReportingPeriodBox
 from src.gui.widgets.reports.report_type_box import ReportTypeBox
 from src.gui.widgets.reports.tank_selection_box import TankSelectionBox
@@ -26,11 +27,21 @@ class ReportBuilder(Dialog):
 
         # TODO: Report output type
 
+        # Reports run one at a time in the background, building again queues another report
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.workers: list[ReportWorker] = []
+
+        self.progress_label = QLabel(self)
+        self.progress_bar = QProgressBar(self)
+
         self.build_button = QPushButton('Build', self)
+        self.cancel_button = QPushButton('Cancel', self)
         self.close_button = QPushButton('Close', self)
 
         # Signals
         self.build_button.clicked.connect(self.handle_build_report)
+        self.cancel_button.clicked.connect(self.handle_cancel_reports)
         self.close_button.clicked.connect(self.reject)
 
         self._initial_setup()
@@ -43,14 +54,21 @@ class ReportBuilder(Dialog):
         buttons_layout = QHBoxLayout()
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.build_button)
+        buttons_layout.addWidget(self.cancel_button)
         buttons_layout.addWidget(self.close_button)
 
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(0)
+        self.cancel_button.setEnabled(False)
+
         layout = QVBoxLayout()
         self.setLayout(layout)
 
         layout.addWidget(self.report_type_box)
         layout.addWidget(self.reporting_period_box)
         layout.addWidget(self.tank_selection_box)
+        layout.addWidget(self.progress_label)
+        layout.addWidget(self.progress_bar)
         layout.addLayout(buttons_layout)
 
     def load(self) -> None:
@@ -58,18 +76,70 @@ class ReportBuilder(Dialog):
             facility = session.get(Facility, self.facility_id)
             self.tank_selection_box.load(facility)
 
+    def update_status(self) -> None:
+        self.cancel_button.setEnabled(bool(self.workers))
+        if not self.workers:
+            self.progress_label.setText('')
+        elif len(self.workers) > 1:
+            self.progress_label.setText(f'{len(self.workers) - 1} report(s) queued')
+
+    def remove_worker(self, worker: ReportWorker) -> None:
+        if worker in self.workers:
+            self.workers.remove(worker)
+        self.update_status()
+
     @pyqtSlot()
     def handle_build_report(self) -> None:
-        # TODO: Show a progress bar while we calculate
-
         # TODO: Check for at least one tank
 
         # TODO: Other types of reports
-        report = EmissionReport(
+        worker = ReportWorker(
             facility_id=self.facility_id,
             tanks=self.tank_selection_box.get_selected_tanks(),
             reporting_period=self.reporting_period_box.get_selected_details(),
+            output_type=ReportOutputType.LOG,
         )
-        report.calculate(ReportOutputType.LOG)
+        worker.signals.progress.connect(self.handle_report_progress)
+        worker.signals.finished.connect(lambda failures: self.handle_report_finished(worker, failures))
+        worker.signals.failed.connect(lambda error: self.handle_report_failed(worker, error))
+        worker.signals.cancelled.connect(lambda: self.remove_worker(worker))
 
-        # self.close()
+        self.workers.append(worker)
+        self.thread_pool.start(worker)
+        self.update_status()
+
+    @pyqtSlot()
+    def handle_cancel_reports(self) -> None:
+        if not self.workers:
+            return
+
+        for worker in self.workers:
+            worker.cancel()
+        self.progress_label.setText('Cancelling...')
+
+    @pyqtSlot(object)
+    def handle_report_progress(self, progress: ReportProgress) -> None:
+        self.progress_bar.setRange(0, max(progress.tank_count, 1))
+        self.progress_bar.setValue(progress.tanks_completed)
+        if progress.chunk_count:
+            self.progress_label.setText(
+                f'{progress.tank_name}: chunk {progress.chunks_completed} of {progress.chunk_count}'
+            )
+
+    def handle_report_finished(self, worker: ReportWorker, failures: list[TankFailure]) -> None:
+        self.remove_worker(worker)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+
+        if failures:
+            names = ', '.join(failure.tank_name for failure in failures)
+            QMessageBox.warning(self, 'Report Warning', f'Some tanks could not be calculated: {names}')
+
+    def handle_report_failed(self, worker: ReportWorker, error: str) -> None:
+        self.remove_worker(worker)
+        QMessageBox.critical(self, 'Report Error', f'The report could not be built: {error}')
+
+    def reject(self) -> None:
+        # Do not leave reports running once the dialog is gone
+        self.handle_cancel_reports()
+        self.thread_pool.waitForDone()
+        super().reject()
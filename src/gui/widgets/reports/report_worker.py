@@ -0,0 +1,71 @@
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from src.reports.emission_report import EmissionReport
+from src.reports.components.time import ReportingPeriod
+from src.reports.result_store import ResultStore
+from src.reports.util import ReportOutputType, ReportProgress
+from src.database import DB_ENGINE
+from src.util.enums import TankType
+from src.util.errors import ReportCancelled
+
+logger = logging.getLogger(__name__)
+
+
+class ReportWorkerSignals(QObject):
+    # QRunnable is not a QObject so the signals live here
+    progress = pyqtSignal(object)  # ReportProgress
+    finished = pyqtSignal(object)  # list[TankFailure]
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class ReportWorker(QRunnable):
+    def __init__(
+            self,
+            facility_id: int,
+            tanks: list[tuple[TankType, int]],
+            reporting_period: ReportingPeriod,
+            output_type: ReportOutputType,
+    ) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+
+        self.facility_id = facility_id
+        self.tanks = tanks
+        self.reporting_period = reporting_period
+        self.output_type = output_type
+
+        self.signals = ReportWorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        # Picked up by the report before its next chunk (or before it starts if it is still queued)
+        self.cancel_event.set()
+
+    def handle_progress(self, progress: ReportProgress) -> None:
+        # Called on the worker thread, the signal is queued over to the UI thread
+        self.signals.progress.emit(progress)
+
+    def run(self) -> None:
+        try:
+            # The report opens its own session so it must be created on this thread
+            report = EmissionReport(
+                facility_id=self.facility_id,
+                tanks=self.tanks,
+                reporting_period=self.reporting_period,
+                result_store=ResultStore(DB_ENGINE),
+                progress_callback=self.handle_progress,
+                cancel_event=self.cancel_event,
+            )
+            report.check_cancelled()
+            report.calculate(self.output_type)
+        except ReportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logger.exception('Report failed')
+            self.signals.failed.emit(repr(e))
+        else:
+            self.signals.finished.emit(report.failures)
@@ -0,0 +1,135 @@
+from array import array
+from datetime import date
+from decimal import Decimal
+from enum import Enum, auto
+from typing import Hashable, Sequence
+import numpy as np
+from pint import Quantity
+
+from .util import TankEmission, EMISSIONS_UNIT
+from ..util.enums import TankType, MaterialType
+
+# Month code of chunks without a start date (labelled None)
+NO_MONTH = -1
+
+
+class LossType(Enum):
+    STANDING = auto()
+    WORKING = auto()
+
+
+class GroupBy(Enum):
+    TANK = auto()
+    MONTH = auto()
+    MIXTURE = auto()
+    MATERIAL = auto()
+    LOSS_TYPE = auto()
+
+
+class EmissionTable:
+    """
+    Columnar store of report emissions with one row per chunk, loss type and material.
+    Names are kept once per id, so a row is only a few integers and the emissions.
+    Rollups over any combination of columns are computed in one pass over the arrays.
+    """
+    def __init__(self) -> None:
+        # Columns
+        self.tanks = array('q')  # Code of the (type, id) of the tank, ids are only unique within a tank type
+        self.months = array('q')  # year * 12 + month - 1 of the chunk start (NO_MONTH without one)
+        self.mixture_ids = array('q')
+        self.materials = array('q')  # Code of the (type, id) of the material, ids are only unique within a type
+        self.loss_types = array('q')
+        self.emissions: list[Decimal] = []  # lb/yr
+
+        # Labels of the id columns
+        self.tank_codes: dict[tuple[TankType | None, int], int] = {}
+        self.tank_labels: list[tuple[TankType | None, int, str]] = []
+        self.mixture_names: dict[int, str] = {}
+        self.material_codes: dict[tuple[MaterialType, int], int] = {}
+        self.material_labels: list[tuple[MaterialType, int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.emissions)
+
+    def append(self, emission: TankEmission) -> None:
+        tank = (emission.tank_type, emission.tank_id)
+        if (tank_code := self.tank_codes.get(tank)) is None:
+            tank_code = self.tank_codes[tank] = len(self.tank_labels)
+            self.tank_labels.append((emission.tank_type, emission.tank_id, emission.tank_name))
+        month = NO_MONTH
+        if emission.start_date is not None:
+            month = emission.start_date.year * 12 + emission.start_date.month - 1
+
+        losses = [(LossType.STANDING, emission.standing_losses), (LossType.WORKING, emission.working_losses)]
+        for loss_type, mixture in losses:
+            self.mixture_names[mixture.mixture_id] = mixture.mixture_name
+            for material in mixture.material_emissions:
+                key = (material.material_type, material.material_id)
+                if (material_code := self.material_codes.get(key)) is None:
+                    material_code = self.material_codes[key] = len(self.material_labels)
+                    self.material_labels.append((material.material_type, material.material_id, material.material_name))
+
+                self.tanks.append(tank_code)
+                self.months.append(month)
+                self.mixture_ids.append(mixture.mixture_id)
+                self.materials.append(material_code)
+                self.loss_types.append(loss_type.value)
+                self.emissions.append(material.magnitude)
+
+    def _column(self, group: GroupBy) -> array:
+        match group:
+            case GroupBy.TANK:
+                return self.tanks
+            case GroupBy.MONTH:
+                return self.months
+            case GroupBy.MIXTURE:
+                return self.mixture_ids
+            case GroupBy.MATERIAL:
+                return self.materials
+            case GroupBy.LOSS_TYPE:
+                return self.loss_types
+
+    def _label(self, group: GroupBy, code: int) -> Hashable:
+        match group:
+            case GroupBy.TANK:
+                return self.tank_labels[code]
+            case GroupBy.MONTH:
+                return None if code == NO_MONTH else date(code // 12, code % 12 + 1, 1)
+            case GroupBy.MIXTURE:
+                return code, self.mixture_names[code]
+            case GroupBy.MATERIAL:
+                return self.material_labels[code]
+            case GroupBy.LOSS_TYPE:
+                return LossType(code)
+
+    def rollup(self, group_by: Sequence[GroupBy]) -> dict[tuple, Quantity]:
+        """
+        Total emissions per combination of the group by columns, in order of first appearance.
+        Keys are tuples with one label per column: (type, id, name) for tanks and materials, (id, name) for mixtures,
+        the first of the month (None for chunks without a start date) for months and a LossType for loss types.
+        """
+        if not self.emissions:
+            return {}
+
+        emissions = np.empty(len(self.emissions), dtype=object)
+        emissions[:] = self.emissions
+
+        if not group_by:
+            return {(): np.add.reduce(emissions) * EMISSIONS_UNIT}
+
+        # Number every distinct combination of the key columns
+        keys = np.column_stack([np.frombuffer(self._column(group), dtype=np.int64) for group in group_by])
+        unique_keys, first_rows, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        # Sum each group over contiguous runs of the rows sorted by group (stable, so the rows keep their order)
+        order = np.argsort(inverse, kind='stable')
+        starts = np.searchsorted(inverse[order], np.arange(len(unique_keys)))
+        totals = np.add.reduceat(emissions[order], starts)
+
+        rollup = {}
+        for group_index in np.argsort(first_rows, kind='stable'):
+            label = tuple(self._label(group, int(code)) for group, code in zip(group_by, unique_keys[group_index]))
+            rollup[label] = totals[group_index] * EMISSIONS_UNIT
+
+        return rollup
@@ -0,0 +1,552 @@
+import dataclasses
+import logging
+from dataclasses import dataclass
+import numpy as np
+
+from src.reports.components.mixture import MixtureArrays
+from src.reports.components.tanks.fixed_roof import FixedRoofTankShim
+from src.reports.components.time import ReportingChunk
+from src.reports.trace import CalculationTrace
+from src.util.errors import MissingData
+from src.util.metrics import time_methods
+from src.util.quantities import PI, R, to_decimal
+
+from ..util import TankEmission, MaterialEmission, MixtureEmission
+from ...util.enums import InsulationType
+
+logger = logging.getLogger(__name__)
+
+# Constants in the fixed units used by the arrays below
+PI_F = float(PI)
+R_F = float(R.magnitude)  # psi * ft^3 / (lb-mole * degR)
+GAL_PER_BBL = 42.0
+
+# Integer codes for the categorical tank columns
+INSULATION_NONE = 0
+INSULATION_PARTIAL = 1
+INSULATION_FULL = 2
+INSULATION_CODES = {
+    InsulationType.NONE: INSULATION_NONE,
+    InsulationType.PARTIAL: INSULATION_PARTIAL,
+    InsulationType.FULL: INSULATION_FULL,
+}
+
+ROOF_CONE = 0
+ROOF_DOME = 1
+ROOF_CODES = {
+    'Cone': ROOF_CONE,
+    'Dome': ROOF_DOME,
+}
+
+
+@dataclass
+class FixedRoofBatchInputs:
+    """
+    Every (tank, chunk) pair of a report packed into parallel arrays, one row per pair.
+    Values are plain floats in the units used by AP 42 Chapter 7 (ft, degR, psi, lb/lb-mole, gal).
+    """
+    # Tank
+    is_vertical: np.ndarray
+    is_underground: np.ndarray
+    insulation: np.ndarray  # INSULATION_* codes
+    roof_type: np.ndarray  # ROOF_* codes
+    shell_height: np.ndarray  # ft
+    shell_diameter: np.ndarray  # ft
+    roof_height: np.ndarray  # ft
+    roof_radius: np.ndarray  # ft
+    maximum_liquid_height: np.ndarray  # ft
+    minimum_liquid_height: np.ndarray  # ft
+    vent_breather_setting: np.ndarray  # psig
+    vent_vacuum_setting: np.ndarray  # psig
+    turnovers_per_year: np.ndarray
+    shell_solar_absorptance: np.ndarray
+    roof_solar_absorptance: np.ndarray
+
+    # Reporting chunk
+    reporting_days: np.ndarray
+    throughput: np.ndarray  # gal
+
+    # Meteorological chunk
+    average_temp_min: np.ndarray  # degR
+    average_temp_max: np.ndarray  # degR
+    average_daily_insolation: np.ndarray  # btu/(ft^2 day)
+    atmospheric_pressure: np.ndarray  # psia
+
+    # Mixture (rows x components)
+    mixture: MixtureArrays
+    working_loss_product_factor: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return self.shell_height.shape[0]
+
+    @classmethod
+    def from_chunks(cls, work: list[tuple[FixedRoofTankShim, ReportingChunk]]):
+        columns = {name: [] for name in cls.__dataclass_fields__}
+        mixture_arrays = {}
+
+        for shim, chunk in work:
+            tank = shim.compile()
+            site = chunk.site.compile()
+
+            if tank.is_vertical and tank.roof_type not in ROOF_CODES:
+                raise MissingData(f'Unknown roof type: {tank.roof_type}')
+
+            columns['is_vertical'].append(tank.is_vertical)
+            columns['is_underground'].append(tank.is_underground)
+            columns['insulation'].append(INSULATION_CODES[tank.insulation])
+            columns['roof_type'].append(ROOF_CODES.get(tank.roof_type, ROOF_CONE))
+            columns['shell_height'].append(float(tank.shell_height))
+            columns['shell_diameter'].append(float(tank.shell_diameter))
+            columns['roof_height'].append(float(tank.roof_height))
+            columns['roof_radius'].append(float(tank.roof_radius))
+            columns['maximum_liquid_height'].append(float(tank.maximum_liquid_height))
+            columns['minimum_liquid_height'].append(float(tank.minimum_liquid_height))
+            columns['vent_breather_setting'].append(float(tank.vent_breather_setting))
+            columns['vent_vacuum_setting'].append(float(tank.vent_vacuum_setting))
+            columns['turnovers_per_year'].append(tank.turnovers_per_year)
+            columns['shell_solar_absorptance'].append(float(tank.shell_solar_absorptance))
+            columns['roof_solar_absorptance'].append(float(tank.roof_solar_absorptance))
+
+            columns['reporting_days'].append(chunk.total_days())
+            columns['throughput'].append(float(chunk.throughput.to('gal/yr').magnitude))
+
+            columns['average_temp_min'].append(float(site.average_temp_min))
+            columns['average_temp_max'].append(float(site.average_temp_max))
+            columns['average_daily_insolation'].append(float(site.average_daily_insolation))
+            columns['atmospheric_pressure'].append(float(site.atmospheric_pressure))
+
+            # Chunks of the same tank usually share a mixture so only pack each mixture once
+            if (packed_mixture := mixture_arrays.get(id(chunk.mixture))) is None:
+                packed_mixture = chunk.mixture.to_arrays()
+                mixture_arrays[id(chunk.mixture)] = packed_mixture
+            columns['mixture'].append(packed_mixture)
+
+            # This quantity lives with the material so just use one of them
+            columns['working_loss_product_factor'].append(
+                float(chunk.mixture.components[0].constants.working_loss_product_factor)
+            )
+
+        arrays = {'mixture': MixtureArrays.stack(columns.pop('mixture'))}
+        for name, values in columns.items():
+            arrays[name] = np.array(values, dtype=float)
+
+        for name in ['is_vertical', 'is_underground']:
+            arrays[name] = arrays[name].astype(bool)
+        for name in ['insulation', 'roof_type', 'turnovers_per_year', 'reporting_days']:
+            arrays[name] = arrays[name].astype(int)
+
+        return cls(**arrays)
+
+    def tile(self, count: int):
+        # Every row repeated count times (all the rows, then all of them again, ...)
+        return dataclasses.replace(
+            self,
+            **{
+                field.name: getattr(self, field.name).tile(count) if field.name == 'mixture'
+                else np.tile(getattr(self, field.name), count)
+                for field in dataclasses.fields(self)
+            },
+        )
+
+    def with_liquid_heights(self, maximum_liquid_height: np.ndarray, minimum_liquid_height: np.ndarray):
+        # The turnovers fill the operating band (N = sum(H_QI) / (H_LX - H_LN)), so they scale inversely with its height
+        # (Tanks without a band keep their turnovers)
+        band = self.maximum_liquid_height - self.minimum_liquid_height
+        new_band = maximum_liquid_height - minimum_liquid_height
+        with np.errstate(invalid='ignore', divide='ignore'):
+            turnovers_per_year = np.where(
+                (band > 0) & (new_band > 0),
+                self.turnovers_per_year * (band / new_band),
+                self.turnovers_per_year,
+            )
+
+        return dataclasses.replace(
+            self,
+            maximum_liquid_height=maximum_liquid_height,
+            minimum_liquid_height=minimum_liquid_height,
+            turnovers_per_year=turnovers_per_year.astype(self.turnovers_per_year.dtype),
+        )
+
+
+@time_methods('fixed_roof_batch')
+@dataclass
+class FixedRoofBatchEmissions:
+    """
+    Array version of FixedRoofEmissions.
+    Each intermediate holds one value per row of the inputs and keeps the name used by the scalar calculation.
+    """
+    inputs: FixedRoofBatchInputs
+
+    # Tank geometry (adjusted for horizontal tanks)
+    shell_height: np.ndarray | None = None
+    shell_diameter: np.ndarray | None = None
+    tank_size_ratio: np.ndarray | None = None
+
+    # Standing loss components
+    vapor_space_volume: np.ndarray | None = None
+    stock_vapor_density: np.ndarray | None = None
+    vapor_space_expansion_factor: np.ndarray | None = None
+    vented_vapor_saturation_factor: np.ndarray | None = None
+
+    # Working loss components
+    net_working_loss_throughput: np.ndarray | None = None
+    working_loss_turnover_factor: np.ndarray | None = None
+    working_loss_product_factor: np.ndarray | None = None
+    vent_setting_correction_factor: np.ndarray | None = None
+
+    # Intermediate values
+    vapor_space_outage: np.ndarray | None = None
+    average_ambient_temperature: np.ndarray | None = None
+    average_ambient_temperature_range: np.ndarray | None = None
+    liquid_bulk_temperature: np.ndarray | None = None
+    average_daily_liquid_surface_temperature: np.ndarray | None = None
+    mixture_vapor_pressure: np.ndarray | None = None
+    mixture_molecular_weight: np.ndarray | None = None
+    vapor_weight_fraction: np.ndarray | None = None  # rows x components
+    average_vapor_temperature: np.ndarray | None = None
+    average_daily_vapor_temperature_range: np.ndarray | None = None
+    average_daily_vapor_pressure_range: np.ndarray | None = None
+    average_breather_pressure_range: np.ndarray | None = None
+    sum_of_increases_in_liquid_level: np.ndarray | None = None
+
+    # Results
+    standing_losses: np.ndarray | None = None
+    working_losses: np.ndarray | None = None
+
+    def _insulation_select(self, none: np.ndarray, partial: np.ndarray, full: np.ndarray) -> np.ndarray:
+        return np.select(
+            [
+                self.inputs.insulation == INSULATION_NONE,
+                self.inputs.insulation == INSULATION_PARTIAL,
+                self.inputs.insulation == INSULATION_FULL,
+            ],
+            [none, partial, full],
+        )
+
+    def _calculate_tank_dimensions(self) -> None:
+        # AP 42 Chapter 7 Equation 1-14 and 1-15 (Horizontal tanks only)
+        # D_E = sqrt((L * D) / (PI / 4))
+        # H_E = (PI / 4) * D
+        effective_diameter = np.sqrt((self.inputs.shell_height * self.inputs.shell_diameter) / (PI_F / 4))
+        effective_height = (PI_F / 4) * self.inputs.shell_diameter
+
+        self.shell_height = np.where(self.inputs.is_vertical, self.inputs.shell_height, effective_height)
+        self.shell_diameter = np.where(self.inputs.is_vertical, self.inputs.shell_diameter, effective_diameter)
+        self.tank_size_ratio = self.shell_height / self.shell_diameter
+
+    def _calculate_vapor_space_outage(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-16
+        # H_VO = H_S − H_L + H_RO (Vertical)
+        # H_VO = H_E / 2 (Horizontal)
+        tank_shell_radius = self.shell_diameter / 2
+
+        # Cone roofs
+        cone_roof_outage = self.inputs.roof_height / 3
+
+        # Dome roofs
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dome_roof_height = self.inputs.roof_radius - np.sqrt(self.inputs.roof_radius**2 - tank_shell_radius**2)
+            dome_roof_outage = dome_roof_height * (0.5 + 0.167 * (dome_roof_height / tank_shell_radius)**2)
+
+        roof_outage = np.where(self.inputs.roof_type == ROOF_DOME, dome_roof_outage, cone_roof_outage)
+        average_liquid_height = (self.inputs.maximum_liquid_height + self.inputs.minimum_liquid_height) / 2
+
+        vertical_outage = self.shell_height - average_liquid_height + roof_outage
+        horizontal_outage = self.shell_height / 2
+        return np.where(self.inputs.is_vertical, vertical_outage, horizontal_outage)
+
+    def _calculate_vapor_space_volume(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-3
+        self.vapor_space_outage = self._calculate_vapor_space_outage()
+        return (PI_F / 4 * self.shell_diameter**2) * self.vapor_space_outage
+
+    def _calculate_average_daily_ambient_temperature_range(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-11
+        return self.inputs.average_temp_max - self.inputs.average_temp_min
+
+    def _calculate_liquid_bulk_temperature(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-31
+        return self.average_ambient_temperature + (
+                0.003
+                * self.inputs.shell_solar_absorptance
+                * self.inputs.average_daily_insolation
+        )
+
+    def _calculate_average_daily_liquid_surface_temperature(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-27, 1-28, and 1-29
+        ratio = self.tank_size_ratio
+        alpha_r = self.inputs.roof_solar_absorptance
+        alpha_s = self.inputs.shell_solar_absorptance
+        solar_i = self.inputs.average_daily_insolation
+        t_aa = self.average_ambient_temperature
+        t_b = self.liquid_bulk_temperature
+
+        # Equation 1-27
+        denominator = 4.4 * ratio + 3.8
+        term1 = t_aa * (0.5 - (0.8 / denominator))
+        term2 = t_b * (0.5 + (0.8 / denominator))
+        term3 = ((0.021 * alpha_r * solar_i) + (0.013 * ratio * alpha_s * solar_i)) / denominator
+        uninsulated = term1 + term2 + term3
+
+        # Equation 1-29
+        partially_insulated = (0.3 * t_aa) + (0.7 * t_b) + (0.005 * alpha_r * solar_i)
+
+        # Fully insulated tanks have a surface temperature equal to the liquid bulk temperature
+        return self._insulation_select(uninsulated, partially_insulated, t_b)
+
+    def _calculate_average_vapor_temperature(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-32, 1-33, and 1-34
+        ratio = self.tank_size_ratio
+        alpha_r = self.inputs.roof_solar_absorptance
+        alpha_s = self.inputs.shell_solar_absorptance
+        solar_i = self.inputs.average_daily_insolation
+        t_aa = self.average_ambient_temperature
+        t_b = self.liquid_bulk_temperature
+
+        # Equation 1-32
+        # T_V = (numerator_1 + numerator_2 + numerator_3 + numerator_4) / denominator
+        numerator_1 = ((2.2 * ratio) + 1.1) * t_aa
+        numerator_2 = 0.8 * t_b
+        numerator_3 = 0.021 * alpha_r * solar_i
+        numerator_4 = 0.013 * ratio * alpha_s * solar_i
+        denominator = (2.2 * ratio) + 1.9
+        uninsulated = (numerator_1 + numerator_2 + numerator_3 + numerator_4) / denominator
+
+        # Equation 1-34
+        # T_V = (0.6 * T_AA) + (0.4 * T_B) + (0.01 * alpha_R * I)
+        partially_insulated = (0.6 * t_aa) + (0.4 * t_b) + (0.01 * alpha_r * solar_i)
+
+        return self._insulation_select(uninsulated, partially_insulated, t_b)
+
+    def _calculate_stock_density(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-22
+        self.average_ambient_temperature = (self.inputs.average_temp_max + self.inputs.average_temp_min) / 2
+        self.liquid_bulk_temperature = self._calculate_liquid_bulk_temperature()
+        self.average_daily_liquid_surface_temperature = self._calculate_average_daily_liquid_surface_temperature()
+
+        # Mixture vapor pressure and vapor molecular weight at the liquid surface temperature
+        vapor_state = self.inputs.mixture.calculate_vapor_state(self.average_daily_liquid_surface_temperature)
+        self.mixture_vapor_pressure = vapor_state.vapor_pressure
+        self.mixture_molecular_weight = vapor_state.vapor_molecular_weight
+        self.vapor_weight_fraction = vapor_state.vapor_weight_fraction
+
+        self.average_vapor_temperature = self._calculate_average_vapor_temperature()
+
+        # W_V = (M_V * P_VA) / (R * T_V)
+        return (self.mixture_molecular_weight * self.mixture_vapor_pressure) / (R_F * self.average_vapor_temperature)
+
+    def _calculate_average_daily_vapor_temperature_range(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-6, 1-7, and 1-8
+        self.average_ambient_temperature_range = self._calculate_average_daily_ambient_temperature_range()
+
+        ratio = self.tank_size_ratio
+        delta_t_aa = self.average_ambient_temperature_range
+        alpha_r = self.inputs.roof_solar_absorptance
+        alpha_s = self.inputs.shell_solar_absorptance
+        solar_i = self.inputs.average_daily_insolation
+
+        # Equation 1-6
+        # ∆T_V = (1 - (0.8 / (2.2 * (H_S / D) + 1.9))) * ∆T_AA + term_2_numerator / term_2_denominator
+        term_1 = (1 - 0.8 / (2.2 * ratio + 1.9)) * delta_t_aa
+        term_2_numerator = (0.042 * alpha_r * solar_i) + (0.026 * ratio * alpha_s * solar_i)
+        term_2_denominator = 2.2 * ratio + 1.9
+        uninsulated = term_1 + (term_2_numerator / term_2_denominator)
+
+        # Equation 1-8
+        # ∆T_V = (0.6 * ∆T_AA) + (0.02 * alpha_R * I)
+        partially_insulated = (0.6 * delta_t_aa) + (0.02 * alpha_r * solar_i)
+
+        # No variation of the vapor temperature
+        return self._insulation_select(uninsulated, partially_insulated, np.zeros(self.inputs.size))
+
+    def _average_daily_vapor_pressure_range(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-9
+        # ∆P_V = P_VX - P_VN
+        t_lx = self.average_daily_liquid_surface_temperature + (0.25 * self.average_ambient_temperature_range)
+        t_ln = self.average_daily_liquid_surface_temperature - (0.25 * self.average_ambient_temperature_range)
+
+        mixture = self.inputs.mixture
+        pressure_range = mixture.calculate_vapor_pressure(t_lx) - mixture.calculate_vapor_pressure(t_ln)
+
+        # Note on Equation 1-9: Fully insulated tanks have no pressure variations due to temperature
+        return np.where(self.inputs.insulation == INSULATION_FULL, 0.0, pressure_range)
+
+    def _calculate_breather_vent_pressure_setting_range(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-10
+        # ∆P_B = P_BP - P_BV
+        return self.inputs.vent_breather_setting - self.inputs.vent_vacuum_setting
+
+    def _calculate_vapor_space_expansion_factor(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-5
+        # K_E = ∆T_V/T_LA + (∆P_V − ∆P_B)/(P_A − P_VA)
+        self.average_daily_vapor_temperature_range = self._calculate_average_daily_vapor_temperature_range()
+        self.average_daily_vapor_pressure_range = self._average_daily_vapor_pressure_range()
+        self.average_breather_pressure_range = self._calculate_breather_vent_pressure_setting_range()
+
+        term1 = self.average_daily_vapor_temperature_range / self.average_daily_liquid_surface_temperature
+        term2_numerator = self.average_daily_vapor_pressure_range - self.average_breather_pressure_range
+        term2_denominator = self.inputs.atmospheric_pressure - self.mixture_vapor_pressure
+
+        # Vents that hold more than the daily pressure swing have no standing losses (K_E is never negative)
+        return np.maximum(term1 + (term2_numerator / term2_denominator), 0.0)
+
+    def _calculate_vented_vapor_saturation_factor(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-21
+        return 1 / (1 + (0.053 * self.mixture_vapor_pressure * self.vapor_space_outage))
+
+    def _calculate_standing_losses(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-2
+        # L~S = <days> * V~V * W~V * K~E * K~S
+        self.vapor_space_volume = self._calculate_vapor_space_volume()
+        self.stock_vapor_density = self._calculate_stock_density()
+        self.vapor_space_expansion_factor = self._calculate_vapor_space_expansion_factor()
+        self.vented_vapor_saturation_factor = self._calculate_vented_vapor_saturation_factor()
+
+        standing_losses = (self.inputs.reporting_days
+                           * self.vapor_space_volume
+                           * self.stock_vapor_density
+                           * self.vapor_space_expansion_factor
+                           * self.vented_vapor_saturation_factor)
+
+        # No standing losses for underground horizontal tanks (7.1-21, Note on 1-15)
+        return np.where(self.inputs.is_underground & ~self.inputs.is_vertical, 0.0, standing_losses)
+
+    def _calculate_sum_of_increases_in_liquid_level(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-37
+        # sum(H_QI) = (5.614 * Q) / [(PI / 4) * D**2]
+        return (5.614 * (self.inputs.throughput / GAL_PER_BBL)) / ((PI_F / 4) * self.shell_diameter**2)
+
+    def _calculate_net_working_loss_throughput(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-38
+        # V_Q = sum(H_QI) * (PI / 4) * D**2
+        return self.sum_of_increases_in_liquid_level * (PI_F / 4) * self.shell_diameter**2
+
+    def _calculate_working_loss_turnover_factor(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-35
+        # K_N = 1 (for turnovers <= 36 per year)
+        # K_N = (180 + N) / (6 * N) (for turnovers > 36 per year)
+        # N = sum(H_QI) / (H_LX - H_LN)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = self.sum_of_increases_in_liquid_level / (
+                    self.inputs.maximum_liquid_height - self.inputs.minimum_liquid_height
+            )
+            k_n = (180 + n) / (6 * n)
+
+        return np.where(self.inputs.turnovers_per_year <= 36, 1.0, k_n)
+
+    def _calculate_vent_setting_correction_factor(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-40 and 1-41
+        # TODO: P_I is the gauge pressure reading under normal conditions (0 = Tank at P_A)
+        vapor_gauge_pressure = 0.0
+        p_a = self.inputs.atmospheric_pressure
+        p_bp = self.inputs.vent_breather_setting
+
+        # Equation 1-40
+        # K_N * [(P_BP + P_A) / (P_I + P_A)] > 1.0
+        equation_1_40 = self.working_loss_turnover_factor * ((p_bp + p_a) / (vapor_gauge_pressure + p_a))
+
+        # Equation 1-41
+        # K_B = [((P_I + P_A) / K_N) - P_VA] / [P_BP + P_A - P_VA]
+        term1 = ((vapor_gauge_pressure + p_a) / self.working_loss_turnover_factor) - self.mixture_vapor_pressure
+        term2 = p_bp + p_a - self.mixture_vapor_pressure
+        equation_1_41 = term1 / term2
+
+        # If the breather vent is set between +- 0.03 psig, K_B = 1
+        outside_default_settings = (p_bp > 0.03) | (self.inputs.vent_vacuum_setting < -0.03)
+        return np.where(outside_default_settings & (equation_1_40 > 1.0), equation_1_41, 1.0)
+
+    def _calculate_working_losses(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-35
+        # L_W = V_Q ∗ K_N ∗ K_P ∗ W_V ∗ K_B
+        self.sum_of_increases_in_liquid_level = self._calculate_sum_of_increases_in_liquid_level()
+        self.net_working_loss_throughput = self._calculate_net_working_loss_throughput()
+        self.working_loss_turnover_factor = self._calculate_working_loss_turnover_factor()
+        self.working_loss_product_factor = self.inputs.working_loss_product_factor
+        self.vent_setting_correction_factor = self._calculate_vent_setting_correction_factor()
+
+        return (self.net_working_loss_throughput
+                * self.working_loss_turnover_factor
+                * self.working_loss_product_factor
+                * self.stock_vapor_density
+                * self.vent_setting_correction_factor)
+
+    def calculate_losses(self) -> tuple[np.ndarray, np.ndarray]:
+        self._calculate_tank_dimensions()
+        self.standing_losses = self._calculate_standing_losses()
+        self.working_losses = self._calculate_working_losses()
+
+        # AP 42 Chapter 7 Equation 1-1
+        # L_T = L_S + L_W
+        return self.standing_losses, self.working_losses
+
+    def build_tank_emissions(self, work: list[tuple[FixedRoofTankShim, ReportingChunk]]) -> list[TankEmission]:
+        if self.standing_losses is None:
+            self.calculate_losses()
+
+        tank_emissions = []
+        for row, (shim, chunk) in enumerate(work):
+            standing_emissions = []
+            working_emissions = []
+            for column, component in enumerate(chunk.mixture.components):
+                weight_fraction = self.vapor_weight_fraction[row, column]
+                standing_emissions.append(
+                    MaterialEmission(
+                        material_type=component.material_type,
+                        material_id=component.material.id,
+                        material_name=component.material.name,
+                        magnitude=to_decimal(weight_fraction * self.standing_losses[row]),
+                    )
+                )
+                working_emissions.append(
+                    MaterialEmission(
+                        material_type=component.material_type,
+                        material_id=component.material.id,
+                        material_name=component.material.name,
+                        magnitude=to_decimal(weight_fraction * self.working_losses[row]),
+                    )
+                )
+
+            tank_emissions.append(
+                TankEmission(
+                    tank_id=shim.tank.id,
+                    tank_name=shim.tank.name,
+                    standing_losses=MixtureEmission(
+                        mixture_id=chunk.mixture.db_id,
+                        mixture_name=chunk.mixture.name,
+                        material_emissions=standing_emissions,
+                    ),
+                    working_losses=MixtureEmission(
+                        mixture_id=chunk.mixture.db_id,
+                        mixture_name=chunk.mixture.name,
+                        material_emissions=working_emissions,
+                    ),
+                    start_date=chunk.start_date,
+                    end_date=chunk.end_date,
+                )
+            )
+
+        return tank_emissions
+
+    @classmethod
+    def calculate_total_emissions(
+            cls,
+            work: list[tuple[FixedRoofTankShim, ReportingChunk]],
+            trace: CalculationTrace | None = None,
+    ) -> list[TankEmission]:
+        if not work:
+            return []
+
+        batch = cls(FixedRoofBatchInputs.from_chunks(work))
+        standing_losses, working_losses = batch.calculate_losses()
+        logger.info(
+            'Batch of %s chunks; standing losses: %s, working losses: %s',
+            batch.inputs.size,
+            to_decimal(standing_losses.sum()),
+            to_decimal(working_losses.sum()),
+        )
+
+        if trace is not None:
+            trace.record_batch(batch, work)
+
+        return batch.build_tank_emissions(work)
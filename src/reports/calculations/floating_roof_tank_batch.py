@@ -0,0 +1,355 @@
+import logging
+from dataclasses import dataclass
+import numpy as np
+
+from src.reports.components.meteorological import count_days_per_month
+from src.reports.components.mixture import MixtureArrays, MixtureShim
+from src.reports.components.tanks.external_floating_roof import ExternalFloatingRoofTankShim
+from src.reports.components.tanks.floating_roof import calculate_monthly_loss_factors
+from src.reports.components.tanks.internal_floating_roof import InternalFloatingRoofTankShim
+from src.reports.components.time import ReportingChunk
+from src.util.errors import MissingData
+from src.util.metrics import time_methods
+from src.util.quantities import PI, to_decimal
+
+from ..util import TankEmission, MaterialEmission, MixtureEmission
+
+logger = logging.getLogger(__name__)
+
+# Constants in the fixed units used by the arrays below
+PI_F = float(PI)
+GAL_PER_BBL = 42.0
+DAYS_PER_YEAR = 365.0
+MONTHS = 12
+
+# AP 42 Chapter 7 Table 7.1-10 - Clingage factor (C_S) for light rust
+SHELL_CLINGAGE_FACTOR = 0.0015  # bbl/1,000 ft^2
+
+# AP 42 Chapter 7 Section 7.1.3.2.2.2 - Effective column diameter (F_C)
+EFFECTIVE_COLUMN_DIAMETER = 1.0  # ft
+
+# AP 42 Chapter 7 Section 7.1.3.2.1 - Product factor (K_C), crude oils are not told apart from other stocks
+PRODUCT_FACTOR = 1.0
+
+FloatingRoofTankShim = InternalFloatingRoofTankShim | ExternalFloatingRoofTankShim
+
+
+def _mixture_liquid_density(mixture: MixtureShim) -> float:
+    # Liquid density (lb/gal) of the mixture as the weight of the components over their volume
+    for component in mixture.components:
+        if component.constants.molecular_weight is None:
+            raise MissingData(f'No liquid molecular weight for {component.material.name}')
+
+    weights = [float(component.mole_fraction) * float(component.constants.molecular_weight)
+               for component in mixture.components]
+
+    volume = 0.0
+    for component, weight in zip(mixture.components, weights):
+        if component.constants.liquid_density is None:
+            raise MissingData(f'No liquid density for {component.material.name}')
+        volume += weight / float(component.constants.liquid_density)
+
+    return sum(weights) / volume
+
+
+@dataclass
+class FloatingRoofBatchInputs:
+    """
+    Every (tank, chunk) pair of the floating roof tanks of a report packed into parallel arrays, one row per pair.
+    Values are plain floats in the units used by AP 42 Chapter 7 (ft, degR, psi, lb/lb-mole, lb/gal).
+    """
+    # Tank
+    shell_height: np.ndarray  # ft
+    shell_diameter: np.ndarray  # ft
+    shell_solar_absorptance: np.ndarray
+    roof_solar_absorptance: np.ndarray
+    support_column_count: np.ndarray
+    deck_seam_loss_factor: np.ndarray  # K_D * S_D (lb-mole/ft^2-yr)
+    rim_seal_loss_factor: np.ndarray  # K_R averaged over the days of the chunk (lb-mole/ft-yr)
+    deck_fitting_loss_factor: np.ndarray  # F_F averaged over the days of the chunk (lb-mole/yr)
+
+    # Reporting chunk
+    reporting_days: np.ndarray
+    throughput: np.ndarray  # gal (NaN when the liquid level decrease is given instead)
+    sum_liquid_level_decrease: np.ndarray  # ft (NaN when the throughput is given instead)
+
+    # Meteorological chunk
+    average_temp_min: np.ndarray  # degR
+    average_temp_max: np.ndarray  # degR
+    average_daily_insolation: np.ndarray  # btu/(ft^2 day)
+    atmospheric_pressure: np.ndarray  # psia
+
+    # Mixture (rows x components)
+    mixture: MixtureArrays
+    liquid_density: np.ndarray  # lb/gal
+
+    @property
+    def size(self) -> int:
+        return self.shell_height.shape[0]
+
+    @classmethod
+    def from_chunks(cls, work: list[tuple[FloatingRoofTankShim, ReportingChunk]], monthly_wind_speed: np.ndarray):
+        # The monthly wind speeds (mph, January first) are those of the site of every tank in the work
+        columns = {name: [] for name in cls.__dataclass_fields__}
+        mixture_arrays = {}
+        liquid_densities = {}
+
+        # Each distinct tank gets one set of monthly loss factors, each chunk the days it has in every month
+        tank_index = {}
+        tanks = []
+        rows_tank = np.zeros(len(work), dtype=int)
+        month_days = np.zeros((len(work), MONTHS))
+
+        for row, (shim, chunk) in enumerate(work):
+            tank = shim.compile()
+            site = chunk.site.compile()
+
+            if chunk.throughput is None and chunk.sum_liquid_level_decrease is None:
+                raise MissingData(f'{tank.name}: No throughput or liquid level decrease from {chunk.start_date}')
+
+            columns['shell_height'].append(float(tank.shell_height))
+            columns['shell_diameter'].append(float(tank.shell_diameter))
+            columns['shell_solar_absorptance'].append(float(tank.shell_solar_absorptance))
+            columns['roof_solar_absorptance'].append(float(tank.roof_solar_absorptance))
+            columns['support_column_count'].append(tank.support_column_count)
+            columns['deck_seam_loss_factor'].append(float(tank.deck_seam_loss_factor))
+
+            if (index := tank_index.get(id(shim))) is None:
+                index = tank_index[id(shim)] = len(tanks)
+                tanks.append(tank)
+            rows_tank[row] = index
+            for month, days in count_days_per_month(chunk.start_date, chunk.end_date).items():
+                month_days[row, month - 1] = days
+
+            columns['reporting_days'].append(chunk.total_days())
+            columns['throughput'].append(
+                np.nan if chunk.throughput is None else float(chunk.throughput.to('gal/yr').magnitude)
+            )
+            columns['sum_liquid_level_decrease'].append(
+                np.nan if chunk.sum_liquid_level_decrease is None
+                else float(chunk.sum_liquid_level_decrease.to('ft/yr').magnitude)
+            )
+
+            columns['average_temp_min'].append(float(site.average_temp_min))
+            columns['average_temp_max'].append(float(site.average_temp_max))
+            columns['average_daily_insolation'].append(float(site.average_daily_insolation))
+            columns['atmospheric_pressure'].append(float(site.atmospheric_pressure))
+
+            # Chunks of the same tank usually share a mixture so only pack each mixture once
+            if (packed_mixture := mixture_arrays.get(id(chunk.mixture))) is None:
+                packed_mixture = chunk.mixture.to_arrays()
+                mixture_arrays[id(chunk.mixture)] = packed_mixture
+                liquid_densities[id(chunk.mixture)] = _mixture_liquid_density(chunk.mixture)
+            columns['mixture'].append(packed_mixture)
+            columns['liquid_density'].append(liquid_densities[id(chunk.mixture)])
+
+        # Rim seal and deck fitting factors of every tank for every month at once
+        # AP 42 Chapter 7 Section 7.1.3.2 - The wind speed is zero for internal and domed external floating roofs
+        is_wind_exposed = np.array([tank.is_wind_exposed for tank in tanks], dtype=bool)[:, np.newaxis]
+        wind_speed = np.where(is_wind_exposed, np.asarray(monthly_wind_speed, dtype=float)[np.newaxis, :MONTHS], 0.0)
+        rim_seal, deck_fittings = calculate_monthly_loss_factors([tank.loss_factors for tank in tanks], wind_speed)
+
+        # The factors of a chunk are the average over its days (the wind terms are not linear in the wind speed)
+        chunk_days = month_days.sum(axis=1)
+        columns.pop('rim_seal_loss_factor')
+        columns.pop('deck_fitting_loss_factor')
+        arrays = {
+            'mixture': MixtureArrays.stack(columns.pop('mixture')),
+            'rim_seal_loss_factor': (month_days * rim_seal[rows_tank]).sum(axis=1) / chunk_days,
+            'deck_fitting_loss_factor': (month_days * deck_fittings[rows_tank]).sum(axis=1) / chunk_days,
+        }
+        for name, values in columns.items():
+            arrays[name] = np.array(values, dtype=float)
+
+        for name in ['support_column_count', 'reporting_days']:
+            arrays[name] = arrays[name].astype(int)
+
+        return cls(**arrays)
+
+
+@time_methods('floating_roof_batch')
+@dataclass
+class FloatingRoofBatchEmissions:
+    """
+    AP 42 Chapter 7 losses of internal and external floating roof tanks.
+    Each intermediate holds one value per row of the inputs.
+    """
+    inputs: FloatingRoofBatchInputs
+
+    # Intermediate values
+    average_ambient_temperature: np.ndarray | None = None
+    liquid_bulk_temperature: np.ndarray | None = None
+    average_daily_liquid_surface_temperature: np.ndarray | None = None
+    mixture_vapor_pressure: np.ndarray | None = None
+    mixture_molecular_weight: np.ndarray | None = None
+    vapor_weight_fraction: np.ndarray | None = None  # rows x components
+    liquid_weight_fraction: np.ndarray | None = None  # rows x components
+    vapor_pressure_function: np.ndarray | None = None
+    sum_of_decreases_in_liquid_level: np.ndarray | None = None
+
+    # Results
+    rim_seal_losses: np.ndarray | None = None
+    deck_fitting_losses: np.ndarray | None = None
+    deck_seam_losses: np.ndarray | None = None
+    standing_losses: np.ndarray | None = None
+    withdrawal_losses: np.ndarray | None = None
+
+    def _calculate_liquid_bulk_temperature(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-31
+        return self.average_ambient_temperature + (
+                0.003
+                * self.inputs.shell_solar_absorptance
+                * self.inputs.average_daily_insolation
+        )
+
+    def _calculate_average_daily_liquid_surface_temperature(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-27
+        ratio = self.inputs.shell_height / self.inputs.shell_diameter
+        alpha_r = self.inputs.roof_solar_absorptance
+        alpha_s = self.inputs.shell_solar_absorptance
+        solar_i = self.inputs.average_daily_insolation
+        t_aa = self.average_ambient_temperature
+        t_b = self.liquid_bulk_temperature
+
+        denominator = 4.4 * ratio + 3.8
+        term1 = t_aa * (0.5 - (0.8 / denominator))
+        term2 = t_b * (0.5 + (0.8 / denominator))
+        term3 = ((0.021 * alpha_r * solar_i) + (0.013 * ratio * alpha_s * solar_i)) / denominator
+        return term1 + term2 + term3
+
+    def _calculate_vapor_pressure_function(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 2-4
+        # P* = (P_VA / P_A) / [1 + (1 - (P_VA / P_A))^0.5]^2
+        self.average_ambient_temperature = (self.inputs.average_temp_max + self.inputs.average_temp_min) / 2
+        self.liquid_bulk_temperature = self._calculate_liquid_bulk_temperature()
+        self.average_daily_liquid_surface_temperature = self._calculate_average_daily_liquid_surface_temperature()
+
+        vapor_state = self.inputs.mixture.calculate_vapor_state(self.average_daily_liquid_surface_temperature)
+        self.mixture_vapor_pressure = vapor_state.vapor_pressure
+        self.mixture_molecular_weight = vapor_state.vapor_molecular_weight
+        self.vapor_weight_fraction = vapor_state.vapor_weight_fraction
+
+        pressure_ratio = self.mixture_vapor_pressure / self.inputs.atmospheric_pressure
+        return pressure_ratio / (1 + np.sqrt(1 - pressure_ratio))**2
+
+    def _calculate_standing_losses(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 2-2, 2-13, and 2-18
+        # L_R = K_R * D * P* * M_V * K_C
+        # L_F = F_F * P* * M_V * K_C
+        # L_D = K_D * S_D * D^2 * P* * M_V * K_C
+        self.vapor_pressure_function = self._calculate_vapor_pressure_function()
+        vapor_term = self.vapor_pressure_function * self.mixture_molecular_weight * PRODUCT_FACTOR
+        diameter = self.inputs.shell_diameter
+
+        self.rim_seal_losses = self.inputs.rim_seal_loss_factor * diameter * vapor_term
+        self.deck_fitting_losses = self.inputs.deck_fitting_loss_factor * vapor_term
+        self.deck_seam_losses = self.inputs.deck_seam_loss_factor * diameter**2 * vapor_term
+
+        # The factors are per year, so scale to the days of the chunk
+        annual_losses = self.rim_seal_losses + self.deck_fitting_losses + self.deck_seam_losses
+        return annual_losses * (self.inputs.reporting_days / DAYS_PER_YEAR)
+
+    def _calculate_sum_of_decreases_in_liquid_level(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 1-37 (for withdrawals)
+        # sum(H_QD) = (5.614 * Q) / [(PI / 4) * D**2]
+        from_throughput = (5.614 * (self.inputs.throughput / GAL_PER_BBL)) / ((PI_F / 4) * self.inputs.shell_diameter**2)
+        return np.where(
+            np.isnan(self.inputs.sum_liquid_level_decrease),
+            from_throughput,
+            self.inputs.sum_liquid_level_decrease,
+        )
+
+    def _calculate_withdrawal_losses(self) -> np.ndarray:
+        # AP 42 Chapter 7 Equation 2-19
+        # L_WD = (0.943 * Q * C_S * W_L / D) * [1 + (N_C * F_C / D)]
+        # With Q from the liquid level decrease: 0.943 * Q / D = 0.042 * PI * sum(H_QD) * D
+        self.sum_of_decreases_in_liquid_level = self._calculate_sum_of_decreases_in_liquid_level()
+
+        mixture = self.inputs.mixture
+        liquid_weights = mixture.mole_fraction * mixture.molecular_weight
+        self.liquid_weight_fraction = liquid_weights / liquid_weights.sum(axis=-1)[..., np.newaxis]
+
+        diameter = self.inputs.shell_diameter
+        column_term = 1 + (self.inputs.support_column_count * EFFECTIVE_COLUMN_DIAMETER / diameter)
+        return (0.042 * PI_F
+                * self.sum_of_decreases_in_liquid_level
+                * diameter
+                * SHELL_CLINGAGE_FACTOR
+                * self.inputs.liquid_density
+                * column_term)
+
+    def calculate_losses(self) -> tuple[np.ndarray, np.ndarray]:
+        self.standing_losses = self._calculate_standing_losses()
+        self.withdrawal_losses = self._calculate_withdrawal_losses()
+
+        # AP 42 Chapter 7 Equation 2-1
+        # L_T = L_R + L_WD + L_F + L_D
+        return self.standing_losses, self.withdrawal_losses
+
+    def build_tank_emissions(self, work: list[tuple[FloatingRoofTankShim, ReportingChunk]]) -> list[TankEmission]:
+        if self.standing_losses is None:
+            self.calculate_losses()
+
+        tank_emissions = []
+        for row, (shim, chunk) in enumerate(work):
+            # Standing losses leave as vapor, withdrawal losses as the liquid left on the shell
+            standing_emissions = []
+            withdrawal_emissions = []
+            for column, component in enumerate(chunk.mixture.components):
+                standing_emissions.append(
+                    MaterialEmission(
+                        material_type=component.material_type,
+                        material_id=component.material.id,
+                        material_name=component.material.name,
+                        magnitude=to_decimal(self.vapor_weight_fraction[row, column] * self.standing_losses[row]),
+                    )
+                )
+                withdrawal_emissions.append(
+                    MaterialEmission(
+                        material_type=component.material_type,
+                        material_id=component.material.id,
+                        material_name=component.material.name,
+                        magnitude=to_decimal(self.liquid_weight_fraction[row, column] * self.withdrawal_losses[row]),
+                    )
+                )
+
+            tank_emissions.append(
+                TankEmission(
+                    tank_id=shim.tank.id,
+                    tank_name=shim.tank.name,
+                    standing_losses=MixtureEmission(
+                        mixture_id=chunk.mixture.db_id,
+                        mixture_name=chunk.mixture.name,
+                        material_emissions=standing_emissions,
+                    ),
+                    working_losses=MixtureEmission(
+                        mixture_id=chunk.mixture.db_id,
+                        mixture_name=chunk.mixture.name,
+                        material_emissions=withdrawal_emissions,
+                    ),
+                    start_date=chunk.start_date,
+                    end_date=chunk.end_date,
+                )
+            )
+
+        return tank_emissions
+
+    @classmethod
+    def calculate_total_emissions(
+            cls,
+            work: list[tuple[FloatingRoofTankShim, ReportingChunk]],
+            monthly_wind_speed: np.ndarray,
+    ) -> list[TankEmission]:
+        if not work:
+            return []
+
+        batch = cls(FloatingRoofBatchInputs.from_chunks(work, monthly_wind_speed))
+        standing_losses, withdrawal_losses = batch.calculate_losses()
+        logger.info(
+            'Batch of %s chunks; standing losses: %s, withdrawal losses: %s',
+            batch.inputs.size,
+            to_decimal(standing_losses.sum()),
+            to_decimal(withdrawal_losses.sum()),
+        )
+
+        return batch.build_tank_emissions(work)
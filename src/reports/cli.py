@@ -0,0 +1,259 @@
+"""
+Headless reports for every facility in the database (or a filtered subset) without the GUI.
+
+    python -m src.reports.cli --year 2024 --output-dir reports
+    python -m src.reports.cli --start 2024-01-01 --end 2024-06-30 --facility 1 --facility 3 --format csv json
+
+The database is picked with the RAPID_TANKS_DB_PATH environment variable (the dev database otherwise).
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import date, datetime
+from pathlib import Path
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database import DB_ENGINE, DB_FILE_PATH
+from src.database.definitions.facility import Facility
+from src.reports.components.time import ReportingPeriod, ReportingTimeFrame
+from src.reports.emission_report import EmissionReport
+from src.reports.outputs.csv import CsvOutput
+from src.reports.outputs.json import JsonOutput
+from src.reports.outputs.sink import OutputSink
+from src.reports.util import CalculationEngine, ReportOutputType
+from src.util.enums import TankType
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ['csv', 'json']
+SUMMARY_FILE_NAME = 'summary.json'
+
+
+@dataclass(frozen=True)
+class FacilityJob:
+    facility_id: int
+    facility_name: str
+    tanks: list[tuple[TankType, int]]
+    reporting_period: ReportingPeriod
+    engine: CalculationEngine
+    output_dir: Path
+    formats: list[str]
+
+
+@dataclass
+class FacilitySummary:
+    facility_id: int
+    facility_name: str
+    tank_count: int
+    succeeded: bool
+    seconds: float
+    outputs: list[str] = field(default_factory=list)  # Only for completed reports
+    failed_tanks: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def file_stem(facility_id: int, facility_name: str) -> str:
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', facility_name).strip('-').lower()
+    return f'{facility_id}-{slug}' if slug else str(facility_id)
+
+
+def load_jobs(args: argparse.Namespace, reporting_period: ReportingPeriod) -> list[FacilityJob]:
+    jobs = []
+    with Session(DB_ENGINE) as session:
+        query = select(Facility).order_by(Facility.id)
+        if args.facility:
+            query = query.where(Facility.id.in_(args.facility))
+        if args.name:
+            query = query.where(Facility.name.contains(args.name))
+
+        for facility in session.scalars(query):
+            tanks = [
+                (TankType.VERTICAL_FIXED_ROOF if tank.is_vertical else TankType.HORIZONTAL_FIXED_ROOF, tank.id)
+                for tank in facility.fixed_roof_tanks
+            ]
+            tanks.extend((TankType.INTERNAL_FLOATING_ROOF, tank.id) for tank in facility.internal_floating_roof_tanks)
+            tanks.extend(
+                (TankType.DOMED_EXTERNAL_FLOATING_ROOF if tank.is_domed else TankType.EXTERNAL_FLOATING_ROOF, tank.id)
+                for tank in facility.external_floating_roof_tanks
+            )
+
+            jobs.append(
+                FacilityJob(
+                    facility_id=facility.id,
+                    facility_name=facility.name,
+                    tanks=tanks,
+                    reporting_period=reporting_period,
+                    engine=args.engine,
+                    output_dir=args.output_dir,
+                    formats=args.format,
+                )
+            )
+
+    return jobs
+
+
+def run_facility(job: FacilityJob) -> FacilitySummary:
+    start = time.perf_counter()
+    summary = FacilitySummary(
+        facility_id=job.facility_id,
+        facility_name=job.facility_name,
+        tank_count=len(job.tanks),
+        succeeded=False,
+        seconds=0.0,
+    )
+
+    report_start, report_end = job.reporting_period.get_date_range()
+    stem = file_stem(job.facility_id, job.facility_name)
+    sinks: list[OutputSink] = []
+    paths: list[Path] = []
+    try:
+        # The sinks are built inside the try so a failure opening one still closes the others
+        for output_format in job.formats:
+            match output_format:
+                case 'csv':
+                    path = job.output_dir / f'{stem}.csv'
+                    sinks.append(CsvOutput(path))
+                case 'json':
+                    path = job.output_dir / f'{stem}.json'
+                    sinks.append(
+                        JsonOutput(path, metadata={
+                            'facility_id': job.facility_id,
+                            'facility_name': job.facility_name,
+                            'start_date': report_start.isoformat(),
+                            'end_date': report_end.isoformat(),
+                        })
+                    )
+                case _:
+                    raise ValueError(f'Unknown output format: {output_format}')
+            paths.append(path)
+
+        # Facilities are already spread over the processes so each report runs serially
+        report = EmissionReport(
+            facility_id=job.facility_id,
+            tanks=job.tanks,
+            reporting_period=job.reporting_period,
+            engine=job.engine,
+            workers=1,
+        )
+        report.calculate(ReportOutputType.LOG, sinks=sinks)
+        summary.outputs = [path.name for path in paths]
+        summary.failed_tanks = [failure.tank_name for failure in report.failures]
+        summary.succeeded = not report.failures
+    except Exception as e:
+        logger.exception(f'{job.facility_name}: Report failed')
+        summary.error = repr(e)
+        for sink in sinks:
+            sink.close()
+
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+def _initialize_worker(log_level: int) -> None:
+    # Connections inherited from the parent process must not be shared
+    DB_ENGINE.dispose(close=False)
+    logging.basicConfig(level=log_level, format='%(asctime)s %(processName)s %(name)s %(levelname)s: %(message)s')
+
+
+def parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m src.reports.cli',
+        description='Calculate emission reports for the facilities in the database',
+    )
+
+    period = parser.add_argument_group('reporting period (a year, a month of a year, or a custom range)')
+    period.add_argument('--year', type=int)
+    period.add_argument('--month', type=int, choices=range(1, 13), metavar='1-12')
+    period.add_argument('--start', type=parse_date, help='First day (YYYY-MM-DD)')
+    period.add_argument('--end', type=parse_date, help='Last day (YYYY-MM-DD)')
+
+    parser.add_argument('--facility', type=int, action='append', help='Facility id (repeat for more than one)')
+    parser.add_argument('--name', help='Only facilities whose name contains this')
+    parser.add_argument('--engine', type=lambda value: CalculationEngine[value.upper()], default=CalculationEngine.BATCH,
+                        help='scalar or batch (default: batch)')
+    parser.add_argument('--workers', type=int, default=None, help='Facilities calculated at once (default: every core)')
+    parser.add_argument('--output-dir', type=Path, default=Path('reports'))
+    parser.add_argument('--format', nargs='+', choices=OUTPUT_FORMATS, default=['csv'])
+    parser.add_argument('--verbose', action='store_true', help='Log the progress of every report')
+
+    args = parser.parse_args(argv)
+    if (args.start is None) != (args.end is None):
+        parser.error('--start and --end go together')
+    if args.start is not None and (args.year is not None or args.month is not None):
+        parser.error('--start/--end can not be combined with --year/--month')
+    if args.start is None and args.year is None:
+        parser.error('a reporting period is required (--year or --start/--end)')
+    if args.start is not None and args.start > args.end:
+        parser.error('--start is after --end')
+
+    return args
+
+
+def build_reporting_period(args: argparse.Namespace) -> ReportingPeriod:
+    if args.start is not None:
+        return ReportingPeriod(ReportingTimeFrame.CUSTOM, custom_start_date=args.start, custom_end_date=args.end)
+    elif args.month is not None:
+        return ReportingPeriod(ReportingTimeFrame.MONTH, year=args.year, month=args.month)
+    else:
+        return ReportingPeriod(ReportingTimeFrame.ANNUAL, year=args.year)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    log_level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(level=log_level, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+
+    reporting_period = build_reporting_period(args)
+    jobs = load_jobs(args, reporting_period)
+    if not jobs:
+        print('No facilities match', file=sys.stderr)
+        return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    if args.workers == 1 or len(jobs) == 1:
+        summaries = [run_facility(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+                max_workers=args.workers,
+                initializer=_initialize_worker,
+                initargs=(log_level,),
+        ) as executor:
+            summaries = list(executor.map(run_facility, jobs))
+
+    report_start, report_end = reporting_period.get_date_range()
+    (args.output_dir / SUMMARY_FILE_NAME).write_text(json.dumps(
+        {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'database': str(DB_FILE_PATH),
+            'start_date': report_start.isoformat(),
+            'end_date': report_end.isoformat(),
+            'engine': args.engine.name.lower(),
+            'seconds': time.perf_counter() - start,
+            'facilities': [asdict(summary) for summary in summaries],
+        },
+        indent=2,
+    ))
+
+    for summary in summaries:
+        status = 'ok' if summary.succeeded else f'FAILED {summary.error or ", ".join(summary.failed_tanks)}'
+        print(f'{summary.facility_id:>6} {summary.facility_name:<40} {summary.tank_count:>4} tanks '
+              f'{summary.seconds:>8.2f} s  {status}')
+
+    failed = sum(not summary.succeeded for summary in summaries)
+    print(f'{len(summaries) - failed} of {len(summaries)} facilities written to {args.output_dir}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
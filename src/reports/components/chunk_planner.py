@@ -0,0 +1,126 @@
+import bisect
+import itertools
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pint import Quantity
+
+from src.database.definitions.mixture import Mixture
+from src.database.definitions.service_record import FrtServiceRecord, IfrtServiceRecord
+from src.reports.components.time import get_moth_range
+
+ServiceRecord = FrtServiceRecord | IfrtServiceRecord
+
+
+def count_days(start: date, end: date) -> int:
+    # Chunks and service records include both their start and end date
+    return (end - start).days + 1
+
+
+def split_by_month(start: date, end: date) -> list[tuple[date, date]]:
+    ranges = []
+    while start <= end:
+        _, month_end = get_moth_range(start.year, start.month)
+        ranges.append((start, min(end, month_end)))
+        start = month_end + timedelta(days=1)
+
+    return ranges
+
+
+class ServiceRecordIndex:
+    """
+    Service records of a tank sorted by start date so overlaps with a date range are found by binary search.
+    Records are allowed to overlap each other, the running maximum of the end dates keeps the search correct.
+    """
+    def __init__(self, records: list[ServiceRecord]) -> None:
+        self.records = sorted(records, key=lambda record: (record.start_date, record.end_date))
+        self.start_dates = [record.start_date for record in self.records]
+        self.latest_end_dates = list(itertools.accumulate((record.end_date for record in self.records), max))
+
+    def overlapping(self, start: date, end: date) -> list[ServiceRecord]:
+        # Skip every record that ends before the range and stop at the first record starting after it
+        first = bisect.bisect_left(self.latest_end_dates, start)
+        last = bisect.bisect_right(self.start_dates, end)
+        return [record for record in self.records[first:last] if record.end_date >= start]
+
+
+def _per_day(quantity: Quantity | None, days: int) -> Quantity | None:
+    return None if quantity is None else quantity / days
+
+
+def _for_days(quantity: Quantity | None, days: int) -> Quantity | None:
+    return None if quantity is None else quantity * days
+
+
+def _add_optional(first: Quantity | None, second: Quantity | None) -> Quantity | None:
+    if first is None or second is None:
+        return second if first is None else first
+    return first + second
+
+
+@dataclass
+class PlannedChunk:
+    start_date: date
+    end_date: date
+    mixture: Mixture | None  # Missing mixtures are reported when the chunk is built
+    throughput: Quantity | None  # gal over the chunk
+    sum_liquid_level_decrease: Quantity | None = None  # ft over the chunk (floating roof tanks only)
+    throughput_per_day: Quantity | None = None
+    decrease_per_day: Quantity | None = None
+
+    def can_merge(self, other: 'PlannedChunk') -> bool:
+        # Neighbouring days of the same month share meteorological data
+        # The turnover factor (K_N) is not linear in the throughput, so only chunks filled at the same daily rate
+        # give the same losses merged as they do apart
+        return (
+            self.mixture is not None
+            and other.mixture is not None
+            and self.end_date + timedelta(days=1) == other.start_date
+            and (self.start_date.year, self.start_date.month) == (other.start_date.year, other.start_date.month)
+            and self.mixture.id == other.mixture.id
+            and self.throughput_per_day == other.throughput_per_day
+            and self.decrease_per_day == other.decrease_per_day
+        )
+
+    def merge(self, other: 'PlannedChunk') -> None:
+        self.end_date = other.end_date
+        self.throughput = _add_optional(self.throughput, other.throughput)
+        self.sum_liquid_level_decrease = _add_optional(self.sum_liquid_level_decrease, other.sum_liquid_level_decrease)
+
+
+class ChunkPlanner:
+    """
+    Breaks the reporting range of a tank into chunks that each cover one mixture and at most one month.
+    """
+    def __init__(self, report_start: date, report_end: date) -> None:
+        self.report_start = report_start
+        self.report_end = report_end
+
+    def plan(self, records: list[ServiceRecord]) -> list[PlannedChunk]:
+        index = ServiceRecordIndex(records)
+
+        chunks: list[PlannedChunk] = []
+        for record in index.overlapping(self.report_start, self.report_end):
+            # Spread the throughput (or liquid level decrease) of the record evenly over its days
+            record_days = count_days(record.start_date, record.end_date)
+            throughput_per_day = _per_day(record.throughput, record_days)
+            decrease_per_day = _per_day(getattr(record, 'sum_liquid_level_decrease', None), record_days)
+
+            record_start = max(self.report_start, record.start_date)
+            record_end = min(self.report_end, record.end_date)
+            for chunk_start, chunk_end in split_by_month(record_start, record_end):
+                chunk = PlannedChunk(
+                    start_date=chunk_start,
+                    end_date=chunk_end,
+                    mixture=record.mixture,
+                    throughput=_for_days(throughput_per_day, count_days(chunk_start, chunk_end)),
+                    sum_liquid_level_decrease=_for_days(decrease_per_day, count_days(chunk_start, chunk_end)),
+                    throughput_per_day=throughput_per_day,
+                    decrease_per_day=decrease_per_day,
+                )
+
+                if chunks and chunks[-1].can_merge(chunk):
+                    chunks[-1].merge(chunk)
+                else:
+                    chunks.append(chunk)
+
+        return chunks
@@ -1,10 +1,141 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from decimal import Decimal
-from pint import Quantity
+from sqlalchemy import event
+from typing import TYPE_CHECKING
+import numpy as np
 
-from src import unit_registry
 from src.database.definitions.material import Petrochemical, PetroleumLiquid
+from src.util.cache import LruCache
 from src.util.enums import MaterialType
+from src.util.errors import MissingData
+from src.util.quantities import MMHG_PER_PSI, DEGR_AT_ZERO_DEGC, DEGR_PER_DEGC
+
+if TYPE_CHECKING:
+    from src.reports.components.vapor_pressure_table import VaporPressureTable
+
+MMHG_PER_PSI_F = float(MMHG_PER_PSI)
+DEGR_AT_ZERO_DEGC_F = float(DEGR_AT_ZERO_DEGC)
+DEGR_PER_DEGC_F = float(DEGR_PER_DEGC)
+
+# Pure vapor pressures (psia) shared by every report in the process
+# Keyed by (material type, material id, temperature in degR)
+VAPOR_PRESSURE_CACHE = LruCache('Vapor pressure', max_size=50_000)
+
+# AP 42 Chapter 7 Equation 1-35 - Working loss product factor (K_P) of petroleum liquids
+CRUDE_OIL_WORKING_LOSS_PRODUCT_FACTOR = Decimal('0.75')
+REFINED_STOCK_WORKING_LOSS_PRODUCT_FACTOR = Decimal('1')
+
+
+def invalidate_material(material_type: MaterialType, material_id: int) -> int:
+    return VAPOR_PRESSURE_CACHE.invalidate(lambda key: key[0] == material_type and key[1] == material_id)
+
+
+@event.listens_for(Petrochemical, 'after_update')
+@event.listens_for(Petrochemical, 'after_delete')
+def _invalidate_petrochemical(mapper, connection, target: Petrochemical) -> None:
+    invalidate_material(MaterialType.PETROCHEMICAL, target.id)
+
+
+@event.listens_for(PetroleumLiquid, 'after_update')
+@event.listens_for(PetroleumLiquid, 'after_delete')
+def _invalidate_petroleum_liquid(mapper, connection, target: PetroleumLiquid) -> None:
+    invalidate_material(MaterialType.PETROLEUM_LIQUID, target.id)
+
+
+def calculate_vapor_pressures(
+        is_petroleum_liquid: np.ndarray,
+        vapor_constant_a: np.ndarray,
+        vapor_constant_b: np.ndarray,
+        vapor_constant_c: np.ndarray,
+        temperature: np.ndarray,
+) -> np.ndarray:
+    # Float version of the pure vapor pressure (psia) at temperatures in degR, every argument broadcasts
+    t__degr = temperature
+    t__degc = (t__degr - DEGR_AT_ZERO_DEGC_F) / DEGR_PER_DEGC_F
+    a = vapor_constant_a
+    b = vapor_constant_b
+    c = vapor_constant_c
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        # AP 42 Chapter 7 Equation 1-25
+        # P_VA = exp[A - (B / T_LA)]
+        petroleum_liquid = np.exp(a - (b / t__degr))
+
+        # AP 42 Chapter 7 Equation 1-26
+        # log(P_VA) = A - (B / (T_LA + C))
+        petrochemical = np.power(10.0, a - (b / (t__degc + c))) / MMHG_PER_PSI_F
+
+    return np.where(is_petroleum_liquid, petroleum_liquid, petrochemical)
+
+
+def _to_degr(temperature) -> Decimal | None:
+    return None if temperature is None else temperature.to('degR').magnitude
+
+
+def _to_lb_per_gal(density) -> Decimal | None:
+    return None if density is None else density.to('lb/gal').magnitude
+
+
+def _to_lb_per_mol(molecular_weight) -> Decimal | None:
+    return None if molecular_weight is None else molecular_weight.to('lb/mol').magnitude
+
+
+def _is_crude_oil(material: PetroleumLiquid) -> bool:
+    # Petroleum liquids have no stock class, AP 42 Table 7.1-2 names the crude oils as such
+    return 'crude' in material.name.lower()
+
+
+@dataclass(frozen=True)
+class CompiledMaterial:
+    """
+    Material constants as plain magnitudes in the units used by AP 42 Chapter 7.
+    """
+    material_type: MaterialType
+    material_id: int
+    vapor_constant_a: Decimal
+    vapor_constant_b: Decimal  # degR for petroleum liquids, degC for petrochemicals
+    vapor_constant_c: Decimal | None  # degC (petrochemicals only)
+    molecular_weight: Decimal | None  # lb/lb-mole of the liquid (M_L), None when a petroleum liquid has none
+    vapor_molecular_weight: Decimal  # lb/lb-mole of the vapor (M_V), the same as the liquid for petrochemicals
+    working_loss_product_factor: Decimal
+    liquid_density: Decimal | None = None  # lb/gal
+    minimum_valid_temperature: Decimal | None = None  # degR
+    maximum_valid_temperature: Decimal | None = None  # degR
+
+    @classmethod
+    def from_material(cls, material_type: MaterialType, material: Petrochemical | PetroleumLiquid):
+        if material_type == MaterialType.PETROLEUM_LIQUID:
+            if material.vapor_molecular_weight is None:
+                raise MissingData(f'No vapor molecular weight for {material.name}')
+
+            return cls(
+                material_type=material_type,
+                material_id=material.id,
+                vapor_constant_a=material.vapor_constant_a.magnitude,
+                vapor_constant_b=material.vapor_constant_b.to('degR').magnitude,
+                vapor_constant_c=None,
+                molecular_weight=_to_lb_per_mol(material.liquid_molecular_weight),
+                vapor_molecular_weight=material.vapor_molecular_weight.to('lb/mol').magnitude,
+                working_loss_product_factor=(
+                    CRUDE_OIL_WORKING_LOSS_PRODUCT_FACTOR if _is_crude_oil(material)
+                    else REFINED_STOCK_WORKING_LOSS_PRODUCT_FACTOR
+                ),
+                liquid_density=_to_lb_per_gal(material.liquid_density),
+            )
+        else:
+            return cls(
+                material_type=material_type,
+                material_id=material.id,
+                vapor_constant_a=material.vapor_constant_a.magnitude,
+                vapor_constant_b=material.vapor_constant_b.to('degC').magnitude,
+                vapor_constant_c=material.vapor_constant_c.to('degC').magnitude,
+                molecular_weight=material.molecular_weight.to('lb/mol').magnitude,
+                vapor_molecular_weight=material.molecular_weight.to('lb/mol').magnitude,
+                working_loss_product_factor=material.working_loss_product_factor.magnitude,
+                liquid_density=_to_lb_per_gal(material.liquid_density),
+                minimum_valid_temperature=_to_degr(material.min_valid_temperature),
+                maximum_valid_temperature=_to_degr(material.max_valid_temperature),
+            )
 
 
 @dataclass
@@ -12,39 +143,52 @@ class MaterialShim:
     material_type: MaterialType
     material: Petrochemical | PetroleumLiquid
     makeup_value: Decimal
+    constants: CompiledMaterial | None = None
+    table: 'VaporPressureTable | None' = None  # Packed into MixtureArrays for the batch engines
 
     # Calculated values
     moles: Decimal | None = None
     mole_fraction: Decimal | None = None
     vapor_weight_fraction: Decimal | None = None
-    partial_pressure: Quantity | None = None
-    vapor_molecular_weight: Quantity | None = None
-    vapor_pressure: dict[Quantity, Quantity] = field(default_factory=dict)
+    partial_pressure: Decimal | None = None  # psia
+    vapor_molecular_weight: Decimal | None = None  # lb/lb-mole
+
+    def __post_init__(self) -> None:
+        if self.constants is None:
+            self.constants = CompiledMaterial.from_material(self.material_type, self.material)
+
+    def calculate_vapor_pressure(self, average_liquid_surface_temperature: Decimal) -> Decimal:
+        # Temperature in degR, vapor pressure in psia
+        # Temperatures are always in degR so equal temperatures share a cache entry
+        # (The Decimal engine always uses the equations, tables are only read by the batch engines)
+        key = (self.material_type, self.constants.material_id, average_liquid_surface_temperature)
+        return VAPOR_PRESSURE_CACHE.get_or_calculate(
+            key,
+            lambda: self._calculate_vapor_pressure(average_liquid_surface_temperature),
+        )
 
-    def calculate_vapor_pressure(self, average_liquid_surface_temperature: Quantity) -> Quantity:
+    def _calculate_vapor_pressure(self, average_liquid_surface_temperature: Decimal) -> Decimal:
         if self.material_type == MaterialType.PETROLEUM_LIQUID:
             # AP 42 Chapter 7 Equation 1-25
             # P_VA = exp[A - (B / T_LA)]
 
-            a = self.material.vapor_constant_a.magnitude
-            b__degr = self.material.vapor_constant_b.to('degR').magnitude
-            tla__degr = average_liquid_surface_temperature.to('degR').magnitude
+            a = self.constants.vapor_constant_a
+            b__degr = self.constants.vapor_constant_b
+            tla__degr = average_liquid_surface_temperature
 
-            p_va = (a - (b__degr / tla__degr)).exp() * unit_registry.psi
+            p_va = (a - (b__degr / tla__degr)).exp()
 
         else:
             # AP 42 Chapter 7 Equation 1-26
             # log(P_VA) = A - (B / (T_LA + C))
 
-            # Convert each quantity to the correct units
-            a = self.material.vapor_constant_a.magnitude
-            b__degc = self.material.vapor_constant_b.to('degC').magnitude
-            tla__degc = average_liquid_surface_temperature.to('degC').magnitude
-            c__degc = self.material.vapor_constant_c.to('degC').magnitude
+            a = self.constants.vapor_constant_a
+            b__degc = self.constants.vapor_constant_b
+            tla__degc = (average_liquid_surface_temperature - DEGR_AT_ZERO_DEGC) / DEGR_PER_DEGC
+            c__degc = self.constants.vapor_constant_c
 
-            # log(P_VA) = term1
+            # log(P_VA) = term1 (mm Hg)
             term1 = a - (b__degc / (tla__degc + c__degc))
-            p_va = unit_registry.Quantity(10**term1, 'mm Hg').to('psi')
+            p_va = 10**term1 / MMHG_PER_PSI
 
-        self.vapor_pressure[average_liquid_surface_temperature] = p_va
-        return self.vapor_pressure[average_liquid_surface_temperature]
+        return p_va
@@ -1,13 +1,92 @@
+import calendar
 from dataclasses import dataclass
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 from pint import Quantity
+from sqlalchemy import event
 
 from src import unit_registry
-from src.database.definitions.meteorological import MeteorologicalSite
+from src.database.definitions.meteorological import MeteorologicalSite, MeteorologicalMonthRecord
+from src.util.cache import LruCache
+from src.util.metrics import timed
 
+# Site month records and the chunk averages built from them, shared by every report in the process
+SITE_CLIMATOLOGY_CACHE = LruCache('Site climatology', max_size=1_000)  # Keyed by site id
+METEOROLOGICAL_CHUNK_CACHE = LruCache('Meteorological chunk', max_size=20_000)  # Keyed by (site id, start, end)
 
-@dataclass
+
+def invalidate_site(site_id: int) -> None:
+    SITE_CLIMATOLOGY_CACHE.invalidate(lambda key: key == site_id)
+    METEOROLOGICAL_CHUNK_CACHE.invalidate(lambda key: key[0] == site_id)
+
+
+@event.listens_for(MeteorologicalSite, 'after_update')
+@event.listens_for(MeteorologicalSite, 'after_delete')
+def _invalidate_meteorological_site(mapper, connection, target: MeteorologicalSite) -> None:
+    invalidate_site(target.id)
+
+
+@event.listens_for(MeteorologicalMonthRecord, 'after_insert')
+@event.listens_for(MeteorologicalMonthRecord, 'after_update')
+@event.listens_for(MeteorologicalMonthRecord, 'after_delete')
+def _invalidate_meteorological_month_record(mapper, connection, target: MeteorologicalMonthRecord) -> None:
+    invalidate_site(target.site_id)
+
+
+def count_days_per_month(start: date, end: date) -> dict[int, int]:
+    # Number of days in [start, end] that fall in each calendar month (1-12), summed over every year
+    days_per_month = {}
+
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        month_start = max(start, date(year=year, month=month, day=1))
+        month_end = min(end, date(year=year, month=month, day=calendar.monthrange(year, month)[1]))
+        days_per_month[month] = days_per_month.get(month, 0) + (month_end - month_start).days + 1
+
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return days_per_month
+
+
+@dataclass(frozen=True)
+class SiteClimatology:
+    """
+    The 13 month records of a site (12 months and the annual record) as parallel tuples indexed by month id - 1.
+    """
+    site_id: int
+    atmospheric_pressure: Quantity  # psia (Absolute PSI)
+    average_temp_min: tuple[Decimal, ...]  # degF
+    average_temp_max: tuple[Decimal, ...]  # degF
+    average_wind_speed: tuple[Decimal, ...]  # mph
+    average_daily_insolation: tuple[Decimal, ...]  # btu/(ft^2 day)
+
+    @classmethod
+    def from_site(cls, site: MeteorologicalSite):
+        records = [site.month_records[month] for month in range(1, 14)]
+        return cls(
+            site_id=site.id,
+            atmospheric_pressure=site.atmospheric_pressure,
+            average_temp_min=tuple(record.average_temp_min.magnitude for record in records),
+            average_temp_max=tuple(record.average_temp_max.magnitude for record in records),
+            average_wind_speed=tuple(record.average_wind_speed.to('mph').magnitude for record in records),
+            average_daily_insolation=tuple(record.average_daily_insolation.magnitude for record in records),
+        )
+
+
+@dataclass(frozen=True)
+class CompiledMeteorologicalChunk:
+    """
+    Meteorological data as plain magnitudes in the units used by AP 42 Chapter 7.
+    """
+    average_temp: Decimal  # degR
+    average_temp_min: Decimal  # degR
+    average_temp_max: Decimal  # degR
+    average_wind_speed: Decimal  # mph
+    average_daily_insolation: Decimal  # btu/(ft^2 day)
+    atmospheric_pressure: Decimal  # psia (Absolute PSI)
+
+
+@dataclass(frozen=True)
 class MeteorologicalChunk:
     average_temp: Quantity  # degF
     average_temp_min: Quantity  # degF
@@ -17,30 +96,87 @@ class MeteorologicalChunk:
     atmospheric_pressure: Quantity  # psia (Absolute PSI)
 
     @classmethod
+    @timed('meteorological.from_site')
     def from_site(cls, site: MeteorologicalSite, start: date, end: date):
-        # Calculate the meteorological data for our range
-        chunk_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        # Chunks are immutable so tanks, chunks and reports covering the same range can share them
+        climatology = SITE_CLIMATOLOGY_CACHE.get_or_calculate(site.id, lambda: SiteClimatology.from_site(site))
+        return METEOROLOGICAL_CHUNK_CACHE.get_or_calculate(
+            (site.id, start, end),
+            lambda: cls.from_climatology(climatology, start, end),
+        )
+
+    @classmethod
+    def from_climatology(cls, climatology: SiteClimatology, start: date, end: date):
+        # A chunk covering exactly one calendar month is just that month's record
+        if (
+                start.year == end.year
+                and start.month == end.month
+                and start.day == 1
+                and end.day == calendar.monthrange(end.year, end.month)[1]
+        ):
+            return cls.from_month(climatology, start.month)
+
+        # Each month contributes its averages once per day of the chunk that falls inside it
+        days_per_month = count_days_per_month(start, end)
 
+        total_days = Decimal('0')
         total_temp_min = Decimal('0.0')
         total_temp_max = Decimal('0.0')
-        total_wind_speed = unit_registry.Quantity(Decimal('0.0'), 'mph')
-        total_daily_insolation = unit_registry.Quantity(Decimal('0.0'), 'dimensionless')
-        for chunk_date in chunk_dates:
-            month_record = site.month_records[chunk_date.month]
+        total_wind_speed = Decimal('0.0')
+        total_daily_insolation = Decimal('0.0')
+        for month, days in days_per_month.items():
+            index = month - 1
+            days = Decimal(days)
 
-            total_temp_min += month_record.average_temp_min.magnitude
-            total_temp_max += month_record.average_temp_max.magnitude
-            total_wind_speed += month_record.average_wind_speed
-            total_daily_insolation += month_record.average_daily_insolation
+            total_days += days
+            total_temp_min += climatology.average_temp_min[index] * days
+            total_temp_max += climatology.average_temp_max[index] * days
+            total_wind_speed += climatology.average_wind_speed[index] * days
+            total_daily_insolation += climatology.average_daily_insolation[index] * days
 
-        average_temp_min = total_temp_min / Decimal(len(chunk_dates))
-        average_temp_max = total_temp_max / Decimal(len(chunk_dates))
+        return cls._from_averages(
+            climatology,
+            average_temp_min=total_temp_min / total_days,
+            average_temp_max=total_temp_max / total_days,
+            average_wind_speed=total_wind_speed / total_days,
+            average_daily_insolation=total_daily_insolation / total_days,
+        )
+
+    @classmethod
+    def from_month(cls, climatology: SiteClimatology, month: int):
+        index = month - 1
+        return cls._from_averages(
+            climatology,
+            average_temp_min=climatology.average_temp_min[index],
+            average_temp_max=climatology.average_temp_max[index],
+            average_wind_speed=climatology.average_wind_speed[index],
+            average_daily_insolation=climatology.average_daily_insolation[index],
+        )
 
+    @classmethod
+    def _from_averages(
+            cls,
+            climatology: SiteClimatology,
+            average_temp_min: Decimal,
+            average_temp_max: Decimal,
+            average_wind_speed: Decimal,
+            average_daily_insolation: Decimal,
+    ):
         return cls(
             average_temp=unit_registry.Quantity((average_temp_min + average_temp_max) / 2, 'degF'),
             average_temp_min=unit_registry.Quantity(average_temp_min, 'degF'),
             average_temp_max=unit_registry.Quantity(average_temp_max, 'degF'),
-            average_wind_speed=total_wind_speed / Decimal(len(chunk_dates)),
-            average_daily_insolation=total_daily_insolation / Decimal(len(chunk_dates)),
-            atmospheric_pressure=site.atmospheric_pressure,
+            average_wind_speed=unit_registry.Quantity(average_wind_speed, 'mph'),
+            average_daily_insolation=unit_registry.Quantity(average_daily_insolation, 'dimensionless'),
+            atmospheric_pressure=climatology.atmospheric_pressure,
+        )
+
+    def compile(self) -> CompiledMeteorologicalChunk:
+        return CompiledMeteorologicalChunk(
+            average_temp=self.average_temp.to('degR').magnitude,
+            average_temp_min=self.average_temp_min.to('degR').magnitude,
+            average_temp_max=self.average_temp_max.to('degR').magnitude,
+            average_wind_speed=self.average_wind_speed.to('mph').magnitude,
+            average_daily_insolation=self.average_daily_insolation.magnitude,
+            atmospheric_pressure=self.atmospheric_pressure.to('psi').magnitude,
         )
@@ -1,16 +1,210 @@
+import dataclasses
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from decimal import Decimal
-from pint import Quantity
+from typing import NamedTuple
+import numpy as np
 
-from src import unit_registry
 from src.database.definitions.mixture import Mixture
-from src.reports.components.material import MaterialShim
+from src.reports.components.material import MaterialShim, CompiledMaterial, calculate_vapor_pressures
+from src.reports.components.vapor_pressure_table import VaporPressureTables, interpolate_vapor_pressures
 from src.util.enums import MixtureMakeupType, MaterialType
+from src.util.errors import CalculationError, MissingData
+from src.util.metrics import timed
 
 logger = logging.getLogger(__name__)
 
 
+class MixtureVaporState(NamedTuple):
+    vapor_pressure: np.ndarray  # psia
+    vapor_molecular_weight: np.ndarray  # lb/lb-mole
+    vapor_weight_fraction: np.ndarray  # one value per component
+
+
+@dataclass(frozen=True)
+class MixtureArrays:
+    """
+    Mixture components as parallel float arrays, the last axis is the component axis.
+    Either a single mixture (components) or a stack of mixtures (mixtures x components) padded with empty slots.
+    Empty slots have a mole fraction of zero so they drop out of every sum.
+    Components with a vapor pressure table are interpolated, every table of a stack is packed into one flat array
+    and a component finds its points by position (temperature * scale + origin) in that array.
+    """
+    mole_fraction: np.ndarray
+    is_petroleum_liquid: np.ndarray
+    vapor_constant_a: np.ndarray
+    vapor_constant_b: np.ndarray  # degR for petroleum liquids, degC for petrochemicals
+    vapor_constant_c: np.ndarray  # degC (unused for petroleum liquids)
+    molecular_weight: np.ndarray  # lb/lb-mole of the liquid (NaN when unknown)
+    vapor_molecular_weight: np.ndarray  # lb/lb-mole
+    table_scale: np.ndarray  # Points per degR
+    table_origin: np.ndarray  # Position at 0 degR
+    table_first: np.ndarray  # Position of the first point (after the last one without a table)
+    table_last: np.ndarray  # Position of the last point
+    table_values: np.ndarray  # ln(psia) of every point, not per row
+    table_slopes: np.ndarray  # To the next point (0 at the last point of each table), not per row
+
+    @property
+    def component_count(self) -> int:
+        return self.mole_fraction.shape[-1]
+
+    @classmethod
+    def from_components(cls, components: list[MaterialShim], component_count: int | None = None):
+        if component_count is None:
+            component_count = len(components)
+        padding = component_count - len(components)
+
+        mole_fraction, is_petroleum_liquid, a, b, c = [], [], [], [], []
+        molecular_weight, vapor_molecular_weight = [], []
+        table_scale, table_origin, table_first, table_last, table_values = [], [], [], [], []
+        for component in components:
+            if component.mole_fraction is None:
+                raise CalculationError(f'No mole fraction for {component.material.name}')
+
+            constants = component.constants
+            mole_fraction.append(float(component.mole_fraction))
+            is_petroleum_liquid.append(constants.material_type == MaterialType.PETROLEUM_LIQUID)
+            a.append(float(constants.vapor_constant_a))
+            b.append(float(constants.vapor_constant_b))
+            c.append(0.0 if constants.vapor_constant_c is None else float(constants.vapor_constant_c))
+            molecular_weight.append(np.nan if constants.molecular_weight is None else float(constants.molecular_weight))
+            vapor_molecular_weight.append(float(constants.vapor_molecular_weight))
+
+            if (table := component.table) is None:
+                table_scale.append(0.0)
+                table_origin.append(0.0)
+                table_first.append(1.0)
+                table_last.append(0.0)
+            else:
+                first = sum(len(values) for values in table_values)
+                table_scale.append(1 / table.step)
+                table_origin.append(first - table.minimum_temperature / table.step)
+                table_first.append(first)
+                table_last.append(first + len(table.log_vapor_pressure) - 1)
+                table_values.append(table.log_vapor_pressure)
+
+        return cls(
+            mole_fraction=np.array(mole_fraction + [0.0] * padding),
+            is_petroleum_liquid=np.array(is_petroleum_liquid + [False] * padding, dtype=bool),
+            vapor_constant_a=np.array(a + [0.0] * padding),
+            vapor_constant_b=np.array(b + [0.0] * padding),
+            vapor_constant_c=np.array(c + [1.0] * padding),
+            molecular_weight=np.array(molecular_weight + [0.0] * padding),
+            vapor_molecular_weight=np.array(vapor_molecular_weight + [0.0] * padding),
+            table_scale=np.array(table_scale + [0.0] * padding),
+            table_origin=np.array(table_origin + [0.0] * padding),
+            table_first=np.array(table_first + [1.0] * padding),
+            table_last=np.array(table_last + [0.0] * padding),
+            table_values=np.concatenate(table_values) if table_values else np.empty(0),
+            table_slopes=np.concatenate([np.diff(values, append=values[-1]) for values in table_values])
+            if table_values else np.empty(0),
+        )
+
+    @classmethod
+    def stack(cls, mixtures: list['MixtureArrays']):
+        # Pad every mixture out to the same number of components and stack them into rows
+        component_count = max((mixture.component_count for mixture in mixtures), default=0)
+
+        def _pad(name: str, fill) -> np.ndarray:
+            return np.stack([
+                np.pad(getattr(mixture, name), (0, component_count - mixture.component_count), constant_values=fill)
+                for mixture in mixtures
+            ])
+
+        # Rows usually repeat a few mixtures so the tables of each mixture are only added once
+        # (Positions move along by the tables of the mixtures before it)
+        unique_mixtures, table_starts = [], {}
+        for mixture in mixtures:
+            if id(mixture) not in table_starts:
+                table_starts[id(mixture)] = sum(len(unique.table_values) for unique in unique_mixtures)
+                unique_mixtures.append(mixture)
+
+        def _pad_position(name: str, fill: float) -> np.ndarray:
+            return np.stack([
+                np.pad(
+                    getattr(mixture, name) + table_starts[id(mixture)],
+                    (0, component_count - mixture.component_count),
+                    constant_values=fill,
+                )
+                for mixture in mixtures
+            ])
+
+        return cls(
+            mole_fraction=_pad('mole_fraction', 0.0),
+            is_petroleum_liquid=_pad('is_petroleum_liquid', False),
+            vapor_constant_a=_pad('vapor_constant_a', 0.0),
+            vapor_constant_b=_pad('vapor_constant_b', 0.0),
+            vapor_constant_c=_pad('vapor_constant_c', 1.0),
+            molecular_weight=_pad('molecular_weight', 0.0),
+            vapor_molecular_weight=_pad('vapor_molecular_weight', 0.0),
+            table_scale=_pad('table_scale', 0.0),
+            table_origin=_pad_position('table_origin', 0.0),
+            table_first=_pad_position('table_first', 1.0),
+            table_last=_pad_position('table_last', 0.0),
+            table_values=np.concatenate([mixture.table_values for mixture in unique_mixtures]),
+            table_slopes=np.concatenate([mixture.table_slopes for mixture in unique_mixtures]),
+        )
+
+    def tile(self, count: int):
+        # Stacked rows repeated count times (all the rows, then all of them again, ...)
+        return dataclasses.replace(
+            self,
+            **{
+                field.name: np.tile(getattr(self, field.name), (count, 1))
+                for field in dataclasses.fields(self) if field.name not in ['table_values', 'table_slopes']
+            },
+        )
+
+    def calculate_component_vapor_pressures(self, temperature: np.ndarray | float) -> np.ndarray:
+        # Pure vapor pressure (psia) of every component at the given temperatures (degR)
+        # The temperatures broadcast against every axis except the component axis
+        temperature = np.asarray(temperature, dtype=float)[..., np.newaxis]
+        constants = [self.is_petroleum_liquid, self.vapor_constant_a, self.vapor_constant_b, self.vapor_constant_c]
+        if not len(self.table_values):
+            return calculate_vapor_pressures(*constants, temperature)
+
+        vapor_pressure, in_table = interpolate_vapor_pressures(
+            self.table_scale,
+            self.table_origin,
+            self.table_first,
+            self.table_last,
+            self.table_values,
+            self.table_slopes,
+            temperature,
+        )
+
+        # Components without a table and temperatures outside of it use the equations
+        if not in_table.all():
+            outside = ~in_table
+            vapor_pressure[outside] = calculate_vapor_pressures(
+                *(np.broadcast_to(value, outside.shape)[outside] for value in [*constants, temperature])
+            )
+
+        return vapor_pressure
+
+    def calculate_partial_pressures(self, temperature: np.ndarray | float) -> np.ndarray:
+        # Raoult's law
+        return self.mole_fraction * self.calculate_component_vapor_pressures(temperature)
+
+    def calculate_vapor_pressure(self, temperature: np.ndarray | float) -> np.ndarray:
+        return self.calculate_partial_pressures(temperature).sum(axis=-1)
+
+    def calculate_vapor_state(self, temperature: np.ndarray | float) -> MixtureVaporState:
+        # Mixture vapor pressure, vapor molecular weight and component vapor weight fractions in one pass
+        partial_pressures = self.calculate_partial_pressures(temperature)
+        vapor_pressure = partial_pressures.sum(axis=-1)
+
+        vapor_percent = partial_pressures / vapor_pressure[..., np.newaxis]
+        component_molecular_weight = vapor_percent * self.vapor_molecular_weight
+        vapor_molecular_weight = component_molecular_weight.sum(axis=-1)
+
+        return MixtureVaporState(
+            vapor_pressure=vapor_pressure,
+            vapor_molecular_weight=vapor_molecular_weight,
+            vapor_weight_fraction=component_molecular_weight / vapor_molecular_weight[..., np.newaxis],
+        )
+
+
 @dataclass
 class MixtureShim:
     name: str
@@ -20,26 +214,41 @@ class MixtureShim:
 
     # Calculated values
     total_moles: Decimal | None = None
-    vapor_pressure: dict[Quantity, Quantity] = field(default_factory=dict)
 
     @classmethod
-    def from_mixture(cls, mixture: Mixture):
+    def from_mixture(
+            cls,
+            mixture: Mixture,
+            compiled_materials: dict[tuple, CompiledMaterial] | None = None,
+            vapor_pressure_tables: VaporPressureTables | None = None,
+    ):
+        # Compiled material constants can be shared across every mixture in a report
+        if compiled_materials is None:
+            compiled_materials = {}
+
         materials = []
         for component in mixture.components:
             if component.petrochemical is not None:
-                shim = MaterialShim(
-                    material_type=MaterialType.PETROCHEMICAL,
-                    material=component.petrochemical,
-                    makeup_value=Decimal(component.value),
-                )
+                material_type = MaterialType.PETROCHEMICAL
+                material = component.petrochemical
             else:
-                shim = MaterialShim(
-                    material_type=MaterialType.PETROLEUM_LIQUID,
-                    material=component.petroleum_liquid,
+                material_type = MaterialType.PETROLEUM_LIQUID
+                material = component.petroleum_liquid
+
+            key = (material_type, material.id)
+            if (constants := compiled_materials.get(key)) is None:
+                constants = CompiledMaterial.from_material(material_type, material)
+                compiled_materials[key] = constants
+
+            materials.append(
+                MaterialShim(
+                    material_type=material_type,
+                    material=material,
                     makeup_value=Decimal(component.value),
+                    constants=constants,
+                    table=vapor_pressure_tables.get(constants) if vapor_pressure_tables is not None else None,
                 )
-
-            materials.append(shim)
+            )
 
         obj = cls(
             name=mixture.name,
@@ -50,16 +259,22 @@ class MixtureShim:
         obj.calculate_mole_fractions()
         return obj
 
+    def to_arrays(self) -> MixtureArrays:
+        return MixtureArrays.from_components(self.components)
+
     def calculate_mole_fractions(self) -> None:
         match self.makeup_type:
             case MixtureMakeupType.WEIGHT:
                 for component in self.components:
-                    makeup__lb = component.makeup_value * unit_registry.lb
-                    component.moles = makeup__lb / component.material.molecular_weight
+                    if component.constants.molecular_weight is None:
+                        raise MissingData(f'No liquid molecular weight for {component.material.name}')
+
+                    # lb / (lb/lb-mole)
+                    component.moles = component.makeup_value / component.constants.molecular_weight
                 self.total_moles = sum([component.moles for component in self.components])
                 for component in self.components:
                     component.mole_fraction = component.moles / self.total_moles
-                    logger.debug(f'{component.material.name} | Mole Fraction: {component.mole_fraction}')
+                    logger.debug('%s | Mole Fraction: %s', component.material.name, component.mole_fraction)
 
             case MixtureMakeupType.VOLUME:
                 # TODO: We are going to need densities for this makeup type
@@ -69,35 +284,41 @@ class MixtureShim:
                 for component in self.components:
                     component.mole_fraction = component.makeup_value
 
-    def calculate_vapor_pressure(self, temperature: Quantity) -> Quantity:
+    @timed('mixture.vapor_pressure')
+    def calculate_vapor_pressure(self, temperature: Decimal) -> Decimal:
+        # Temperature in degR, vapor pressure in psia
+
         # Calculate the partial pressure of each part of the mixture
-        mixture_vapor_pressure = Decimal('0') * unit_registry.psi
+        mixture_vapor_pressure = Decimal('0')
         for component in self.components:
             # Calculate the pure vapor pressure of the part
             pure_vapor_pressure = component.calculate_vapor_pressure(temperature)
-            logger.debug(f'{component.material.name} | Vapor Pressure: {pure_vapor_pressure} @ {temperature}')
+            logger.debug('%s | Vapor Pressure: %s psia @ %s degR', component.material.name, pure_vapor_pressure, temperature)
 
             # Calculate the partial pressure
             component.partial_pressure = component.mole_fraction * pure_vapor_pressure
             mixture_vapor_pressure += component.partial_pressure
 
-        self.vapor_pressure[temperature] = mixture_vapor_pressure
         return mixture_vapor_pressure
 
-    def calculate_vapor_molecular_weight(self, temperature: Quantity) -> Quantity:
-        # Check if we already have the mixture vapor pressure
-        if (mixture_vapor_pressure := self.vapor_pressure.get(temperature)) is None:
-            mixture_vapor_pressure = self.calculate_vapor_pressure(temperature)
+    def calculate_vapor_molecular_weight(self, temperature: Decimal) -> Decimal:
+        # Temperature in degR, molecular weight in lb/lb-mole
+
+        # Always refresh the partial pressures since they are overwritten for every temperature
+        # (The pure vapor pressures come from the shared cache)
+        mixture_vapor_pressure = self.calculate_vapor_pressure(temperature)
 
         # Calculate percents of partial pressures over the mixture vapor pressure
-        total_vapor_molecular_weight = Decimal('0') * unit_registry.lb / unit_registry.mole
+        total_vapor_molecular_weight = Decimal('0')
         for component in self.components:
             # Vapor percent
             vapor_percent = component.partial_pressure / mixture_vapor_pressure
-            logger.debug(f'{component.material.name} | Vapor Percent: {vapor_percent} @ {temperature}')
+            logger.debug('%s | Vapor Percent: %s @ %s degR', component.material.name, vapor_percent, temperature)
 
-            component.vapor_molecular_weight = vapor_percent * component.material.molecular_weight
-            logger.debug(f'{component.material.name} | Partial vapor molecular weight: {component.vapor_molecular_weight}')
+            component.vapor_molecular_weight = vapor_percent * component.constants.vapor_molecular_weight
+            logger.debug(
+                '%s | Partial vapor molecular weight: %s', component.material.name, component.vapor_molecular_weight
+            )
 
             total_vapor_molecular_weight += component.vapor_molecular_weight
 
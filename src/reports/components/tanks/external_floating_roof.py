@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+
+from src.database.definitions.floating_roof_tank import ExternalFloatingRoofTank
+from src.util.errors import MissingData
+
+from .floating_roof import CompiledFloatingRoofTank, FloatingRoofLossFactors
+
+
+@dataclass(eq=False)
+class ExternalFloatingRoofTankShim:
+    """
+    Shims compare by identity so the cached results of one report never get matched against the
+    (possibly detached) tank of another report.
+    """
+    tank: ExternalFloatingRoofTank
+
+    def __getattr__(self, name):
+        # Allow us to pretend like we are actually the tank
+        # (Priority goes to the shim first and then the tank itself)
+        if name in self.__dict__:
+            return self[name]
+        elif hasattr(self.tank, name):
+            return getattr(self.tank, name)
+        else:
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    def __hash__(self) -> int:
+        # Use the tank's id as our hash
+        return self.tank.id
+
+    @lru_cache()
+    def compile(self) -> CompiledFloatingRoofTank:
+        if self.tank.seal is None:
+            raise MissingData(f'{self.tank.name}: No rim seal')
+
+        # Welded decks have no deck seams and there is no fixed roof (or only a self-supporting dome) to hold up
+        return CompiledFloatingRoofTank(
+            id=self.tank.id,
+            name=self.tank.name,
+            shell_height=self.tank.shell_height.to('ft').magnitude,
+            shell_diameter=self.tank.shell_diameter.to('ft').magnitude,
+            shell_solar_absorptance=self.tank.shell_solar_absorptance.coefficient.magnitude,
+            roof_solar_absorptance=self.tank.roof_solar_absorptance.coefficient.magnitude,
+            support_column_count=0,
+            deck_seam_loss_factor=Decimal('0'),
+            is_wind_exposed=not self.tank.is_domed,
+            loss_factors=FloatingRoofLossFactors.from_tank(
+                self.tank.seal,
+                [(association.fitting, association.quantity) for association in self.tank.fittings],
+            ),
+        )
@@ -6,17 +6,55 @@ from pint import Quantity
 
 from src import unit_registry
 from src.database.definitions.fixed_roof_tank import FixedRoofTank
+from src.util.enums import InsulationType
 from src.util.errors import MissingData
 from src.util.quantities import PI
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True)
+class CompiledFixedRoofTank:
+    """
+    Tank parameters as plain magnitudes in the units used by AP 42 Chapter 7.
+    Built once per tank so the calculations never need to touch pint.
+    """
+    id: int
+    name: str
+    is_vertical: bool
+    is_underground: bool
+    insulation: InsulationType
+    roof_type: str | None
+
+    # Dimensions as entered (ft)
+    shell_height: Decimal
+    shell_diameter: Decimal
+    roof_height: Decimal
+    roof_radius: Decimal
+
+    # Dimensions adjusted for horizontal tanks (ft, ft^3)
+    effective_shell_height: Decimal
+    effective_shell_diameter: Decimal
+    vapor_space_outage: Decimal
+    vapor_space_volume: Decimal
+
+    maximum_liquid_height: Decimal  # ft
+    minimum_liquid_height: Decimal  # ft
+    vent_breather_setting: Decimal  # psig
+    vent_vacuum_setting: Decimal  # psig
+    turnovers_per_year: int
+    shell_solar_absorptance: Decimal
+    roof_solar_absorptance: Decimal
+
+
+@dataclass(eq=False)
 class FixedRoofTankShim:
     """
     Shim to hold all the functions and intermediate calculations associated with a fixed roof tank.
     This is done to allow the DB definition class to not have all the complexity of the calculation equations.
+
+    Shims compare by identity so the cached results of one report never get matched against the
+    (possibly detached) tank of another report.
     """
     tank: FixedRoofTank
 
@@ -51,6 +89,32 @@ class FixedRoofTankShim:
         # Use the tank's id as our hash
         return self.tank.id
 
+    @lru_cache()
+    def compile(self) -> CompiledFixedRoofTank:
+        return CompiledFixedRoofTank(
+            id=self.tank.id,
+            name=self.tank.name,
+            is_vertical=self.tank.is_vertical,
+            is_underground=self.tank.is_underground,
+            insulation=InsulationType.NONE if self.tank.insulation is None else InsulationType(self.tank.insulation.name),
+            roof_type=None if self.tank.roof_type is None else self.tank.roof_type.name,
+            shell_height=self.tank.shell_height.to('ft').magnitude,
+            shell_diameter=self.tank.shell_diameter.to('ft').magnitude,
+            roof_height=self.tank.roof_height.to('ft').magnitude,
+            roof_radius=self.tank.roof_radius.to('ft').magnitude,
+            effective_shell_height=self.shell_height.to('ft').magnitude,
+            effective_shell_diameter=self.shell_diameter.to('ft').magnitude,
+            vapor_space_outage=self.calculate_vapor_space_outage().to('ft').magnitude,
+            vapor_space_volume=self.calculate_vapor_space_volume().to('ft**3').magnitude,
+            maximum_liquid_height=self.tank.maximum_liquid_height.to('ft').magnitude,
+            minimum_liquid_height=self.tank.minimum_liquid_height.to('ft').magnitude,
+            vent_breather_setting=self.tank.vent_breather_setting.to('psi').magnitude,
+            vent_vacuum_setting=self.tank.vent_vacuum_setting.to('psi').magnitude,
+            turnovers_per_year=int(self.tank.turnovers_per_year),
+            shell_solar_absorptance=self.tank.shell_solar_absorptance.coefficient.magnitude,
+            roof_solar_absorptance=self.tank.roof_solar_absorptance.coefficient.magnitude,
+        )
+
     @lru_cache()
     def calculate_vapor_space_outage(self) -> Quantity:
         if self.tank.is_vertical:
@@ -64,7 +128,7 @@ class FixedRoofTankShim:
             elif self.tank.roof_type.name == 'Dome':
                 logger.debug('Calculating vapor space outage for a dome roof')
                 tank_shell_radius = (self.shell_diameter / 2)
-                roof_height = self.tank.roof_radius - (self.tank.roof_radius**2 - tank_shell_radius**2)**0.5
+                roof_height = self.tank.roof_radius - (self.tank.roof_radius**2 - tank_shell_radius**2)**Decimal('0.5')
                 roof_outage = roof_height * (Decimal('0.5') + Decimal('0.167') * (roof_height/tank_shell_radius)**2)
             else:
                 raise MissingData(f'Unknown roof type: {self.tank.roof_type}')
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from decimal import Decimal
+import numpy as np
+
+from src.database.definitions.fittings import FittingSecondaryType
+from src.database.definitions.seal import SealSecondaryType
+from src.util.enums import DeckConstructionType
+
+# AP 42 Chapter 7 Table 7.1-11 - Typical number of columns as a function of tank diameter
+# (Largest diameter in ft, column count) for tanks with column supported fixed roofs
+TYPICAL_COLUMN_COUNTS = [
+    (85, 1),
+    (100, 6),
+    (120, 7),
+    (135, 8),
+    (150, 9),
+    (170, 16),
+    (190, 19),
+    (220, 22),
+    (235, 31),
+    (270, 37),
+    (275, 43),
+    (290, 49),
+    (330, 61),
+    (360, 71),
+    (400, 81),
+]
+
+# AP 42 Chapter 7 Section 7.1.3.2.2.2 (Equation 2-14) - Fitting wind speed correction factor (K_v) for external
+# floating roof tanks (The wind speed is zero for internal and domed external floating roof tanks)
+FITTING_WIND_SPEED_CORRECTION = 0.7
+
+# AP 42 Chapter 7 Table 7.1-14 - Deck seam loss per unit seam length factor (K_D) and deck seam length factor (S_D)
+# Welded decks have no deck seam losses (External floating roof decks are always welded)
+BOLTED_DECK_SEAM_LOSS_FACTOR = Decimal('0.14')  # lb-mole/ft-yr
+DECK_SEAM_LENGTH_FACTORS = {  # ft/ft^2
+    DeckConstructionType.BOLTED_CONTINUOUS_SHEET_5_FT: Decimal('0.20'),
+    DeckConstructionType.BOLTED_CONTINUOUS_SHEET_6_FT: Decimal('0.17'),
+    DeckConstructionType.BOLTED_CONTINUOUS_SHEET_7_FT: Decimal('0.14'),
+    DeckConstructionType.BOLTED_RECTANGULAR_PANEL_5_BY_7_5_FT: Decimal('0.33'),
+    DeckConstructionType.BOLTED_RECTANGULAR_PANEL_5_BY_12_FT: Decimal('0.28'),
+}
+
+
+def typical_column_count(diameter: Decimal) -> int:
+    for largest_diameter, column_count in TYPICAL_COLUMN_COUNTS:
+        if diameter <= largest_diameter:
+            return column_count
+
+    return TYPICAL_COLUMN_COUNTS[-1][1]
+
+
+def deck_seam_loss_factor(deck_construction: DeckConstructionType) -> Decimal:
+    # K_D * S_D (lb-mole/ft^2-yr)
+    if deck_construction == DeckConstructionType.WELDED:
+        return Decimal('0')
+
+    return BOLTED_DECK_SEAM_LOSS_FACTOR * DECK_SEAM_LENGTH_FACTORS[deck_construction]
+
+
+def _magnitude(value) -> float:
+    # Nullable seal and fitting factors are zero when missing
+    return 0.0 if value is None else float(value.magnitude)
+
+
+@dataclass(frozen=True)
+class FloatingRoofLossFactors:
+    """
+    Rim seal and deck fitting loss factors of a tank, totaled once per report.
+    """
+    rim_seal_k_ra: float  # lb-mole/ft-yr
+    rim_seal_k_rb: float  # lb-mole/[(mph)^n-ft-yr]
+    rim_seal_n: float
+    fitting_k_fa_total: float  # Sum of N_F * K_Fa (lb-mole/yr)
+    fitting_k_fb: tuple[float, ...]  # N_F * K_Fb of every fitting with a wind speed term (lb-mole/[(mph)^m-yr])
+    fitting_m: tuple[float, ...]
+
+    @classmethod
+    def from_tank(cls, seal: SealSecondaryType, fittings: list[tuple[FittingSecondaryType, int]]):
+        fitting_k_fb, fitting_m = [], []
+        for fitting, quantity in fittings:
+            # Fittings without a wind speed term only contribute K_Fa
+            if fitting.k_fb is not None and fitting.m is not None:
+                fitting_k_fb.append(quantity * _magnitude(fitting.k_fb))
+                fitting_m.append(_magnitude(fitting.m))
+
+        return cls(
+            rim_seal_k_ra=_magnitude(seal.k_ra),
+            rim_seal_k_rb=_magnitude(seal.k_rb),
+            rim_seal_n=_magnitude(seal.n),
+            fitting_k_fa_total=sum(quantity * _magnitude(fitting.k_fa) for fitting, quantity in fittings),
+            fitting_k_fb=tuple(fitting_k_fb),
+            fitting_m=tuple(fitting_m),
+        )
+
+
+@dataclass(frozen=True)
+class CompiledFloatingRoofTank:
+    """
+    Tank parameters as plain magnitudes in the units used by AP 42 Chapter 7.
+    Built once per tank so the calculations never need to touch pint or the seal and fitting tables.
+    """
+    id: int
+    name: str
+    shell_height: Decimal  # ft
+    shell_diameter: Decimal  # ft
+    shell_solar_absorptance: Decimal
+    roof_solar_absorptance: Decimal  # Floating deck of external floating roof tanks
+    support_column_count: int
+    deck_seam_loss_factor: Decimal  # K_D * S_D (lb-mole/ft^2-yr)
+    is_wind_exposed: bool  # External floating roof tanks without a dome
+    loss_factors: FloatingRoofLossFactors
+
+
+def calculate_monthly_loss_factors(
+        loss_factors: list[FloatingRoofLossFactors],
+        wind_speed: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Rim seal (K_R) and deck fitting (F_F) loss factors of every tank for every month in one pass
+    # (The wind speed (mph) is tanks x months and the factors come back in the same shape)
+    k_ra = np.array([factors.rim_seal_k_ra for factors in loss_factors])[:, np.newaxis]
+    k_rb = np.array([factors.rim_seal_k_rb for factors in loss_factors])[:, np.newaxis]
+    n = np.array([factors.rim_seal_n for factors in loss_factors])[:, np.newaxis]
+    k_fa_total = np.array([factors.fitting_k_fa_total for factors in loss_factors])[:, np.newaxis]
+
+    # Fittings padded out to the same count per tank (padding has K_Fb = 0 so it drops out of the sum)
+    fitting_count = max((len(factors.fitting_k_fb) for factors in loss_factors), default=0)
+    k_fb = np.zeros((len(loss_factors), fitting_count))
+    m = np.zeros((len(loss_factors), fitting_count))
+    for row, factors in enumerate(loss_factors):
+        k_fb[row, :len(factors.fitting_k_fb)] = factors.fitting_k_fb
+        m[row, :len(factors.fitting_m)] = factors.fitting_m
+
+    # AP 42 Chapter 7 Equation 2-2
+    # K_R = K_Ra + K_Rb * v^n
+    rim_seal = k_ra + k_rb * wind_speed**n
+
+    # AP 42 Chapter 7 Equation 2-13 and 2-14
+    # F_F = sum(N_F * K_F)
+    # K_F = K_Fa + K_Fb * (K_v * v)^m
+    fitting_wind = (FITTING_WIND_SPEED_CORRECTION * wind_speed)[..., np.newaxis]
+    deck_fittings = k_fa_total + (k_fb[:, np.newaxis, :] * fitting_wind**m[:, np.newaxis, :]).sum(axis=-1)
+
+    return rim_seal, deck_fittings
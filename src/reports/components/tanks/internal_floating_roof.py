@@ -1,10 +1,19 @@
 from dataclasses import dataclass
+from functools import lru_cache
 
 from src.database.definitions.floating_roof_tank import InternalFloatingRoofTank
+from src.util.enums import DeckConstructionType
+from src.util.errors import MissingData
 
+from .floating_roof import CompiledFloatingRoofTank, FloatingRoofLossFactors, deck_seam_loss_factor, typical_column_count
 
-@dataclass
+
+@dataclass(eq=False)
 class InternalFloatingRoofTankShim:
+    """
+    Shims compare by identity so the cached results of one report never get matched against the
+    (possibly detached) tank of another report.
+    """
     tank: InternalFloatingRoofTank
 
     def __getattr__(self, name):
@@ -20,3 +29,30 @@ class InternalFloatingRoofTankShim:
     def __hash__(self) -> int:
         # Use the tank's id as our hash
         return self.tank.id
+
+    @lru_cache()
+    def compile(self) -> CompiledFloatingRoofTank:
+        if self.tank.seal is None:
+            raise MissingData(f'{self.tank.name}: No rim seal')
+
+        shell_diameter = self.tank.shell_diameter.to('ft').magnitude
+        if self.tank.autofill_support_column_count:
+            support_column_count = typical_column_count(shell_diameter)
+        else:
+            support_column_count = self.tank.support_column_count
+
+        return CompiledFloatingRoofTank(
+            id=self.tank.id,
+            name=self.tank.name,
+            shell_height=self.tank.shell_height.to('ft').magnitude,
+            shell_diameter=shell_diameter,
+            shell_solar_absorptance=self.tank.shell_solar_absorptance.coefficient.magnitude,
+            roof_solar_absorptance=self.tank.roof_solar_absorptance.coefficient.magnitude,
+            support_column_count=support_column_count,
+            deck_seam_loss_factor=deck_seam_loss_factor(DeckConstructionType(self.tank.deck_construction_id)),
+            is_wind_exposed=False,
+            loss_factors=FloatingRoofLossFactors.from_tank(
+                self.tank.seal,
+                [(association.fitting, association.quantity) for association in self.tank.fittings],
+            ),
+        )
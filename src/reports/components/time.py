@@ -30,11 +30,13 @@ class ReportingChunk:
     start_date: date
     end_date: date
     site: MeteorologicalChunk
-    throughput: Quantity
+    throughput: Quantity | None
     mixture: MixtureShim
+    sum_liquid_level_decrease: Quantity | None = None  # Floating roof tanks only
 
     def total_days(self) -> int:
-        return (self.end_date - self.start_date).days
+        # Both the start and end date are part of the chunk
+        return (self.end_date - self.start_date).days + 1
 
 
 @dataclass
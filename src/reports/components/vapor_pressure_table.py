@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+
+from src.database import DB_FILE_PATH
+from src.reports.components.material import CompiledMaterial, calculate_vapor_pressures
+from src.util.enums import MaterialType
+from src.util.quantities import DEGR_AT_ZERO_DEGC, DEGR_PER_DEGC
+
+logger = logging.getLogger(__name__)
+
+VAPOR_PRESSURE_TABLE_DIR = DB_FILE_PATH.parent / 'vapor_pressure_tables'
+
+# Range used when a material does not list valid temperatures (-60 to 250 degF)
+DEFAULT_MINIMUM_TEMPERATURE = 399.67  # degR
+DEFAULT_MAXIMUM_TEMPERATURE = 709.67  # degR
+
+# The tables store ln(P_VA) on a uniform grid and interpolate linearly between points.
+# For linear interpolation of a smooth function the error is bounded by (h^2 / 8) * max|f''|,
+# and an absolute error in ln(P_VA) is a relative error in P_VA. The bound is estimated per table
+# from the second differences of the grid (h^2 * f'') and the grid is refined until the
+# bound is below MAXIMUM_RELATIVE_ERROR.
+INITIAL_STEP = 0.1  # degR
+MAXIMUM_RELATIVE_ERROR = 1e-7
+
+
+def _temporary_path(path: Path) -> Path:
+    # Worker processes can build the same table at once, each writes its own file and swaps it in whole
+    # (The suffix is kept so numpy does not append another one)
+    return path.with_name(f'{path.stem}.{os.getpid()}.tmp{path.suffix}')
+
+
+@dataclass(frozen=True)
+class VaporPressureTable:
+    """
+    Natural log of the pure vapor pressure (psia) of one material on a uniform temperature grid (degR).
+    """
+    minimum_temperature: float  # degR
+    step: float  # degR
+    log_vapor_pressure: np.ndarray
+    error_bound: float  # Relative error of an interpolated vapor pressure
+
+    @property
+    def maximum_temperature(self) -> float:
+        return self.minimum_temperature + self.step * (len(self.log_vapor_pressure) - 1)
+
+
+def interpolate_vapor_pressures(
+        scale: np.ndarray,
+        origin: np.ndarray,
+        first: np.ndarray,
+        last: np.ndarray,
+        values: np.ndarray,
+        slopes: np.ndarray,
+        temperature: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Pure vapor pressures (psia) from tables packed one after the other into values (see MixtureArrays),
+    # every argument but values and slopes broadcasts.
+    # Also returns where the temperature fell inside a table, the pressure is meaningless everywhere else.
+    position = temperature * scale
+    position += origin
+    with np.errstate(invalid='ignore'):
+        in_table = (position >= first) & (position <= last)
+        index = position.astype(np.int64)
+    np.clip(index, 0, len(values) - 1, out=index)
+
+    log_vapor_pressure = slopes[index]
+    log_vapor_pressure *= position - index
+    log_vapor_pressure += values[index]
+    with np.errstate(invalid='ignore', over='ignore'):
+        return np.exp(log_vapor_pressure, out=log_vapor_pressure), in_table
+
+
+def _valid_range(constants: CompiledMaterial) -> tuple[float, float]:
+    minimum = DEFAULT_MINIMUM_TEMPERATURE
+    maximum = DEFAULT_MAXIMUM_TEMPERATURE
+    if constants.minimum_valid_temperature is not None:
+        minimum = float(constants.minimum_valid_temperature)
+    if constants.maximum_valid_temperature is not None:
+        maximum = float(constants.maximum_valid_temperature)
+
+    # Stay clear of the Antoine singularity at T = -C
+    if constants.vapor_constant_c is not None:
+        singularity = float(DEGR_AT_ZERO_DEGC - constants.vapor_constant_c * DEGR_PER_DEGC)
+        minimum = max(minimum, singularity + INITIAL_STEP)
+
+    return minimum, max(minimum, maximum)
+
+
+def _calculate_log_vapor_pressures(constants: CompiledMaterial, temperatures: np.ndarray) -> np.ndarray:
+    return np.log(
+        calculate_vapor_pressures(
+            np.array(constants.material_type == MaterialType.PETROLEUM_LIQUID),
+            np.array(float(constants.vapor_constant_a)),
+            np.array(float(constants.vapor_constant_b)),
+            np.array(0.0 if constants.vapor_constant_c is None else float(constants.vapor_constant_c)),
+            temperatures,
+        )
+    )
+
+
+def build_table(constants: CompiledMaterial) -> VaporPressureTable:
+    minimum, maximum = _valid_range(constants)
+
+    step = INITIAL_STEP
+    while True:
+        count = max(int(np.ceil((maximum - minimum) / step)), 1) + 1
+        temperatures = minimum + step * np.arange(count)
+        log_vapor_pressure = _calculate_log_vapor_pressures(constants, temperatures)
+
+        second_differences = np.abs(np.diff(log_vapor_pressure, n=2))
+        error_bound = float(second_differences.max()) / 8 if len(second_differences) else 0.0
+        if error_bound <= MAXIMUM_RELATIVE_ERROR or step < 1e-4:
+            break
+
+        step /= 2
+
+    return VaporPressureTable(
+        minimum_temperature=minimum,
+        step=step,
+        log_vapor_pressure=log_vapor_pressure,
+        error_bound=error_bound,
+    )
+
+
+class VaporPressureTables:
+    """
+    On-disk store of vapor pressure tables, one memory-mapped .npy file per material next to a .json file
+    with its grid and the constants it was built from.
+    Tables are built the first time a material is requested and rebuilt if its constants change.
+    Every file is written whole by one worker, so workers building different tables never touch each other's files.
+    """
+    def __init__(self, directory: Path = VAPOR_PRESSURE_TABLE_DIR) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.tables: dict[tuple[str, tuple[str, ...]], VaporPressureTable] = {}
+
+    @staticmethod
+    def _key(constants: CompiledMaterial) -> str:
+        return f'{constants.material_type.name.lower()}_{constants.material_id}'
+
+    @staticmethod
+    def _fingerprint(constants: CompiledMaterial) -> list[str]:
+        # Any change to these values makes the stored table stale
+        return [
+            str(constants.vapor_constant_a),
+            str(constants.vapor_constant_b),
+            str(constants.vapor_constant_c),
+            str(constants.minimum_valid_temperature),
+            str(constants.maximum_valid_temperature),
+            str(MAXIMUM_RELATIVE_ERROR),
+        ]
+
+    def _load_entry(self, entry_path: Path) -> dict | None:
+        try:
+            return json.loads(entry_path.read_text())
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            logger.warning('Ignoring unreadable vapor pressure table entry: %s', entry_path)
+            return None
+
+    @staticmethod
+    def _save_entry(entry_path: Path, entry: dict) -> None:
+        temporary_path = _temporary_path(entry_path)
+        temporary_path.write_text(json.dumps(entry, indent=2))
+        os.replace(temporary_path, entry_path)
+
+    def get(self, constants: CompiledMaterial) -> VaporPressureTable:
+        key = self._key(constants)
+        fingerprint = self._fingerprint(constants)
+        if (table := self.tables.get((key, tuple(fingerprint)))) is not None:
+            return table
+
+        entry_path = self.directory / f'{key}.json'
+        entry = self._load_entry(entry_path)
+        file_path = self.directory / f'{key}.npy'
+        if entry is not None and entry['fingerprint'] == fingerprint and file_path.exists():
+            table = VaporPressureTable(
+                minimum_temperature=entry['minimum_temperature'],
+                step=entry['step'],
+                log_vapor_pressure=np.load(file_path, mmap_mode='r'),
+                error_bound=entry['error_bound'],
+            )
+        else:
+            logger.info('Building vapor pressure table for %s', key)
+            table = build_table(constants)
+            temporary_path = _temporary_path(file_path)
+            np.save(temporary_path, table.log_vapor_pressure)
+            os.replace(temporary_path, file_path)
+
+            # The entry goes in after the table it describes
+            self._save_entry(entry_path, {
+                'fingerprint': fingerprint,
+                'minimum_temperature': table.minimum_temperature,
+                'step': table.step,
+                'error_bound': table.error_bound,
+            })
+
+        self.tables[(key, tuple(fingerprint))] = table
+        return table
+
+    def build_all(self, materials: list[CompiledMaterial]) -> None:
+        for constants in materials:
+            self.get(constants)
@@ -1,24 +1,83 @@
+import dataclasses
+import itertools
 import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 from sqlalchemy.orm import Session
+from typing import Callable, Iterator
+import numpy as np
 
+from src.reports.components.tanks.external_floating_roof import ExternalFloatingRoofTankShim
 from src.reports.components.tanks.fixed_roof import FixedRoofTankShim
 from src.reports.components.tanks.internal_floating_roof import InternalFloatingRoofTankShim
+from src.reports.components.chunk_planner import ChunkPlanner
 from src.reports.components.time import ReportingPeriod, ReportingChunk
 from src.database import DB_ENGINE
 from src.database.definitions.facility import Facility
 from src.database.definitions.fixed_roof_tank import FixedRoofTank
-from src.database.definitions.floating_roof_tank import InternalFloatingRoofTank
+from src.database.definitions.floating_roof_tank import ExternalFloatingRoofTank, InternalFloatingRoofTank
+from src.database.definitions.mixture import Mixture
 
 from .calculations.fixed_roof_tank import FixedRoofEmissions
-from .calculations.internal_floating_roof_tank import InternalFloatingRoofEmissions
-from .components.meteorological import MeteorologicalChunk
+from .calculations.fixed_roof_tank_batch import FixedRoofBatchEmissions
+from .calculations.floating_roof_tank_batch import FloatingRoofBatchEmissions
+from .components.material import VAPOR_PRESSURE_CACHE
+from .components.meteorological import (
+    MeteorologicalChunk,
+    SiteClimatology,
+    SITE_CLIMATOLOGY_CACHE,
+    METEOROLOGICAL_CHUNK_CACHE,
+)
 from .components.mixture import MixtureShim
+from .components.vapor_pressure_table import VaporPressureTables
+from .fingerprint import fixed_roof_chunk_fingerprint
 from .outputs.log import LogOutput
-from .util import ReportOutputType
+from .outputs.sink import OutputSink
+from .result_store import ResultStore, RESULT_STORE_ERRORS
+from .trace import CalculationTrace
+from .util import ReportOutputType, CalculationEngine, TankEmission, TankFailure, ReportProgress
 from ..util.enums import TankType
+from ..util.cache import LruCache
+from ..util.errors import MissingData, ReportCancelled
+from ..util.metrics import MetricsRegistry, MetricsSnapshot, collect_metrics
 
 logger = logging.getLogger(__name__)
 
+# Chunks packed into each call of the batch engine
+BATCH_BLOCK_SIZE = 2_000
+
+# Chunk results kept for reuse within a run
+CHUNK_RESULT_CACHE_SIZE = 10_000
+
+# Tanks queued per worker process ahead of the one being collected
+PARALLEL_TANKS_PER_WORKER = 2
+
+Tank = FixedRoofTank | InternalFloatingRoofTank | ExternalFloatingRoofTank
+
+
+@dataclass(frozen=True)
+class PlannedFixedRoofChunk:
+    tank: FixedRoofTank
+    shim: FixedRoofTankShim
+    chunk: ReportingChunk
+    fingerprint: str
+    chunk_number: int  # Position of the chunk within its tank (from 1)
+    chunk_count: int
+
+
+@dataclass(frozen=True)
+class PlannedFloatingRoofChunk:
+    tank: InternalFloatingRoofTank | ExternalFloatingRoofTank
+    shim: InternalFloatingRoofTankShim | ExternalFloatingRoofTankShim
+    chunk: ReportingChunk
+    chunk_number: int  # Position of the chunk within its tank (from 1)
+    chunk_count: int
+
 
 class EmissionReport:
     def __init__(
@@ -26,10 +85,58 @@ class EmissionReport:
             facility_id: int,
             tanks: list[tuple[TankType, int]],
             reporting_period: ReportingPeriod,
+            engine: CalculationEngine = CalculationEngine.SCALAR,
+            vapor_pressure_tables: VaporPressureTables | None = None,
+            result_store: ResultStore | None = None,
+            workers: int | None = 1,
+            progress_callback: Callable[[ReportProgress], None] | None = None,
+            cancel_event: threading.Event | None = None,
+            trace: CalculationTrace | None = None,
     ) -> None:
         self.reporting_period = reporting_period
+        self.engine = engine
+
+        # Progress is reported per tank and per chunk, setting the event stops the run at the next chunk
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+
+        # More than one worker calculates the tanks in separate processes (None uses every core)
+        self.workers = workers
+        self.failures: list[TankFailure] = []
+        self.tanks: list[tuple[TankType, Tank]] = []
+        self.tank_types: dict[int, TankType] = {}  # By the identity of the tank
+
+        # Optional record of the intermediate values of every fixed roof chunk (calculated serially and never reused)
+        self.trace = trace
+
+        # Optional interpolation tables used by the batch engines in place of equations 1-25 and 1-26
+        # (Floating roof tanks always use the batch engine, fixed roof tanks only with CalculationEngine.BATCH)
+        self.vapor_pressure_tables = vapor_pressure_tables
+        self.uses_vapor_pressure_tables = vapor_pressure_tables is not None and engine is CalculationEngine.BATCH
+
         self.fixed_roof_tanks = []
         self.internal_floating_roof_tanks = []
+        self.external_floating_roof_tanks = []
+
+        # Material constants are compiled once and shared by every mixture in the report
+        self.compiled_materials = {}
+        self.mixture_shims: dict[int, MixtureShim] = {}
+
+        # Recent results of the run keyed by the fingerprint of their inputs, bounded so large facilities stay flat
+        # (Optionally backed by results persisted from earlier runs)
+        self.chunk_results = LruCache('Chunk result', max_size=CHUNK_RESULT_CACHE_SIZE)
+        self.result_store = result_store
+
+        # Counters for progress and logging
+        self.tanks_completed = 0
+        self.chunks_planned = 0
+        self.chunks_calculated = 0
+        self.chunks_stored = 0
+
+        # Stage timings and counters of this report, apart from any other report running in the process
+        self.metrics_registry = MetricsRegistry()
+        self.metrics: MetricsSnapshot | None = None
+        load_start = time.perf_counter()
 
         # Lookup the relevant tanks and facility
         self.session = Session(DB_ENGINE)
@@ -41,68 +148,496 @@ class EmissionReport:
                 tank = self.session.get(FixedRoofTank, tank_id)
                 assert tank is not None, f'No FRT with id: {tank_id}'
                 self.fixed_roof_tanks.append(tank)
+                self.tanks.append((tank_type, tank))
             elif tank_type == TankType.INTERNAL_FLOATING_ROOF:
                 tank = self.session.get(InternalFloatingRoofTank, tank_id)
                 assert tank is not None, f'No IFRT with id: {tank_id}'
                 self.internal_floating_roof_tanks.append(tank)
+                self.tanks.append((tank_type, tank))
+            elif tank_type in [TankType.EXTERNAL_FLOATING_ROOF, TankType.DOMED_EXTERNAL_FLOATING_ROOF]:
+                tank = self.session.get(ExternalFloatingRoofTank, tank_id)
+                assert tank is not None, f'No EFRT with id: {tank_id}'
+                self.external_floating_roof_tanks.append(tank)
+                self.tanks.append((tank_type, tank))
+
+        self.tank_types = {id(tank): tank_type for tank_type, tank in self.tanks}
 
-    def build_reporting_chunks(self, tank: FixedRoofTank | InternalFloatingRoofTank) -> list[ReportingChunk]:
+        self.metrics_registry.observe('report.load', time.perf_counter() - load_start)
+
+    def get_mixture_shim(self, mixture: Mixture) -> MixtureShim:
+        # Every chunk using a mixture shares one shim
+        if (shim := self.mixture_shims.get(mixture.id)) is None:
+            shim = MixtureShim.from_mixture(mixture, self.compiled_materials, self.vapor_pressure_tables)
+            self.mixture_shims[mixture.id] = shim
+
+        return shim
+
+    def build_reporting_chunks(self, tank: Tank) -> list[ReportingChunk]:
         report_start, report_end = self.reporting_period.get_date_range()
+        planner = ChunkPlanner(report_start, report_end)
+
         chunks = []
+        for planned_chunk in planner.plan(tank.service_records):
+            if planned_chunk.mixture is None:
+                raise MissingData(f'{tank.name}: No mixture for the service record on {planned_chunk.start_date}')
 
-        # Determine all the tank service records that overlap with our reporting range
-        for record in tank.service_records:
-            if (report_start <= record.end_date) and (record.start_date <= report_end):
-                # Start at the latter of the range starting or the record starting
-                chunk_start = max(report_start, record.start_date)
-                chunk_end = min(report_end, record.end_date)
-
-                # Adjust the throughput to match the chunk
-                throughput_per_day = record.throughput / (record.end_date - record.start_date).days
-                chunk_throughput = throughput_per_day * (chunk_end - chunk_start).days
-
-                chunks.append(
-                    ReportingChunk(
-                        start_date=chunk_start,
-                        end_date=chunk_end,
-                        mixture=MixtureShim.from_mixture(record.mixture),
-                        throughput=chunk_throughput,
-                        site=MeteorologicalChunk.from_site(self.facility.site, chunk_start, chunk_end),
-                    )
+            chunks.append(
+                ReportingChunk(
+                    start_date=planned_chunk.start_date,
+                    end_date=planned_chunk.end_date,
+                    mixture=self.get_mixture_shim(planned_chunk.mixture),
+                    throughput=planned_chunk.throughput,
+                    site=MeteorologicalChunk.from_site(self.facility.site, planned_chunk.start_date, planned_chunk.end_date),
+                    sum_liquid_level_decrease=planned_chunk.sum_liquid_level_decrease,
                 )
+            )
 
         return chunks
 
-    def calculate(self, output_type: ReportOutputType) -> None:
-        all_emissions = []
+    def check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ReportCancelled(f'{self.facility.name}: Report cancelled')
 
-        # Loop through each tank and calculate the emissions
-        for fixed_tank in self.fixed_roof_tanks:
-            logger.info(f'{self.facility.name}: Tank {fixed_tank.name}')
-            for chunk in self.build_reporting_chunks(fixed_tank):
-                logger.info(f'chunk; start: {chunk.start_date}, end: {chunk.end_date}, mixture: {chunk.mixture.name}')
-
-                tank_emissions = FixedRoofEmissions(
-                    facility_name=self.facility.name,
-                    tank=FixedRoofTankShim(fixed_tank),
-                    reporting_chunk=chunk,
+    def notify_progress(
+            self,
+            tank_name: str,
+            tanks_completed: int,
+            chunks_completed: int = 0,
+            chunk_count: int = 0,
+    ) -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(
+                ReportProgress(
+                    tank_name=tank_name,
+                    tanks_completed=tanks_completed,
+                    tank_count=len(self.tanks),
+                    chunks_completed=chunks_completed,
+                    chunk_count=chunk_count,
                 )
-                all_emissions.append(tank_emissions.calculate_total_emissions())
+            )
+
+    def relabel(self, result: TankEmission, tank: Tank) -> TankEmission:
+        # Results are shared between identical tanks so report them under the requesting tank
+        return dataclasses.replace(result, tank_type=self.tank_types[id(tank)], tank_id=tank.id, tank_name=tank.name)
+
+    def complete_tank(self, tank_name: str, chunk_count: int = 0) -> None:
+        self.tanks_completed += 1
+        self.notify_progress(tank_name, self.tanks_completed, chunk_count, chunk_count)
+
+    def record_failure(self, tank_type: TankType, tank_id: int, tank_name: str, error: Exception) -> None:
+        # One bad tank should not throw away the rest of the report
+        logger.error(f'{self.facility.name}: Tank {tank_name} failed: {error!r}')
+        self.failures.append(
+            TankFailure(
+                tank_type=tank_type,
+                tank_id=tank_id,
+                tank_name=tank_name,
+                error=repr(error),
+            )
+        )
+
+    def fail_tank(self, tank: Tank, error: Exception) -> None:
+        # The tank still counts towards the progress of the report
+        self.record_failure(self.tank_types[id(tank)], tank.id, tank.name, error)
+        self.complete_tank(tank.name)
+
+    def plan_fixed_roof_chunks(self) -> Iterator[list[PlannedFixedRoofChunk]]:
+        # One tank at a time so only the chunks about to be calculated are held in memory
+        for fixed_tank in self.fixed_roof_tanks:
+            self.check_cancelled()
+
+            try:
+                with self.metrics_registry.timer('report.plan_chunks'):
+                    # The shim compiles the tank parameters once for all of its chunks
+                    shim = FixedRoofTankShim(fixed_tank)
+                    compiled_tank = shim.compile()
+
+                    chunks = self.build_reporting_chunks(fixed_tank)
+                    planned = [
+                        PlannedFixedRoofChunk(
+                            tank=fixed_tank,
+                            shim=shim,
+                            chunk=chunk,
+                            fingerprint=fixed_roof_chunk_fingerprint(
+                                compiled_tank,
+                                chunk,
+                                self.engine,
+                                self.uses_vapor_pressure_tables,
+                            ),
+                            chunk_number=index + 1,
+                            chunk_count=len(chunks),
+                        )
+                        for index, chunk in enumerate(chunks)
+                    ]
+            except Exception as e:
+                self.fail_tank(fixed_tank, e)
+                continue
+
+            if not planned:
+                self.complete_tank(fixed_tank.name)
+                continue
 
-        for ifrt in self.internal_floating_roof_tanks:
-            logger.info(f'{self.facility.name}: Tank {ifrt.name}')
-            for chunk in self.build_reporting_chunks(ifrt):
-                logger.info(f'chunk; start: {chunk.start_date}, end: {chunk.end_date}, mixture: {chunk.mixture.name}')
+            yield planned
 
-                tank_emissions = InternalFloatingRoofEmissions(
-                    facility_name=self.facility.name,
-                    tank=InternalFloatingRoofTankShim(ifrt),
-                    reporting_chunk=chunk,
+    def group_fixed_roof_chunks(self) -> Iterator[list[PlannedFixedRoofChunk]]:
+        # The scalar engine streams tank by tank, the batch engine packs several tanks into each block
+        block = []
+        for tank_chunks in self.plan_fixed_roof_chunks():
+            block.extend(tank_chunks)
+            if self.engine is CalculationEngine.SCALAR or len(block) >= BATCH_BLOCK_SIZE:
+                yield block
+                block = []
+
+        if block:
+            yield block
+
+    def load_stored_results(self, fingerprints: list[str]) -> dict[str, TankEmission]:
+        # The store only saves work, when it can not be read the chunks are calculated instead
+        try:
+            with self.metrics_registry.timer('report.result_store.load'):
+                return self.result_store.load(fingerprints)
+        except RESULT_STORE_ERRORS as e:
+            logger.warning('%s: Calculating without stored results, loading them failed: %r', self.facility.name, e)
+            self.metrics_registry.increment('report.result_store.errors')
+            return {}
+
+    def save_results(self, results: dict[str, TankEmission]) -> None:
+        # The results are already reported, a store that can not be written only loses them for later runs
+        try:
+            with self.metrics_registry.timer('report.result_store.save'):
+                self.result_store.save(results)
+        except RESULT_STORE_ERRORS as e:
+            logger.warning('%s: Results not stored, saving them failed: %r', self.facility.name, e)
+            self.metrics_registry.increment('report.result_store.errors')
+
+    def calculate_fixed_roof_block(self, block: list[PlannedFixedRoofChunk]) -> Iterator[TankEmission]:
+        # Pick up the results of this run and of earlier runs
+        results = {}
+        if self.trace is None:
+            for planned in block:
+                if (result := self.chunk_results.get(planned.fingerprint)) is not None:
+                    results[planned.fingerprint] = result
+
+        if self.result_store is not None and self.trace is None:
+            stored = self.load_stored_results(
+                [planned.fingerprint for planned in block if planned.fingerprint not in results]
+            )
+            results.update(stored)
+            self.chunks_stored += len(stored)
+
+        # Only calculate the distinct chunks that do not have a result yet
+        # (A trace needs the working of every tank, so identical chunks are calculated again)
+        work = {}
+        for planned in block:
+            key = planned.fingerprint if self.trace is None else id(planned)
+            if planned.fingerprint not in results and key not in work:
+                work[key] = planned
+
+        calculated = {}
+        if self.engine is CalculationEngine.BATCH and work:
+            # Pack every chunk of the block and run them all at once
+            self.check_cancelled()
+            with self.metrics_registry.timer('report.calculate_batch'):
+                emissions = FixedRoofBatchEmissions.calculate_total_emissions(
+                    [(planned.shim, planned.chunk) for planned in work.values()],
+                    trace=self.trace,
+                )
+            calculated = {planned.fingerprint: result for planned, result in zip(work.values(), emissions)}
+            results.update(calculated)
+
+        pending = {id(planned) for planned in work.values()}
+        for planned in block:
+            if self.engine is CalculationEngine.SCALAR and id(planned) in pending:
+                self.check_cancelled()
+                logger.info(
+                    '%s: Tank %s; chunk start: %s, end: %s, mixture: %s',
+                    self.facility.name,
+                    planned.tank.name,
+                    planned.chunk.start_date,
+                    planned.chunk.end_date,
+                    planned.chunk.mixture.name,
                 )
-                all_emissions.append(tank_emissions.calculate_total_emissions())
 
-        # Report based on the output type
-        if output_type is ReportOutputType.LOG:
-            LogOutput.report(all_emissions)
+                with self.metrics_registry.timer('report.calculate_chunk'):
+                    tank_emissions = FixedRoofEmissions(
+                        facility_name=self.facility.name,
+                        tank=planned.shim,
+                        reporting_chunk=planned.chunk,
+                        trace=self.trace,
+                    )
+                    calculated[planned.fingerprint] = tank_emissions.calculate_total_emissions()
+                results[planned.fingerprint] = calculated[planned.fingerprint]
+
+            yield self.relabel(results[planned.fingerprint], planned.tank)
+
+            if planned.chunk_number == planned.chunk_count:
+                self.complete_tank(planned.tank.name, planned.chunk_count)
+            else:
+                self.notify_progress(planned.tank.name, self.tanks_completed, planned.chunk_number, planned.chunk_count)
+
+        for fingerprint, result in calculated.items():
+            self.chunk_results.put(fingerprint, result)
+        if self.result_store is not None and calculated:
+            self.save_results(calculated)
+
+        self.chunks_planned += len(block)
+        self.chunks_calculated += len(work)
+        self.metrics_registry.increment('report.chunks_planned', len(block))
+        self.metrics_registry.increment('report.chunks_calculated', len(work))
+        self.metrics_registry.increment('report.chunks_reused', len(block) - len(work))
+
+    def calculate_isolated_block(
+            self,
+            block: list[PlannedFixedRoofChunk] | list[PlannedFloatingRoofChunk],
+            calculate_block: Callable[[list], Iterator[TankEmission]],
+    ) -> Iterator[TankEmission]:
+        # The results of a block are held back until all of its tanks succeed
+        # (A failed block of several tanks is calculated again tank by tank to find the bad one)
+        try:
+            emissions = list(calculate_block(block))
+        except ReportCancelled:
+            raise
+        except Exception as e:
+            tank_blocks = [
+                list(tank_block) for _, tank_block in itertools.groupby(block, key=lambda planned: id(planned.tank))
+            ]
+            if len(tank_blocks) == 1:
+                self.fail_tank(block[0].tank, e)
+                return
+        else:
+            yield from emissions
+            return
+
+        for tank_block in tank_blocks:
+            yield from self.calculate_isolated_block(tank_block, calculate_block)
+
+    def iter_fixed_roof_emissions(self) -> Iterator[TankEmission]:
+        for block in self.group_fixed_roof_chunks():
+            yield from self.calculate_isolated_block(block, self.calculate_fixed_roof_block)
+
+        if self.fixed_roof_tanks:
+            logger.info(f'Calculated {self.chunks_calculated} of {self.chunks_planned} chunks '
+                        f'({self.chunks_stored} stored results reused)')
+
+    def get_monthly_wind_speed(self) -> np.ndarray:
+        # Average wind speed (mph) of each month of the site, January first
+        site = self.facility.site
+        climatology = SITE_CLIMATOLOGY_CACHE.get_or_calculate(site.id, lambda: SiteClimatology.from_site(site))
+        return np.array([float(wind_speed) for wind_speed in climatology.average_wind_speed[:12]])
+
+    def plan_floating_roof_chunks(
+            self,
+            tanks: list[InternalFloatingRoofTank | ExternalFloatingRoofTank],
+            shim_type: type[InternalFloatingRoofTankShim | ExternalFloatingRoofTankShim],
+    ) -> Iterator[list[PlannedFloatingRoofChunk]]:
+        # One tank at a time so only the chunks about to be calculated are held in memory
+        for tank in tanks:
+            self.check_cancelled()
+
+            try:
+                with self.metrics_registry.timer('report.plan_chunks'):
+                    # The shim compiles the tank, seal and fitting factors once for all of its chunks
+                    shim = shim_type(tank)
+                    shim.compile()
+
+                    chunks = self.build_reporting_chunks(tank)
+                    planned = [
+                        PlannedFloatingRoofChunk(
+                            tank=tank,
+                            shim=shim,
+                            chunk=chunk,
+                            chunk_number=index + 1,
+                            chunk_count=len(chunks),
+                        )
+                        for index, chunk in enumerate(chunks)
+                    ]
+            except Exception as e:
+                self.fail_tank(tank, e)
+                continue
+
+            if not planned:
+                self.complete_tank(tank.name)
+                continue
+
+            yield planned
+
+    def group_floating_roof_chunks(
+            self,
+            tanks: list[InternalFloatingRoofTank | ExternalFloatingRoofTank],
+            shim_type: type[InternalFloatingRoofTankShim | ExternalFloatingRoofTankShim],
+    ) -> Iterator[list[PlannedFloatingRoofChunk]]:
+        # Floating roof tanks only have the batch engine, whole tanks are packed into each block
+        block = []
+        for tank_chunks in self.plan_floating_roof_chunks(tanks, shim_type):
+            block.extend(tank_chunks)
+            if len(block) >= BATCH_BLOCK_SIZE:
+                yield block
+                block = []
+
+        if block:
+            yield block
+
+    def calculate_floating_roof_block(self, block: list[PlannedFloatingRoofChunk]) -> Iterator[TankEmission]:
+        # The wind speed dependent loss factors are evaluated for all the months of the block in one pass
+        self.check_cancelled()
+        with self.metrics_registry.timer('report.calculate_batch'):
+            emissions = FloatingRoofBatchEmissions.calculate_total_emissions(
+                [(planned.shim, planned.chunk) for planned in block],
+                self.get_monthly_wind_speed(),
+            )
+
+        for planned, emission in zip(block, emissions):
+            if planned.chunk_number == 1:
+                logger.info(f'{self.facility.name}: Tank {planned.tank.name}')
+
+            yield self.relabel(emission, planned.tank)
+
+            if planned.chunk_number == planned.chunk_count:
+                self.complete_tank(planned.tank.name, planned.chunk_count)
+            else:
+                self.notify_progress(planned.tank.name, self.tanks_completed, planned.chunk_number, planned.chunk_count)
+
+    def iter_floating_roof_emissions(
+            self,
+            tanks: list[InternalFloatingRoofTank | ExternalFloatingRoofTank],
+            shim_type: type[InternalFloatingRoofTankShim | ExternalFloatingRoofTankShim],
+    ) -> Iterator[TankEmission]:
+        for block in self.group_floating_roof_chunks(tanks, shim_type):
+            yield from self.calculate_isolated_block(block, self.calculate_floating_roof_block)
+
+    def iter_internal_floating_roof_emissions(self) -> Iterator[TankEmission]:
+        yield from self.iter_floating_roof_emissions(self.internal_floating_roof_tanks, InternalFloatingRoofTankShim)
+
+    def iter_external_floating_roof_emissions(self) -> Iterator[TankEmission]:
+        yield from self.iter_floating_roof_emissions(self.external_floating_roof_tanks, ExternalFloatingRoofTankShim)
+
+    def iter_parallel_emissions(self) -> Iterator[TankEmission]:
+        # Fixed roof tanks first to match the order of a serial run
+        ordered_tanks = sorted(
+            self.tanks,
+            key=lambda item: item[0] not in [TankType.HORIZONTAL_FIXED_ROOF, TankType.VERTICAL_FIXED_ROOF],
+        )
+        units = (
+            TankWorkUnit(
+                facility_id=self.facility.id,
+                tank_type=tank_type,
+                tank_id=tank.id,
+                tank_name=tank.name,
+                reporting_period=self.reporting_period,
+                engine=self.engine,
+                vapor_pressure_table_dir=self.vapor_pressure_tables.directory if self.vapor_pressure_tables else None,
+                persist_results=self.result_store is not None,
+            )
+            for tank_type, tank in ordered_tanks
+        )
+
+        # Only a few tanks per worker are in flight so finished results do not pile up ahead of the sinks
+        max_in_flight = PARALLEL_TANKS_PER_WORKER * (self.workers or os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_initialize_worker) as executor:
+            pending = deque(
+                (unit, executor.submit(_calculate_tank_emissions, unit))
+                for unit in itertools.islice(units, max_in_flight)
+            )
+
+            # Collect in submission order so the results do not depend on which worker finishes first
+            while pending:
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.check_cancelled()
+
+                unit, future = pending.popleft()
+                try:
+                    emissions, failures = future.result()
+                except Exception as e:
+                    # Failures the worker could not isolate itself (e.g. a crashed process)
+                    self.record_failure(unit.tank_type, unit.tank_id, unit.tank_name, e)
+                    emissions = []
+                else:
+                    self.failures.extend(failures)
+
+                if (next_unit := next(units, None)) is not None:
+                    pending.append((next_unit, executor.submit(_calculate_tank_emissions, next_unit)))
+
+                yield from emissions
+                self.complete_tank(unit.tank_name)
+
+        logger.info(f'Calculated {len(self.tanks) - len(self.failures)} of {len(self.tanks)} tanks '
+                    f'with {self.workers or "all"} workers')
+
+    def iter_emissions(self) -> Iterator[TankEmission]:
+        self.tanks_completed = 0
+        if self.trace is None and (self.workers is None or self.workers > 1):
+            yield from self.iter_parallel_emissions()
+        else:
+            yield from self.iter_fixed_roof_emissions()
+            yield from self.iter_internal_floating_roof_emissions()
+            yield from self.iter_external_floating_roof_emissions()
+
+            # The caches of worker processes are not visible here
+            for cache in [VAPOR_PRESSURE_CACHE, SITE_CLIMATOLOGY_CACHE, METEOROLOGICAL_CHUNK_CACHE]:
+                logger.info(cache.stats())
+
+    def calculate(self, output_type: ReportOutputType, sinks: list[OutputSink] | None = None) -> None:
+        # Report based on the output type unless the caller brings its own sinks
+        if sinks is None:
+            sinks = [LogOutput()] if output_type is ReportOutputType.LOG else []
+
+        try:
+            # Emissions flow into the sinks as each chunk is calculated
+            # (The calculation timers of this thread are collected for this report as well)
+            with collect_metrics(self.metrics_registry):
+                for emission in self.iter_emissions():
+                    with self.metrics_registry.timer('report.output'):
+                        for sink in sinks:
+                            sink.write(emission)
+
+                with self.metrics_registry.timer('report.output.finish'):
+                    for sink in sinks:
+                        sink.finish()
+
+            # Parallel runs only include the stages of this process
+            self.metrics = self.metrics_registry.snapshot()
+            logger.info(f'Report metrics:\n{self.metrics.summary_table()}')
+        finally:
+            for sink in sinks:
+                sink.close()
+            self.session.close()
+
+
+@dataclass(frozen=True)
+class TankWorkUnit:
+    facility_id: int
+    tank_type: TankType
+    tank_id: int
+    tank_name: str
+    reporting_period: ReportingPeriod
+    engine: CalculationEngine
+    vapor_pressure_table_dir: Path | None
+    persist_results: bool
+
+
+def _initialize_worker() -> None:
+    # Connections inherited from the parent process must not be shared
+    DB_ENGINE.dispose(close=False)
+
+
+def _calculate_tank_emissions(unit: TankWorkUnit) -> tuple[list[TankEmission], list[TankFailure]]:
+    report = EmissionReport(
+        facility_id=unit.facility_id,
+        tanks=[(unit.tank_type, unit.tank_id)],
+        reporting_period=unit.reporting_period,
+        engine=unit.engine,
+        vapor_pressure_tables=VaporPressureTables(unit.vapor_pressure_table_dir) if unit.vapor_pressure_table_dir else None,
+        result_store=ResultStore(DB_ENGINE) if unit.persist_results else None,
+    )
 
-        self.session.close()
+    try:
+        emissions = [
+            *report.iter_fixed_roof_emissions(),
+            *report.iter_internal_floating_roof_emissions(),
+            *report.iter_external_floating_roof_emissions(),
+        ]
+        return emissions, report.failures
+    finally:
+        report.session.close()
@@ -0,0 +1,74 @@
+import dataclasses
+import hashlib
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from pint import Quantity
+
+from src.reports.components.mixture import MixtureShim
+from src.reports.components.tanks.fixed_roof import CompiledFixedRoofTank
+from src.reports.components.time import ReportingChunk
+from src.reports.util import CalculationEngine
+
+# Bump this when a change to the calculations or the stored results makes previously fingerprinted results stale
+FINGERPRINT_VERSION = 6
+
+# Identity of the tank, the result is relabelled with the matching tank instead
+TANK_IDENTITY_FIELDS = {'id', 'name'}
+
+
+def _canonical(value, exclude: set[str] = frozenset()) -> str:
+    # A text form that only depends on the values (not object identity, field order or trailing zeros)
+    if value is None or isinstance(value, (bool, int, str)):
+        return repr(value)
+    elif isinstance(value, Decimal):
+        return f'D{value.normalize()}'
+    elif isinstance(value, float):
+        return f'F{value!r}'
+    elif isinstance(value, Enum):
+        return f'{type(value).__name__}.{value.name}'
+    elif isinstance(value, date):
+        return value.isoformat()
+    elif isinstance(value, Quantity):
+        return f'Q({_canonical(value.magnitude)} {value.units})'
+    elif dataclasses.is_dataclass(value):
+        fields = [
+            f'{field.name}={_canonical(getattr(value, field.name))}'
+            for field in dataclasses.fields(value)
+            if field.name not in exclude
+        ]
+        return f'{type(value).__name__}({", ".join(fields)})'
+    elif isinstance(value, (list, tuple)):
+        return f'[{", ".join(_canonical(item) for item in value)}]'
+
+    raise TypeError(f'Cannot fingerprint {type(value).__name__}')
+
+
+def stable_hash(*parts: str) -> str:
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def mixture_fingerprint(mixture: MixtureShim) -> str:
+    components = [
+        _canonical((component.material.name, component.constants, component.mole_fraction))
+        for component in mixture.components
+    ]
+    return _canonical((mixture.db_id, mixture.name, mixture.makeup_type, components))
+
+
+def fixed_roof_chunk_fingerprint(
+        tank: CompiledFixedRoofTank,
+        chunk: ReportingChunk,
+        engine: CalculationEngine,
+        vapor_pressure_tables: bool,
+) -> str:
+    # Batch (float) and table (interpolated) results are close to but not the same as the exact Decimal results,
+    # so they are never handed to a run of another engine or mode
+    return stable_hash(
+        f'fixed_roof_v{FINGERPRINT_VERSION}',
+        _canonical((engine, vapor_pressure_tables)),
+        _canonical(tank, exclude=TANK_IDENTITY_FIELDS),
+        _canonical((chunk.start_date, chunk.end_date, chunk.throughput)),
+        _canonical(chunk.site.compile()),
+        mixture_fingerprint(chunk.mixture),
+    )
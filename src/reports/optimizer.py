@@ -0,0 +1,213 @@
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+from pint import Quantity
+from sqlalchemy.orm import Session
+import numpy as np
+
+from src.database import DB_ENGINE
+from src.database.definitions.facility import Facility
+from src.database.definitions.fixed_roof_tank import FixedRoofTank
+
+from .components.time import ReportingPeriod
+from .sweep import SweepCase, TankDesignSweep
+from .util import EMISSIONS_UNIT
+
+logger = logging.getLogger(__name__)
+
+# Design spaces this small are evaluated in full rather than searched
+EXHAUSTIVE_LIMIT = 5_000
+
+# Cost model: the chosen value of every grid parameter -> cost of making that change
+CostModel = Callable[[dict[str, Any]], float]
+
+
+@dataclass
+class OptimizationResult:
+    tank_name: str
+    target: Quantity
+    baseline: SweepCase  # The tank as it is
+    best: SweepCase | None  # Cheapest design under the target (or the lowest losses when nothing reaches it)
+    cost: float | None
+    feasible: bool
+    evaluations: int  # Distinct designs run through the batch engine
+    cache_hits: int
+    generations: int  # 0 for an exhaustive search
+    seconds: float
+
+    def summary(self) -> str:
+        if self.best is None:
+            return f'{self.tank_name}: No design fits the tank'
+
+        outcome = 'meets' if self.feasible else 'does not meet'
+        changes = ', '.join(f'{parameter}: {value}' for parameter, value in self.best.overrides.items())
+        return (f'{self.tank_name}: {changes} (cost {self.cost:g}) {outcome} the target of {self.target:~}, '
+                f'losses {self.best.total_losses.magnitude:.6g} (as built {self.baseline.total_losses.magnitude:.6g}); '
+                f'{self.evaluations} designs evaluated, {self.cache_hits} cache hits, {self.generations} generations, '
+                f'{self.seconds:.2f} s')
+
+    def __str__(self) -> str:
+        return self.summary()
+
+
+class TankDesignOptimizer(TankDesignSweep):
+    """
+    Search of a grid of design changes (see SWEEP_PARAMETERS) for the cheapest one under a target loss.
+    A genetic algorithm evaluates each generation as one batch and remembers every design it has seen, small
+    grids are simply evaluated in full. Include the tank's current values in the grid (at no cost) so that
+    leaving a parameter alone is an option.
+    """
+    def __init__(
+            self,
+            tank: FixedRoofTank,
+            reporting_period: ReportingPeriod,
+            grid: dict[str, list],
+            cost_model: CostModel,
+            target: Quantity | float,
+            population_size: int = 64,
+            max_generations: int = 100,
+            patience: int = 15,
+            mutation_rate: float | None = None,
+            seed: int = 0,
+    ) -> None:
+        super().__init__(tank, reporting_period, grid)
+        self.grid = grid
+        self.cost_model = cost_model
+        self.target = target if isinstance(target, Quantity) else target * EMISSIONS_UNIT
+        self.target_magnitude = float(self.target.to(EMISSIONS_UNIT).magnitude)
+
+        self.population_size = population_size
+        self.max_generations = max_generations
+        self.patience = patience  # Generations without a better design before stopping
+        self.mutation_rate = mutation_rate if mutation_rate is not None else 1 / max(1, len(self.parameters))
+        self.rng = np.random.default_rng(seed)
+
+        # Design (tuple of value indexes) -> (standing losses, working losses, cost)
+        self.evaluated: dict[tuple[int, ...], tuple[float, float, float]] = {}
+        self.cache_hits = 0
+        self.sizes = np.array([len(self.columns[parameter]) for parameter in self.parameters], dtype=int)
+
+    def design_cost(self, design: tuple[int, ...]) -> float:
+        return float(self.cost_model({
+            parameter: self.grid[parameter][value_index] for parameter, value_index in zip(self.parameters, design)
+        }))
+
+    def evaluate_designs(self, inputs, designs: np.ndarray) -> np.ndarray:
+        # (standing, working, cost) of every design, only running the ones not seen before
+        keys = [tuple(int(value) for value in design) for design in designs]
+        new_keys = list(dict.fromkeys(key for key in keys if key not in self.evaluated))
+        self.cache_hits += len(keys) - len(new_keys)
+
+        if new_keys:
+            new_designs = np.array(new_keys, dtype=int).reshape(-1, len(self.parameters))
+            fits = self.fits_tank(inputs, self.override_columns(new_designs), len(new_designs))
+            standing_losses = np.full(len(new_designs), np.inf)
+            working_losses = np.full(len(new_designs), np.inf)
+            standing_losses[fits], working_losses[fits] = self.evaluate(inputs, new_designs[fits])
+
+            for key, standing, working in zip(new_keys, standing_losses, working_losses):
+                self.evaluated[key] = (float(standing), float(working), self.design_cost(key))
+
+        return np.array([self.evaluated[key] for key in keys]).reshape(-1, 3)
+
+    def rank(self, results: np.ndarray) -> np.ndarray:
+        # Designs under the target by cost, then the rest by how far over the target they are
+        total_losses = results[:, 0] + results[:, 1]
+        feasible = total_losses <= self.target_magnitude
+        return np.lexsort((
+            total_losses,
+            results[:, 2],
+            np.where(feasible, 0.0, total_losses),
+            ~feasible,
+        ))
+
+    def search(self, inputs) -> int:
+        # Genetic search over value indexes, returns the number of generations run
+        population = self.rng.integers(0, self.sizes, size=(self.population_size, len(self.parameters)))
+        elite_count = max(1, self.population_size // 8)
+        best_key, stale_generations = None, 0
+
+        for generation in range(1, self.max_generations + 1):
+            results = self.evaluate_designs(inputs, population)
+            population = population[self.rank(results)]
+
+            if (key := tuple(population[0])) == best_key:
+                stale_generations += 1
+                if stale_generations >= self.patience:
+                    return generation
+            else:
+                best_key, stale_generations = key, 0
+
+            # Tournaments between random pairs pick the parents (the population is sorted so the lower index wins)
+            pairs = self.rng.integers(0, self.population_size, size=(self.population_size - elite_count, 2, 2))
+            parents = population[pairs.min(axis=2)]
+
+            # Uniform crossover then mutation to a random value
+            children = np.where(self.rng.random(parents.shape[::2]) < 0.5, parents[:, 0], parents[:, 1])
+            mutate = self.rng.random(children.shape) < self.mutation_rate
+            children = np.where(mutate, self.rng.integers(0, self.sizes, size=children.shape), children)
+
+            population = np.concatenate([population[:elite_count], children])
+
+        return self.max_generations
+
+    def optimize(self) -> OptimizationResult:
+        start = time.perf_counter()
+        inputs = self.load_inputs()
+
+        space_size = int(np.prod(self.sizes))
+        if space_size <= EXHAUSTIVE_LIMIT:
+            designs = np.array(list(itertools.product(*(range(size) for size in self.sizes))), dtype=int)
+            self.evaluate_designs(inputs, designs.reshape(-1, len(self.parameters)))
+            generations = 0
+        else:
+            generations = self.search(inputs)
+
+        keys = [key for key, (standing, _, _) in self.evaluated.items() if np.isfinite(standing)]
+        best, cost, feasible = None, None, False
+        if keys:
+            results = np.array([self.evaluated[key] for key in keys])
+            best_index = self.rank(results)[0]
+            standing, working, cost = results[best_index]
+            best = self.build_case(np.array(keys[best_index]), standing, working)
+            feasible = standing + working <= self.target_magnitude
+
+        result = OptimizationResult(
+            tank_name=self.tank_name,
+            target=self.target,
+            baseline=self.build_baseline(inputs),
+            best=best,
+            cost=cost,
+            feasible=bool(feasible),
+            evaluations=len(self.evaluated),
+            cache_hits=self.cache_hits,
+            generations=generations,
+            seconds=time.perf_counter() - start,
+        )
+        # Only summarised when the record is emitted
+        logger.info('%s', result)
+        return result
+
+
+def optimize_facility(
+        facility_id: int,
+        reporting_period: ReportingPeriod,
+        grid_for_tank: Callable[[FixedRoofTank], dict[str, list]],
+        cost_model: CostModel,
+        target: Quantity | float,
+        **options,
+) -> list[OptimizationResult]:
+    # Every fixed roof tank of the facility against the same per tank target (grids usually depend on the tank)
+    with Session(DB_ENGINE) as session:
+        facility = session.get(Facility, facility_id)
+        if facility is None:
+            raise ValueError(f'No facility with id: {facility_id}')
+
+        optimizers = [
+            TankDesignOptimizer(tank, reporting_period, grid_for_tank(tank), cost_model, target, **options)
+            for tank in facility.fixed_roof_tanks
+        ]
+
+    return [optimizer.optimize() for optimizer in optimizers]
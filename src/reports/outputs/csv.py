@@ -0,0 +1,43 @@
+import csv
+from pathlib import Path
+
+from .sink import OutputSink
+from ..util import TankEmission, EMISSIONS_UNIT
+
+HEADER = ['tank_type', 'tank_id', 'tank_name', 'loss_type', 'mixture_id', 'mixture_name', 'material_type',
+          'material_id', 'material_name', 'emissions', 'units']
+
+
+class CsvOutput(OutputSink):
+    """
+    One row per tank, loss type and material. Rows are flushed as each chunk arrives so the file
+    can be followed while the report is still calculating.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.file = path.open('w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(HEADER)
+
+    def write(self, emission: TankEmission) -> None:
+        tank_type = emission.tank_type.name.lower() if emission.tank_type is not None else ''
+        for loss_type, mixture in [('standing', emission.standing_losses), ('working', emission.working_losses)]:
+            for material in mixture.material_emissions:
+                self.writer.writerow([
+                    tank_type,
+                    emission.tank_id,
+                    emission.tank_name,
+                    loss_type,
+                    mixture.mixture_id,
+                    mixture.mixture_name,
+                    material.material_type.name.lower(),
+                    material.material_id,
+                    material.material_name,
+                    material.magnitude,
+                    EMISSIONS_UNIT,
+                ])
+
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
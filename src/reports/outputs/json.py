@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from .sink import OutputSink
+from ..aggregation import EmissionTable, GroupBy
+from ..util import TankEmission, EMISSIONS_UNIT
+
+
+class JsonOutput(OutputSink):
+    """
+    Totals of the report per tank, loss type and material (plus the facility total) written as one JSON document
+    once the report completes. Emissions are strings so the Decimal results are kept exactly.
+    """
+    def __init__(self, path: Path, metadata: dict | None = None) -> None:
+        self.path = path
+        self.metadata = metadata or {}
+        self.table = EmissionTable()
+
+    def write(self, emission: TankEmission) -> None:
+        self.table.append(emission)
+
+    def finish(self) -> None:
+        rollup = self.table.rollup([GroupBy.TANK, GroupBy.LOSS_TYPE, GroupBy.MATERIAL])
+        total = self.table.rollup([]).get(())
+
+        document = {
+            **self.metadata,
+            'units': str(EMISSIONS_UNIT),
+            'total': str(total.magnitude) if total is not None else '0',
+            'emissions': [
+                {
+                    'tank_type': tank_type.name.lower() if tank_type is not None else None,
+                    'tank_id': tank_id,
+                    'tank_name': tank_name,
+                    'loss_type': loss_type.name.lower(),
+                    'material_type': material_type.name.lower(),
+                    'material_id': material_id,
+                    'material_name': material_name,
+                    'emissions': str(emissions.magnitude),
+                }
+                for ((tank_type, tank_id, tank_name), loss_type, (material_type, material_id, material_name)), emissions
+                in rollup.items()
+            ],
+        }
+        self.path.write_text(json.dumps(document, indent=2))
@@ -1,39 +1,33 @@
 import logging
-from collections import defaultdict
-from decimal import Decimal
 
+from .sink import OutputSink
+from ..aggregation import EmissionTable, GroupBy
 from ..util import TankEmission
 
 logger = logging.getLogger(__name__)
 
 
-class LogOutput:
-    @staticmethod
-    def report(tank_emissions: list[TankEmission]) -> None:
-        emissions_by_tank = defaultdict(Decimal)
-        emissions_by_mixture = defaultdict(Decimal)
-        emissions_by_material = defaultdict(Decimal)
-
-        for tank_emissions in tank_emissions:
-            standing = (tank_emissions.standing_losses, tank_emissions.standing_losses.material_emissions)
-            working = (tank_emissions.working_losses, tank_emissions.working_losses.material_emissions)
-            for mixture, materials in [standing, working]:
-                for material in materials:
-                    material_key = (material.material_id, material.material_name)
-                    emissions_by_material[material_key] += material.emissions
-
-                    mixture_key = (mixture.mixture_id, mixture.mixture_name)
-                    emissions_by_mixture[mixture_key] += material.emissions
+class LogOutput(OutputSink):
+    def __init__(self) -> None:
+        self.table = EmissionTable()
 
-                    tank_key = (tank_emissions.tank_id, tank_emissions.tank_name)
-                    emissions_by_tank[tank_key] += material.emissions
+    def write(self, emission: TankEmission) -> None:
+        self.table.append(emission)
 
+    def finish(self) -> None:
         # Log the results
-        for (_, name), emissions in emissions_by_tank.items():
+        for ((_, _, name),), emissions in self.table.rollup([GroupBy.TANK]).items():
             logger.info(f'Tank {name}: {emissions}')
 
-        for (_, name), emissions in emissions_by_mixture.items():
+        for ((_, name),), emissions in self.table.rollup([GroupBy.MIXTURE]).items():
             logger.info(f'Mixture {name}: {emissions}')
 
-        for (_, name), emissions in emissions_by_material.items():
+        for ((_, _, name),), emissions in self.table.rollup([GroupBy.MATERIAL]).items():
             logger.info(f'Material {name}: {emissions}')
+
+    @staticmethod
+    def report(tank_emissions: list[TankEmission]) -> None:
+        output = LogOutput()
+        for emission in tank_emissions:
+            output.write(emission)
+        output.finish()
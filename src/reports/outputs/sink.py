@@ -0,0 +1,17 @@
+from ..util import TankEmission
+
+
+class OutputSink:
+    """
+    Receives the emissions of a report one chunk at a time while the rest of the report is still calculating.
+    """
+    def write(self, emission: TankEmission) -> None:
+        raise NotImplementedError()
+
+    def finish(self) -> None:
+        # Called once after the last emission of a report that completed
+        pass
+
+    def close(self) -> None:
+        # Always called, even if the report failed or was cancelled
+        pass
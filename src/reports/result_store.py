@@ -0,0 +1,131 @@
+import json
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import Engine, select, delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src import unit_registry
+from src.database.definitions.emission_result import EmissionResult
+from src.util.enums import MaterialType
+
+from .util import TankEmission, MixtureEmission, MaterialEmission, EMISSIONS_UNIT
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters in a single query
+LOOKUP_BATCH_SIZE = 500
+
+# Raised by a store that can not be read or written (locked database, rows written by another version, ...)
+RESULT_STORE_ERRORS = (SQLAlchemyError, ValueError, KeyError)
+
+
+def _mixture_to_dict(mixture: MixtureEmission) -> dict:
+    return {
+        'mixture_id': mixture.mixture_id,
+        'mixture_name': mixture.mixture_name,
+        'material_emissions': [
+            {
+                'material_type': material.material_type.name,
+                'material_id': material.material_id,
+                'material_name': material.material_name,
+                'emissions': str(material.magnitude),
+                'units': str(EMISSIONS_UNIT),
+            }
+            for material in mixture.material_emissions
+        ],
+    }
+
+
+def _to_emissions_unit(magnitude: Decimal, units: str) -> Decimal:
+    # Results are stored in EMISSIONS_UNIT, anything else is converted
+    quantity = unit_registry.Quantity(magnitude, units)
+    return magnitude if quantity.units == EMISSIONS_UNIT else quantity.to(EMISSIONS_UNIT).magnitude
+
+
+def _mixture_from_dict(data: dict) -> MixtureEmission:
+    return MixtureEmission(
+        mixture_id=data['mixture_id'],
+        mixture_name=data['mixture_name'],
+        material_emissions=[
+            MaterialEmission(
+                material_type=MaterialType[material['material_type']],
+                material_id=material['material_id'],
+                material_name=material['material_name'],
+                magnitude=_to_emissions_unit(Decimal(material['emissions']), material['units']),
+            )
+            for material in data['material_emissions']
+        ],
+    )
+
+
+def serialize_tank_emission(emission: TankEmission) -> str:
+    return json.dumps({
+        'tank_id': emission.tank_id,
+        'tank_name': emission.tank_name,
+        'standing_losses': _mixture_to_dict(emission.standing_losses),
+        'working_losses': _mixture_to_dict(emission.working_losses),
+        'start_date': emission.start_date.isoformat() if emission.start_date else None,
+        'end_date': emission.end_date.isoformat() if emission.end_date else None,
+    })
+
+
+def deserialize_tank_emission(text: str) -> TankEmission:
+    data = json.loads(text)
+    return TankEmission(
+        tank_id=data['tank_id'],
+        tank_name=data['tank_name'],
+        standing_losses=_mixture_from_dict(data['standing_losses']),
+        working_losses=_mixture_from_dict(data['working_losses']),
+        start_date=date.fromisoformat(data['start_date']) if data['start_date'] else None,
+        end_date=date.fromisoformat(data['end_date']) if data['end_date'] else None,
+    )
+
+
+class ResultStore:
+    """
+    Chunk results persisted in the database keyed by the fingerprint of their inputs.
+    Any change to an input (tank, service record, mixture, material or meteorological data) changes the
+    fingerprint, so stale results are never matched and only the changed chunks are recalculated.
+    """
+    def __init__(self, engine: Engine) -> None:
+        # Use separate sessions so committing results never expires the objects of a report
+        self.engine = engine
+
+    def load(self, fingerprints: list[str]) -> dict[str, TankEmission]:
+        results = {}
+        unique_fingerprints = list(dict.fromkeys(fingerprints))
+        with Session(self.engine) as session:
+            for offset in range(0, len(unique_fingerprints), LOOKUP_BATCH_SIZE):
+                batch = unique_fingerprints[offset:offset + LOOKUP_BATCH_SIZE]
+                for row in session.scalars(select(EmissionResult).where(EmissionResult.input_hash.in_(batch))):
+                    results[row.input_hash] = deserialize_tank_emission(row.result)
+                    row.last_used = date.today()
+
+            session.commit()
+
+        return results
+
+    def save(self, results: dict[str, TankEmission]) -> None:
+        with Session(self.engine) as session:
+            for fingerprint, emission in results.items():
+                session.merge(
+                    EmissionResult(
+                        input_hash=fingerprint,
+                        result=serialize_tank_emission(emission),
+                        last_used=date.today(),
+                    )
+                )
+
+            session.commit()
+
+    def prune(self, unused_days: int) -> int:
+        # Results that are no longer reachable are never matched again, drop the ones nobody has used lately
+        cutoff = date.today() - timedelta(days=unused_days)
+        with Session(self.engine) as session:
+            deleted = session.execute(delete(EmissionResult).where(EmissionResult.last_used < cutoff)).rowcount
+            session.commit()
+
+        logger.info(f'Pruned {deleted} stored results unused since {cutoff}')
+        return deleted
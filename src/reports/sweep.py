@@ -0,0 +1,259 @@
+import dataclasses
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable
+from pint import Quantity
+import numpy as np
+
+from src.database.definitions.fixed_roof_tank import FixedRoofTank
+from src.database.definitions.paint import SolarAbsorptance
+from src.util.enums import InsulationType, TankType
+from src.util.errors import MissingData
+from src.util.quantities import to_decimal
+
+from .calculations.fixed_roof_tank_batch import FixedRoofBatchEmissions, FixedRoofBatchInputs, INSULATION_CODES
+from .components.time import ReportingPeriod
+from .emission_report import EmissionReport
+from .util import CalculationEngine, EMISSIONS_UNIT
+
+logger = logging.getLogger(__name__)
+
+# Rows (combinations x chunks) packed into each call of the batch engine
+SWEEP_BLOCK_ROWS = 200_000
+
+
+def _quantity_column(unit: str) -> Callable[[Any], float]:
+    # Quantities are converted to the column unit, plain numbers are taken to already be in it
+    def convert(value: Quantity | float) -> float:
+        return float(value.to(unit).magnitude) if isinstance(value, Quantity) else float(value)
+
+    return convert
+
+
+def _describe_paint(value: SolarAbsorptance) -> str:
+    return f'{value.color.name} ({value.condition.name})'
+
+
+def _describe_quantity(value: Quantity | float) -> str:
+    return f'{value:~}' if isinstance(value, Quantity) else str(value)
+
+
+@dataclass(frozen=True)
+class SweepParameter:
+    column: str  # Column of FixedRoofBatchInputs
+    convert: Callable[[Any], float]
+    describe: Callable[[Any], str]
+
+
+SWEEP_PARAMETERS = {
+    'shell_paint': SweepParameter(
+        'shell_solar_absorptance', lambda value: float(value.coefficient.magnitude), _describe_paint,
+    ),
+    'roof_paint': SweepParameter(
+        'roof_solar_absorptance', lambda value: float(value.coefficient.magnitude), _describe_paint,
+    ),
+    'insulation': SweepParameter(
+        'insulation', lambda value: INSULATION_CODES[InsulationType(value)], lambda value: InsulationType(value).value,
+    ),
+    'vent_breather_setting': SweepParameter('vent_breather_setting', _quantity_column('psi'), _describe_quantity),
+    'vent_vacuum_setting': SweepParameter('vent_vacuum_setting', _quantity_column('psi'), _describe_quantity),
+    'maximum_liquid_height': SweepParameter('maximum_liquid_height', _quantity_column('ft'), _describe_quantity),
+    'minimum_liquid_height': SweepParameter('minimum_liquid_height', _quantity_column('ft'), _describe_quantity),
+}
+
+
+@dataclass
+class SweepCase:
+    overrides: dict[str, str]  # Parameter -> description of the value used
+    standing_losses: Quantity
+    working_losses: Quantity
+
+    @property
+    def total_losses(self) -> Quantity:
+        return self.standing_losses + self.working_losses
+
+
+@dataclass
+class SweepResult:
+    tank_name: str
+    baseline: SweepCase  # The tank as it is
+    cases: list[SweepCase]  # Lowest total losses first
+    skipped: int  # Combinations with a liquid height band that does not fit the tank
+
+    def summary_table(self) -> str:
+        parameters = list(self.baseline.overrides)
+        widths = {
+            parameter: max([len(parameter), *(len(case.overrides[parameter]) for case in [self.baseline, *self.cases])])
+            for parameter in parameters
+        }
+
+        lines = [
+            f'{"Rank":>6} ' + ' '.join(f'{parameter:<{widths[parameter]}}' for parameter in parameters)
+            + f' {"Standing":>14} {"Working":>14} {"Total":>14}'
+        ]
+        for rank, case in [('Base', self.baseline), *enumerate(self.cases, start=1)]:
+            lines.append(
+                f'{rank:>6} ' + ' '.join(f'{case.overrides[parameter]:<{widths[parameter]}}' for parameter in parameters)
+                + f' {case.standing_losses.magnitude:>14.6g} {case.working_losses.magnitude:>14.6g}'
+                + f' {case.total_losses.magnitude:>14.6g}'
+            )
+
+        lines.append(f'({self.tank_name}, {len(self.cases)} combinations, {self.skipped} skipped, {EMISSIONS_UNIT})')
+        return '\n'.join(lines)
+
+
+class TankDesignSweep:
+    """
+    Losses of a fixed roof tank for every combination of a grid of parameter overrides (see SWEEP_PARAMETERS).
+    Every combination runs through the batch engine against the tank's own service records and site, so an
+    annual reporting period gives annual losses.
+    """
+    def __init__(
+            self,
+            tank: FixedRoofTank,
+            reporting_period: ReportingPeriod,
+            grid: dict[str, list],
+    ) -> None:
+        unknown_parameters = set(grid) - set(SWEEP_PARAMETERS)
+        if unknown_parameters:
+            raise ValueError(f'Unknown sweep parameters: {", ".join(sorted(unknown_parameters))}')
+        if not all(grid.values()):
+            raise ValueError('Every sweep parameter needs at least one value')
+
+        self.tank_id = tank.id
+        self.tank_name = tank.name
+        self.facility_id = tank.facility_id
+        self.tank_type = TankType.VERTICAL_FIXED_ROOF if tank.is_vertical else TankType.HORIZONTAL_FIXED_ROOF
+        self.reporting_period = reporting_period
+
+        # Convert and describe the values now, while any ORM objects in the grid are still attached to their session
+        self.parameters = list(grid)
+        self.columns = {
+            parameter: np.array([SWEEP_PARAMETERS[parameter].convert(value) for value in values], dtype=float)
+            for parameter, values in grid.items()
+        }
+        self.descriptions = {
+            parameter: [SWEEP_PARAMETERS[parameter].describe(value) for value in values]
+            for parameter, values in grid.items()
+        }
+
+    def load_inputs(self) -> FixedRoofBatchInputs:
+        report = EmissionReport(
+            self.facility_id,
+            [(self.tank_type, self.tank_id)],
+            self.reporting_period,
+            engine=CalculationEngine.BATCH,
+        )
+        try:
+            planned = [planned for tank_chunks in report.plan_fixed_roof_chunks() for planned in tank_chunks]
+            if not planned:
+                raise MissingData(f'{self.tank_name}: No service records in the reporting period')
+            return FixedRoofBatchInputs.from_chunks([(item.shim, item.chunk) for item in planned])
+        finally:
+            report.session.close()
+
+    @staticmethod
+    def calculate_losses(inputs: FixedRoofBatchInputs, count: int, overrides: dict[str, np.ndarray]):
+        # Standing and working losses summed over the chunks of count copies of the inputs with the overrides applied
+        rows = inputs.size
+        tiled = inputs.tile(count)
+        columns = {
+            column: np.repeat(values, rows).astype(getattr(inputs, column).dtype) for column, values in overrides.items()
+        }
+
+        # Turnovers follow the liquid height band they are counted over
+        if 'maximum_liquid_height' in columns or 'minimum_liquid_height' in columns:
+            tiled = tiled.with_liquid_heights(
+                columns.pop('maximum_liquid_height', tiled.maximum_liquid_height),
+                columns.pop('minimum_liquid_height', tiled.minimum_liquid_height),
+            )
+
+        tiled = dataclasses.replace(tiled, **columns)
+        standing_losses, working_losses = FixedRoofBatchEmissions(tiled).calculate_losses()
+        return standing_losses.reshape(count, rows).sum(axis=1), working_losses.reshape(count, rows).sum(axis=1)
+
+    def override_columns(self, combinations: np.ndarray) -> dict[str, np.ndarray]:
+        # Input columns for rows of value indexes (combinations x parameters)
+        return {
+            SWEEP_PARAMETERS[parameter].column: self.columns[parameter][combinations[:, index]]
+            for index, parameter in enumerate(self.parameters)
+        }
+
+    @staticmethod
+    def fits_tank(inputs: FixedRoofBatchInputs, values: dict[str, np.ndarray], count: int) -> np.ndarray:
+        # Operating bands that are upside down (no turnover factor) or above the shell (no vapor space) are skipped
+        # (Only bands moved by the grid are checked, the tank as built always fits)
+        fits = np.ones(count, dtype=bool)
+        if 'maximum_liquid_height' not in values and 'minimum_liquid_height' not in values:
+            return fits
+
+        maximum = values.get('maximum_liquid_height', np.full(count, inputs.maximum_liquid_height[0]))
+        minimum = values.get('minimum_liquid_height', np.full(count, inputs.minimum_liquid_height[0]))
+        fits &= minimum < maximum
+
+        # Horizontal tanks keep vertical style liquid heights that the vapor space does not depend on
+        if inputs.is_vertical[0]:
+            fits &= maximum <= inputs.shell_height[0]
+
+        return fits
+
+    def evaluate(self, inputs: FixedRoofBatchInputs, combinations: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Standing and working losses of every combination, in blocks that keep the batch engine's arrays bounded
+        values = self.override_columns(combinations)
+        standing_losses, working_losses = [np.empty(0)], [np.empty(0)]
+        block_size = max(1, SWEEP_BLOCK_ROWS // inputs.size)
+        for start in range(0, len(combinations), block_size):
+            block = {column: column_values[start:start + block_size] for column, column_values in values.items()}
+            standing, working = self.calculate_losses(inputs, len(combinations[start:start + block_size]), block)
+            standing_losses.append(standing)
+            working_losses.append(working)
+
+        return np.concatenate(standing_losses), np.concatenate(working_losses)
+
+    def build_case(self, combination: np.ndarray, standing_losses: float, working_losses: float) -> SweepCase:
+        return SweepCase(
+            overrides={
+                parameter: self.descriptions[parameter][combination[index]]
+                for index, parameter in enumerate(self.parameters)
+            },
+            standing_losses=to_decimal(standing_losses) * EMISSIONS_UNIT,
+            working_losses=to_decimal(working_losses) * EMISSIONS_UNIT,
+        )
+
+    def build_baseline(self, inputs: FixedRoofBatchInputs) -> SweepCase:
+        standing_losses, working_losses = self.calculate_losses(inputs, 1, {})
+        return SweepCase(
+            overrides={parameter: 'As built' for parameter in self.parameters},
+            standing_losses=to_decimal(standing_losses[0]) * EMISSIONS_UNIT,
+            working_losses=to_decimal(working_losses[0]) * EMISSIONS_UNIT,
+        )
+
+    def run(self) -> SweepResult:
+        inputs = self.load_inputs()
+
+        # Value index of every parameter for every combination (combinations x parameters)
+        combinations = np.array(
+            list(itertools.product(*(range(len(self.columns[parameter])) for parameter in self.parameters))),
+            dtype=int,
+        ).reshape(-1, len(self.parameters))
+
+        valid = self.fits_tank(inputs, self.override_columns(combinations), len(combinations))
+        combinations = combinations[valid]
+        standing_losses, working_losses = self.evaluate(inputs, combinations)
+        logger.info(
+            '%s: Swept %s combinations of %s chunks (%s skipped)',
+            self.tank_name,
+            len(combinations),
+            inputs.size,
+            int((~valid).sum()),
+        )
+
+        # Stable so ties keep the order of the grid
+        order = np.argsort(standing_losses + working_losses, kind='stable')
+        return SweepResult(
+            tank_name=self.tank_name,
+            baseline=self.build_baseline(inputs),
+            cases=[self.build_case(combinations[row], standing_losses[row], working_losses[row]) for row in order],
+            skipped=int((~valid).sum()),
+        )
@@ -0,0 +1,111 @@
+import csv
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.reports.calculations.fixed_roof_tank import FixedRoofEmissions
+    from src.reports.calculations.fixed_roof_tank_batch import FixedRoofBatchEmissions
+    from src.reports.components.tanks.fixed_roof import FixedRoofTankShim
+    from src.reports.components.time import ReportingChunk
+
+# Intermediate values shared by FixedRoofEmissions and FixedRoofBatchEmissions, in calculation order
+TRACE_FIELDS = (
+    'vapor_space_outage',  # ft (H_VO)
+    'vapor_space_volume',  # ft^3 (V_V)
+    'average_ambient_temperature',  # degR (T_AA)
+    'liquid_bulk_temperature',  # degR (T_B)
+    'average_daily_liquid_surface_temperature',  # degR (T_LA)
+    'mixture_vapor_pressure',  # psia (P_VA)
+    'mixture_molecular_weight',  # lb/lb-mole (M_V)
+    'average_vapor_temperature',  # degR (T_V)
+    'stock_vapor_density',  # lb/ft^3 (W_V)
+    'average_ambient_temperature_range',  # degR (∆T_A)
+    'average_daily_vapor_temperature_range',  # degR (∆T_V)
+    'average_daily_vapor_pressure_range',  # psi (∆P_V)
+    'average_breather_pressure_range',  # psi (∆P_B)
+    'vapor_space_expansion_factor',  # K_E
+    'vented_vapor_saturation_factor',  # K_S
+    'sum_of_increases_in_liquid_level',  # ft (sum(H_QI))
+    'net_working_loss_throughput',  # ft^3 (V_Q)
+    'working_loss_turnover_factor',  # K_N
+    'working_loss_product_factor',  # K_P
+    'vent_setting_correction_factor',  # K_B
+    'standing_losses',  # lb/yr (L_S)
+    'working_losses',  # lb/yr (L_W)
+)
+
+
+class CalculationTrace:
+    """
+    Columnar record of the intermediate values of every fixed roof chunk calculated while it is attached to a report.
+    Calculations only check whether a trace is attached, so a report without one pays nothing.
+    """
+    def __init__(self) -> None:
+        # Chunk identity
+        self.tank_ids = array('q')
+        self.tank_names: list[str] = []
+        self.start_dates: list[date] = []
+        self.end_dates: list[date] = []
+        self.mixture_names: list[str] = []
+
+        # One float column per intermediate (Decimals have 12 significant digits so floats hold them exactly enough)
+        self.columns = {field: array('d') for field in TRACE_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.tank_ids)
+
+    def _record_identity(self, tank: 'FixedRoofTankShim', chunk: 'ReportingChunk') -> None:
+        self.tank_ids.append(tank.id)
+        self.tank_names.append(tank.name)
+        self.start_dates.append(chunk.start_date)
+        self.end_dates.append(chunk.end_date)
+        self.mixture_names.append(chunk.mixture.name)
+
+    def record(self, emissions: 'FixedRoofEmissions') -> None:
+        self._record_identity(emissions.tank, emissions.reporting_chunk)
+        for field, column in self.columns.items():
+            column.append(float(getattr(emissions, field)))
+
+    def record_batch(
+            self,
+            batch: 'FixedRoofBatchEmissions',
+            work: list[tuple['FixedRoofTankShim', 'ReportingChunk']],
+    ) -> None:
+        for tank, chunk in work:
+            self._record_identity(tank, chunk)
+
+        for field, column in self.columns.items():
+            values = np.broadcast_to(np.asarray(getattr(batch, field), dtype=np.float64), (len(work),))
+            column.frombytes(np.ascontiguousarray(values).tobytes())
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        arrays = {
+            'tank_id': np.frombuffer(self.tank_ids, dtype=np.int64),
+            'tank_name': np.array(self.tank_names, dtype=object),
+            'start_date': np.array(self.start_dates, dtype='datetime64[D]'),
+            'end_date': np.array(self.end_dates, dtype='datetime64[D]'),
+            'mixture_name': np.array(self.mixture_names, dtype=object),
+        }
+        for field, column in self.columns.items():
+            arrays[field] = np.frombuffer(column, dtype=np.float64)
+
+        return arrays
+
+    def write_csv(self, path: Path) -> None:
+        # One row per chunk with every intermediate, for anyone who needs to check the working
+        with path.open('w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['tank_id', 'tank_name', 'start_date', 'end_date', 'mixture_name', *TRACE_FIELDS])
+
+            for row in range(len(self)):
+                writer.writerow([
+                    self.tank_ids[row],
+                    self.tank_names[row],
+                    self.start_dates[row].isoformat(),
+                    self.end_dates[row].isoformat(),
+                    self.mixture_names[row],
+                    *(f'{column[row]:.12g}' for column in self.columns.values()),
+                ])
@@ -0,0 +1,325 @@
+import dataclasses
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from enum import Enum, auto
+from pint import Quantity
+import numpy as np
+
+from src.util.enums import TankType
+from src.util.errors import MissingData
+from src.util.quantities import to_decimal
+
+from .calculations.fixed_roof_tank_batch import FixedRoofBatchEmissions, FixedRoofBatchInputs
+from .components.time import ReportingPeriod
+from .emission_report import EmissionReport
+from .util import CalculationEngine, EMISSIONS_UNIT
+
+logger = logging.getLogger(__name__)
+
+# Samples evaluated per batch (and per seed), fixed so results do not depend on the number of workers
+SAMPLE_BLOCK_SIZE = 200
+
+DEFAULT_PERCENTILES = (5.0, 50.0, 95.0)
+
+
+class InputScope(Enum):
+    TANK = auto()  # One draw per tank, shared by all of its chunks
+    CHUNK = auto()  # One draw per chunk
+    PERIOD = auto()  # One draw per date range, shared by every tank at the site
+
+
+@dataclass(frozen=True)
+class UncertainInput:
+    scope: InputScope
+    minimum: float | None = None
+    maximum: float | None = None
+
+
+# Inputs of FixedRoofBatchInputs that can be given a distribution (in the units of FixedRoofBatchInputs)
+UNCERTAIN_INPUTS = {
+    # Tank
+    'shell_height': UncertainInput(InputScope.TANK, minimum=0.0),
+    'shell_diameter': UncertainInput(InputScope.TANK, minimum=0.0),
+    'roof_height': UncertainInput(InputScope.TANK, minimum=0.0),
+    'roof_radius': UncertainInput(InputScope.TANK, minimum=0.0),
+    'maximum_liquid_height': UncertainInput(InputScope.TANK, minimum=0.0),
+    'minimum_liquid_height': UncertainInput(InputScope.TANK, minimum=0.0),
+    'vent_breather_setting': UncertainInput(InputScope.TANK),
+    'vent_vacuum_setting': UncertainInput(InputScope.TANK),
+    'shell_solar_absorptance': UncertainInput(InputScope.TANK, minimum=0.0, maximum=1.0),
+    'roof_solar_absorptance': UncertainInput(InputScope.TANK, minimum=0.0, maximum=1.0),
+
+    # Reporting chunk
+    'throughput': UncertainInput(InputScope.CHUNK, minimum=0.0),
+
+    # Meteorological chunk
+    'average_temp_min': UncertainInput(InputScope.PERIOD, minimum=0.0),
+    'average_temp_max': UncertainInput(InputScope.PERIOD, minimum=0.0),
+    'average_daily_insolation': UncertainInput(InputScope.PERIOD, minimum=0.0),
+    'atmospheric_pressure': UncertainInput(InputScope.PERIOD, minimum=0.0),
+}
+
+# Inputs drawn independently that bound a range, (lower, upper)
+ORDERED_INPUTS = [
+    ('average_temp_min', 'average_temp_max'),
+    ('minimum_liquid_height', 'maximum_liquid_height'),
+]
+
+
+class Distribution:
+    """
+    Perturbation of an input, either a fraction of the nominal value (relative) or an offset in its units.
+    """
+    relative: bool
+
+    def draw(self, rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+        raise NotImplementedError()
+
+    def apply(self, nominal: np.ndarray, draws: np.ndarray) -> np.ndarray:
+        return nominal * (1 + draws) if self.relative else nominal + draws
+
+
+@dataclass(frozen=True)
+class Normal(Distribution):
+    std: float
+    relative: bool = True
+
+    def draw(self, rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+        return rng.normal(0.0, self.std, shape)
+
+
+@dataclass(frozen=True)
+class Uniform(Distribution):
+    low: float
+    high: float
+    relative: bool = True
+
+    def draw(self, rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+        return rng.uniform(self.low, self.high, shape)
+
+
+@dataclass(frozen=True)
+class Triangular(Distribution):
+    low: float
+    mode: float
+    high: float
+    relative: bool = True
+
+    def draw(self, rng: np.random.Generator, shape: tuple[int, ...]) -> np.ndarray:
+        return rng.triangular(self.low, self.mode, self.high, shape)
+
+
+@dataclass(frozen=True)
+class UncertaintyModel:
+    """
+    Everything a worker needs to evaluate samples: the nominal inputs of every chunk and how to perturb them.
+    Rows are grouped by tank, in the order of the report.
+    """
+    inputs: FixedRoofBatchInputs
+    distributions: dict[str, Distribution]
+    group_index: dict[InputScope, np.ndarray]  # Row -> draw group for each scope
+    group_count: dict[InputScope, int]
+    tank_starts: np.ndarray  # First row of each tank
+
+    def evaluate(self, sample_count: int, seed: np.random.SeedSequence) -> np.ndarray:
+        # Total emissions of every tank (samples x tanks) for sample_count draws of the inputs
+        rng = np.random.default_rng(seed)
+        rows = self.inputs.size
+
+        perturbed = {}
+        for name, distribution in self.distributions.items():
+            scope = UNCERTAIN_INPUTS[name].scope
+            draws = distribution.draw(rng, (sample_count, self.group_count[scope]))[:, self.group_index[scope]]
+
+            values = distribution.apply(getattr(self.inputs, name)[np.newaxis, :], draws)
+            bounds = UNCERTAIN_INPUTS[name]
+            if bounds.minimum is not None or bounds.maximum is not None:
+                values = np.clip(values, bounds.minimum, bounds.maximum)
+            perturbed[name] = values.reshape(sample_count * rows)
+
+        # A sample that crosses the bounds of a range over is taken with the bounds swapped back in order
+        for lower, upper in ORDERED_INPUTS:
+            if lower in perturbed or upper in perturbed:
+                lower_values = perturbed.get(lower, np.tile(getattr(self.inputs, lower), sample_count))
+                upper_values = perturbed.get(upper, np.tile(getattr(self.inputs, upper), sample_count))
+                perturbed[lower] = np.minimum(lower_values, upper_values)
+                perturbed[upper] = np.maximum(lower_values, upper_values)
+
+        # Turnovers follow the liquid height band they are counted over
+        tiled = self.inputs.tile(sample_count)
+        if 'maximum_liquid_height' in perturbed:
+            tiled = tiled.with_liquid_heights(
+                perturbed.pop('maximum_liquid_height'),
+                perturbed.pop('minimum_liquid_height'),
+            )
+
+        batch = FixedRoofBatchEmissions(dataclasses.replace(tiled, **perturbed))
+        standing_losses, working_losses = batch.calculate_losses()
+
+        chunk_totals = (standing_losses + working_losses).reshape(sample_count, rows)
+        return np.add.reduceat(chunk_totals, self.tank_starts, axis=1)
+
+
+@dataclass
+class UncertaintyResult:
+    tank_ids: list[int]
+    tank_names: list[str]
+    nominal: np.ndarray  # Emissions of every tank with the nominal inputs
+    samples: np.ndarray  # samples x tanks
+    percentiles: tuple[float, ...]
+    seed: int
+
+    def tank_percentiles(self) -> dict[tuple[int, str], dict[float, Quantity]]:
+        values = np.percentile(self.samples, self.percentiles, axis=0)
+        return {
+            (tank_id, tank_name): {
+                percentile: to_decimal(values[index, column]) * EMISSIONS_UNIT
+                for index, percentile in enumerate(self.percentiles)
+            }
+            for column, (tank_id, tank_name) in enumerate(zip(self.tank_ids, self.tank_names))
+        }
+
+    def facility_percentiles(self) -> dict[float, Quantity]:
+        # Percentiles of the facility total, not the sum of the tank percentiles
+        values = np.percentile(self.samples.sum(axis=1), self.percentiles)
+        return {percentile: to_decimal(value) * EMISSIONS_UNIT for percentile, value in zip(self.percentiles, values)}
+
+    def summary_table(self) -> str:
+        width = max([len('Facility'), *(len(name) for name in self.tank_names)])
+        headers = ''.join(f' {f"p{percentile:g}":>14}' for percentile in self.percentiles)
+        lines = [f'{"Tank":<{width}} {"Nominal":>14}{headers}']
+
+        rows = [
+            (name, self.nominal[column], np.percentile(self.samples[:, column], self.percentiles))
+            for column, name in enumerate(self.tank_names)
+        ]
+        rows.append(('Facility', self.nominal.sum(), np.percentile(self.samples.sum(axis=1), self.percentiles)))
+        for name, nominal, values in rows:
+            lines.append(f'{name:<{width}} {nominal:>14.6g}' + ''.join(f' {value:>14.6g}' for value in values))
+
+        lines.append(f'({len(self.samples)} samples, seed {self.seed}, {EMISSIONS_UNIT})')
+        return '\n'.join(lines)
+
+
+class UncertaintyAnalysis:
+    """
+    Monte Carlo analysis of the fixed roof tanks of a facility: the batch engine evaluates blocks of samples
+    drawn from distributions on its inputs, in parallel over every core by default.
+    """
+    def __init__(
+            self,
+            facility_id: int,
+            tanks: list[tuple[TankType, int]],
+            reporting_period: ReportingPeriod,
+            distributions: dict[str, Distribution],
+            samples: int = 1_000,
+            seed: int = 0,
+            workers: int | None = None,
+            percentiles: tuple[float, ...] = DEFAULT_PERCENTILES,
+    ) -> None:
+        unknown_inputs = set(distributions) - set(UNCERTAIN_INPUTS)
+        if unknown_inputs:
+            raise ValueError(f'No distributions allowed for: {", ".join(sorted(unknown_inputs))}')
+
+        self.facility_id = facility_id
+        self.tanks = tanks
+        self.reporting_period = reporting_period
+        self.distributions = distributions
+        self.samples = samples
+        self.seed = seed
+        self.workers = workers
+        self.percentiles = percentiles
+
+    def build_model(self) -> tuple[UncertaintyModel, list[int], list[str]]:
+        report = EmissionReport(self.facility_id, self.tanks, self.reporting_period, engine=CalculationEngine.BATCH)
+        try:
+            if report.internal_floating_roof_tanks or report.external_floating_roof_tanks:
+                logger.warning('%s: Floating roof tanks are not part of the analysis', report.facility.name)
+
+            planned = [planned for tank_chunks in report.plan_fixed_roof_chunks() for planned in tank_chunks]
+            if not planned:
+                raise MissingData(f'{report.facility.name}: No fixed roof chunks to analyze')
+
+            inputs = FixedRoofBatchInputs.from_chunks([(item.shim, item.chunk) for item in planned])
+        finally:
+            report.session.close()
+
+        # Chunks arrive tank by tank so each tank is a run of rows
+        tank_ids, tank_names, tank_starts = [], [], []
+        for row, item in enumerate(planned):
+            if item.chunk_number == 1:
+                tank_ids.append(item.tank.id)
+                tank_names.append(item.tank.name)
+                tank_starts.append(row)
+
+        _, period_index = np.unique(
+            [(item.chunk.start_date.toordinal(), item.chunk.end_date.toordinal()) for item in planned],
+            axis=0,
+            return_inverse=True,
+        )
+        tank_index = np.repeat(np.arange(len(tank_starts)), np.diff([*tank_starts, len(planned)]))
+        group_index = {
+            InputScope.TANK: tank_index,
+            InputScope.CHUNK: np.arange(len(planned)),
+            InputScope.PERIOD: period_index.reshape(-1),
+        }
+
+        model = UncertaintyModel(
+            inputs=inputs,
+            distributions=self.distributions,
+            group_index=group_index,
+            group_count={scope: int(index.max()) + 1 for scope, index in group_index.items()},
+            tank_starts=np.array(tank_starts),
+        )
+        return model, tank_ids, tank_names
+
+    def run(self) -> UncertaintyResult:
+        model, tank_ids, tank_names = self.build_model()
+
+        # Each block has its own seed so a seed gives the same samples with any number of workers
+        block_sizes = [
+            min(SAMPLE_BLOCK_SIZE, self.samples - start) for start in range(0, self.samples, SAMPLE_BLOCK_SIZE)
+        ]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(block_sizes))
+
+        if self.workers == 1:
+            blocks = [model.evaluate(size, seed) for size, seed in zip(block_sizes, seeds)]
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_initialize_worker,
+                    initargs=(model,),
+            ) as executor:
+                blocks = list(executor.map(_evaluate_block, block_sizes, seeds))
+
+        nominal_standing, nominal_working = FixedRoofBatchEmissions(model.inputs).calculate_losses()
+        logger.info(
+            'Evaluated %s samples of %s chunks with %s workers',
+            self.samples,
+            model.inputs.size,
+            self.workers or os.cpu_count(),
+        )
+
+        return UncertaintyResult(
+            tank_ids=tank_ids,
+            tank_names=tank_names,
+            nominal=np.add.reduceat(nominal_standing + nominal_working, model.tank_starts),
+            samples=np.concatenate(blocks) if blocks else np.empty((0, len(tank_ids))),
+            percentiles=self.percentiles,
+            seed=self.seed,
+        )
+
+
+# The model is sent to each worker once rather than with every block
+_worker_model: UncertaintyModel | None = None
+
+
+def _initialize_worker(model: UncertaintyModel) -> None:
+    global _worker_model
+    _worker_model = model
+
+
+def _evaluate_block(sample_count: int, seed: np.random.SeedSequence) -> np.ndarray:
+    return _worker_model.evaluate(sample_count, seed)
@@ -0,0 +1,6 @@
+from .test_aggregation import *
+from .test_design_sweep import *
+from .test_engines import *
+from .test_chunk_planner import *
+from .test_floating_roof import *
+from .test_util import *
@@ -0,0 +1,94 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from src.reports.aggregation import EmissionTable, GroupBy, LossType
+from src.reports.util import TankEmission, MixtureEmission, MaterialEmission
+from src.util.enums import TankType, MaterialType
+
+__all__ = ['TestEmissionTable']
+
+
+def material(material_type: MaterialType, material_id: int, name: str, magnitude: str) -> MaterialEmission:
+    return MaterialEmission(material_type, material_id, name, Decimal(magnitude))
+
+
+def tank_emission(
+        tank_type: TankType,
+        tank_id: int,
+        start_date: date | None,
+        standing: list[MaterialEmission],
+        working: list[MaterialEmission],
+) -> TankEmission:
+    return TankEmission(
+        tank_id=tank_id,
+        tank_name=f'{tank_type.name} #{tank_id}',
+        standing_losses=MixtureEmission(mixture_id=1, mixture_name='Blend', material_emissions=standing),
+        working_losses=MixtureEmission(mixture_id=1, mixture_name='Blend', material_emissions=working),
+        start_date=start_date,
+        end_date=start_date,
+        tank_type=tank_type,
+    )
+
+
+class TestEmissionTable(unittest.TestCase):
+    def setUp(self) -> None:
+        # Petrochemical 1 and petroleum liquid 1 share an id, as do the vertical fixed and internal floating roof tank 1
+        self.table = EmissionTable()
+        self.table.append(tank_emission(
+            TankType.VERTICAL_FIXED_ROOF, 1, date(2024, 1, 1),
+            standing=[material(MaterialType.PETROCHEMICAL, 1, 'Benzene', '1.5'),
+                      material(MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)', '2.25')],
+            working=[material(MaterialType.PETROCHEMICAL, 1, 'Benzene', '0.5'),
+                     material(MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)', '0.75')],
+        ))
+        self.table.append(tank_emission(
+            TankType.VERTICAL_FIXED_ROOF, 1, date(2024, 2, 1),
+            standing=[material(MaterialType.PETROCHEMICAL, 1, 'Benzene', '1')],
+            working=[material(MaterialType.PETROCHEMICAL, 1, 'Benzene', '2')],
+        ))
+        self.table.append(tank_emission(
+            TankType.INTERNAL_FLOATING_ROOF, 1, None,
+            standing=[material(MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)', '4')],
+            working=[material(MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)', '0.125')],
+        ))
+
+    def totals(self, group_by: list[GroupBy]) -> dict[tuple, Decimal]:
+        return {key: emissions.magnitude for key, emissions in self.table.rollup(group_by).items()}
+
+    def test_total(self) -> None:
+        self.assertEqual(len(self.table), 8)
+        self.assertEqual(self.totals([]), {(): Decimal('12.125')})
+
+    def test_materials_are_keyed_by_type(self) -> None:
+        self.assertEqual(self.totals([GroupBy.MATERIAL]), {
+            ((MaterialType.PETROCHEMICAL, 1, 'Benzene'),): Decimal('5'),
+            ((MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)'),): Decimal('7.125'),
+        })
+
+    def test_tanks_are_keyed_by_type(self) -> None:
+        self.assertEqual(self.totals([GroupBy.TANK]), {
+            ((TankType.VERTICAL_FIXED_ROOF, 1, 'VERTICAL_FIXED_ROOF #1'),): Decimal('8'),
+            ((TankType.INTERNAL_FLOATING_ROOF, 1, 'INTERNAL_FLOATING_ROOF #1'),): Decimal('4.125'),
+        })
+
+    def test_months_without_a_start_date(self) -> None:
+        self.assertEqual(self.totals([GroupBy.MONTH]), {
+            (date(2024, 1, 1),): Decimal('5'),
+            (date(2024, 2, 1),): Decimal('3'),
+            (None,): Decimal('4.125'),
+        })
+
+    def test_combined_columns_keep_first_appearance_order(self) -> None:
+        totals = self.totals([GroupBy.LOSS_TYPE, GroupBy.MATERIAL])
+        self.assertEqual(list(totals), [
+            (LossType.STANDING, (MaterialType.PETROCHEMICAL, 1, 'Benzene')),
+            (LossType.STANDING, (MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)')),
+            (LossType.WORKING, (MaterialType.PETROCHEMICAL, 1, 'Benzene')),
+            (LossType.WORKING, (MaterialType.PETROLEUM_LIQUID, 1, 'Crude oil (RVP 5)')),
+        ])
+        self.assertEqual(totals[(LossType.WORKING, (MaterialType.PETROCHEMICAL, 1, 'Benzene'))], Decimal('2.5'))
+
+
+if __name__ == '__main__':
+    unittest.main()
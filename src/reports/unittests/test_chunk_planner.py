@@ -0,0 +1,120 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from src import unit_registry
+from src.database.definitions.mixture import Mixture
+from src.database.definitions.service_record import FrtServiceRecord
+from src.reports.components.chunk_planner import ChunkPlanner, split_by_month
+
+__all__ = ['TestSplitByMonth', 'TestChunkPlanner']
+
+
+def mixture(mixture_id: int) -> Mixture:
+    mixture = Mixture(name=f'Mixture #{mixture_id}', makeup_type_id=1)
+    mixture.id = mixture_id
+    return mixture
+
+
+def service_record(start_date: date, end_date: date, mixture: Mixture, throughput: str) -> FrtServiceRecord:
+    record = FrtServiceRecord(
+        start_date=start_date,
+        end_date=end_date,
+        throughput=unit_registry.Quantity(Decimal(throughput), 'gal'),
+    )
+    record.mixture = mixture
+    return record
+
+
+class TestSplitByMonth(unittest.TestCase):
+    def test_within_one_month(self) -> None:
+        self.assertEqual(
+            split_by_month(date(2024, 3, 5), date(2024, 3, 20)),
+            [(date(2024, 3, 5), date(2024, 3, 20))],
+        )
+
+    def test_across_months_and_years(self) -> None:
+        self.assertEqual(
+            split_by_month(date(2023, 12, 15), date(2024, 2, 10)),
+            [
+                (date(2023, 12, 15), date(2023, 12, 31)),
+                (date(2024, 1, 1), date(2024, 1, 31)),
+                (date(2024, 2, 1), date(2024, 2, 10)),
+            ],
+        )
+
+    def test_empty_range(self) -> None:
+        self.assertEqual(split_by_month(date(2024, 3, 2), date(2024, 3, 1)), [])
+
+
+class TestChunkPlanner(unittest.TestCase):
+    def setUp(self) -> None:
+        self.planner = ChunkPlanner(date(2024, 1, 1), date(2024, 12, 31))
+        self.gasoline = mixture(1)
+        self.diesel = mixture(2)
+
+    def test_records_are_split_by_month(self) -> None:
+        # 60 days at 10 gal/day
+        chunks = self.planner.plan([service_record(date(2024, 1, 17), date(2024, 3, 16), self.gasoline, '600')])
+
+        self.assertEqual(
+            [(chunk.start_date, chunk.end_date) for chunk in chunks],
+            [
+                (date(2024, 1, 17), date(2024, 1, 31)),
+                (date(2024, 2, 1), date(2024, 2, 29)),
+                (date(2024, 3, 1), date(2024, 3, 16)),
+            ],
+        )
+        self.assertEqual([chunk.throughput.magnitude for chunk in chunks], [150, 290, 160])
+
+    def test_records_are_clipped_to_the_report(self) -> None:
+        # 62 days at 10 gal/day, 31 of them in the reporting period
+        chunks = self.planner.plan([service_record(date(2023, 12, 1), date(2024, 1, 31), self.gasoline, '620')])
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0].start_date, chunks[0].end_date), (date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(chunks[0].throughput.magnitude, 310)
+
+    def test_neighbouring_records_at_the_same_rate_are_merged(self) -> None:
+        chunks = self.planner.plan([
+            service_record(date(2024, 1, 11), date(2024, 1, 31), self.gasoline, '210'),
+            service_record(date(2024, 1, 1), date(2024, 1, 10), self.gasoline, '100'),
+        ])
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual((chunks[0].start_date, chunks[0].end_date), (date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertEqual(chunks[0].throughput.magnitude, 310)
+
+    def test_records_at_different_rates_are_not_merged(self) -> None:
+        chunks = self.planner.plan([
+            service_record(date(2024, 1, 1), date(2024, 1, 10), self.gasoline, '100'),
+            service_record(date(2024, 1, 11), date(2024, 1, 31), self.gasoline, '420'),
+        ])
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([chunk.throughput.magnitude for chunk in chunks], [100, 420])
+
+    def test_records_of_different_mixtures_are_not_merged(self) -> None:
+        chunks = self.planner.plan([
+            service_record(date(2024, 1, 1), date(2024, 1, 10), self.gasoline, '100'),
+            service_record(date(2024, 1, 11), date(2024, 1, 31), self.diesel, '210'),
+        ])
+
+        self.assertEqual([chunk.mixture.id for chunk in chunks], [1, 2])
+
+    def test_records_with_a_gap_are_not_merged(self) -> None:
+        chunks = self.planner.plan([
+            service_record(date(2024, 1, 1), date(2024, 1, 10), self.gasoline, '100'),
+            service_record(date(2024, 1, 12), date(2024, 1, 31), self.gasoline, '200'),
+        ])
+
+        self.assertEqual(len(chunks), 2)
+
+    def test_records_outside_the_report_are_skipped(self) -> None:
+        chunks = self.planner.plan([service_record(date(2023, 1, 1), date(2023, 12, 31), self.gasoline, '365')])
+
+        self.assertEqual(chunks, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from sqlalchemy.orm import Session
+
+from src import unit_registry
+from src.database import DB_ENGINE
+from src.database.definitions.fixed_roof_tank import FixedRoofTank
+from src.reports.components.time import ReportingPeriod, ReportingTimeFrame
+from src.reports.optimizer import optimize_facility
+from src.reports.sweep import TankDesignSweep
+
+__all__ = ['TestHorizontalTankDesignSweep']
+
+# Sample Calculation #1 and #2 (HFRT #1 is a 6 ft horizontal tank)
+FACILITY_ID = 1
+HORIZONTAL_TANK_ID = 2
+
+REPORTING_PERIOD = ReportingPeriod(ReportingTimeFrame.ANNUAL, year=2024)
+
+
+def vent_grid(_tank: FixedRoofTank) -> dict[str, list]:
+    return {'vent_breather_setting': [0.03 * unit_registry.psi, 0.5 * unit_registry.psi]}
+
+
+def vent_cost(design: dict) -> float:
+    return float(design['vent_breather_setting'].magnitude)
+
+
+class TestHorizontalTankDesignSweep(unittest.TestCase):
+    def setUp(self) -> None:
+        with Session(DB_ENGINE) as session:
+            self.tank = session.get(FixedRoofTank, HORIZONTAL_TANK_ID)
+            self.assertIsNotNone(self.tank)
+            self.assertFalse(self.tank.is_vertical)
+            self.sweep = TankDesignSweep(self.tank, REPORTING_PERIOD, vent_grid(self.tank))
+
+    def test_sweep_without_height_parameters(self) -> None:
+        # The liquid height band is not part of the grid, so nothing is skipped
+        result = self.sweep.run()
+
+        self.assertEqual(len(result.cases), 2)
+        self.assertEqual(result.skipped, 0)
+
+        # A tighter vent setting never lowers the breathing losses
+        totals = {case.overrides['vent_breather_setting']: case.total_losses.magnitude for case in result.cases}
+        self.assertEqual(len(totals), 2)
+        self.assertLessEqual(min(totals.values()), result.baseline.total_losses.magnitude)
+
+    def test_invalid_grids(self) -> None:
+        with self.assertRaises(ValueError):
+            TankDesignSweep(self.tank, REPORTING_PERIOD, {'shell_color': [None]})
+        with self.assertRaises(ValueError):
+            TankDesignSweep(self.tank, REPORTING_PERIOD, {'vent_breather_setting': []})
+
+    def test_optimize_facility_finds_a_design_for_every_tank(self) -> None:
+        results = optimize_facility(FACILITY_ID, REPORTING_PERIOD, vent_grid, vent_cost, 1000)
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsNotNone(result.best, result.tank_name)
+            self.assertTrue(result.feasible, result.tank_name)
+
+    def test_optimize_unknown_facility(self) -> None:
+        with self.assertRaises(ValueError):
+            optimize_facility(-1, REPORTING_PERIOD, vent_grid, vent_cost, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
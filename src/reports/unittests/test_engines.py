@@ -0,0 +1,70 @@
+import unittest
+from decimal import Decimal
+
+from src.reports.components.time import ReportingPeriod, ReportingTimeFrame
+from src.reports.emission_report import EmissionReport
+from src.reports.outputs.sink import OutputSink
+from src.reports.util import CalculationEngine, TankEmission
+from src.util.enums import TankType
+
+__all__ = ['TestCalculationEngines']
+
+# Sample Calculation #1 and #2 (VFRT #1 and HFRT #1)
+FACILITY_ID = 1
+TANKS = [(TankType.VERTICAL_FIXED_ROOF, 1), (TankType.HORIZONTAL_FIXED_ROOF, 2)]
+
+REPORTING_PERIOD = ReportingPeriod(ReportingTimeFrame.ANNUAL, year=2024)
+
+# The batch engine runs the same equations in float64
+BATCH_TOLERANCE = Decimal('1e-9')
+
+
+class CollectingSink(OutputSink):
+    def __init__(self) -> None:
+        self.emissions: list[TankEmission] = []
+
+    def write(self, emission: TankEmission) -> None:
+        self.emissions.append(emission)
+
+
+def calculate_losses(engine: CalculationEngine, workers: int) -> dict[tuple, tuple[Decimal, Decimal]]:
+    # Standing and working losses (lb) of every chunk by tank and start date
+    report = EmissionReport(FACILITY_ID, TANKS, REPORTING_PERIOD, engine=engine, workers=workers)
+    sink = CollectingSink()
+    report.calculate(None, sinks=[sink])
+
+    losses = {}
+    for emission in sink.emissions:
+        losses[(emission.tank_id, emission.start_date)] = (
+            sum(material.magnitude for material in emission.standing_losses.material_emissions),
+            sum(material.magnitude for material in emission.working_losses.material_emissions),
+        )
+
+    return losses
+
+
+class TestCalculationEngines(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.reference = calculate_losses(CalculationEngine.SCALAR, workers=1)
+
+    def test_reference_covers_every_month(self) -> None:
+        self.assertEqual(len(self.reference), 24)
+
+    def test_batch_matches_decimal(self) -> None:
+        batch = calculate_losses(CalculationEngine.BATCH, workers=1)
+
+        self.assertEqual(batch.keys(), self.reference.keys())
+        for key, expected in self.reference.items():
+            for expected_losses, losses in zip(expected, batch[key]):
+                self.assertLessEqual(abs(losses - expected_losses), BATCH_TOLERANCE * abs(expected_losses), key)
+
+    def test_parallel_matches_serial(self) -> None:
+        # Worker processes run the same Decimal engine, so the results are identical
+        parallel = calculate_losses(CalculationEngine.SCALAR, workers=2)
+
+        self.assertEqual(parallel, self.reference)
+
+
+if __name__ == '__main__':
+    unittest.main()
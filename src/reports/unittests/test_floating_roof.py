@@ -0,0 +1,92 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+
+from src.reports.components.tanks.floating_roof import (
+    FloatingRoofLossFactors,
+    calculate_monthly_loss_factors,
+    deck_seam_loss_factor,
+)
+from src.util.enums import DeckConstructionType
+
+__all__ = ['TestDeckSeamLossFactor', 'TestInternalFloatingRoofLossFactors', 'TestExternalFloatingRoofLossFactors']
+
+# Sample Calculation #4 (IFRT #1): liquid-mounted primary seal with a rim-mounted secondary seal on a welded tank
+# and two unbolted, ungasketed access hatches (AP 42 Chapter 7 Table 7.1-8 and Table 7.1-12)
+SAMPLE_LOSS_FACTORS = FloatingRoofLossFactors(
+    rim_seal_k_ra=0.3,
+    rim_seal_k_rb=0.6,
+    rim_seal_n=0.3,
+    fitting_k_fa_total=2 * 36.0,
+    fitting_k_fb=(2 * 5.9,),
+    fitting_m=(1.2,),
+)
+
+# Mechanical-shoe primary seal without a secondary seal on a welded tank and one unbolted, ungasketed access hatch
+EXTERNAL_LOSS_FACTORS = FloatingRoofLossFactors(
+    rim_seal_k_ra=5.8,
+    rim_seal_k_rb=0.3,
+    rim_seal_n=2.1,
+    fitting_k_fa_total=36.0,
+    fitting_k_fb=(5.9,),
+    fitting_m=(1.2,),
+)
+
+
+class TestDeckSeamLossFactor(unittest.TestCase):
+    def test_welded_decks_have_no_seam_losses(self) -> None:
+        self.assertEqual(deck_seam_loss_factor(DeckConstructionType.WELDED), 0)
+
+    def test_bolted_decks(self) -> None:
+        # AP 42 Chapter 7 Table 7.1-14 - K_D = 0.14 and S_D for the sheet or panel size
+        expected = {
+            DeckConstructionType.BOLTED_CONTINUOUS_SHEET_5_FT: Decimal('0.028'),
+            DeckConstructionType.BOLTED_CONTINUOUS_SHEET_6_FT: Decimal('0.0238'),
+            DeckConstructionType.BOLTED_CONTINUOUS_SHEET_7_FT: Decimal('0.0196'),
+            DeckConstructionType.BOLTED_RECTANGULAR_PANEL_5_BY_7_5_FT: Decimal('0.0462'),
+            DeckConstructionType.BOLTED_RECTANGULAR_PANEL_5_BY_12_FT: Decimal('0.0392'),
+        }
+        for deck_construction, factor in expected.items():
+            self.assertEqual(deck_seam_loss_factor(deck_construction), factor, deck_construction.name)
+
+
+class TestInternalFloatingRoofLossFactors(unittest.TestCase):
+    def test_without_wind(self) -> None:
+        # AP 42 Chapter 7 Section 7.1.3.2 - The wind speed is zero for internal floating roof tanks
+        # K_R = K_Ra and F_F = sum(N_F * K_Fa)
+        rim_seal, deck_fittings = calculate_monthly_loss_factors([SAMPLE_LOSS_FACTORS], np.zeros((1, 12)))
+
+        np.testing.assert_allclose(rim_seal, np.full((1, 12), 0.3))
+        np.testing.assert_allclose(deck_fittings, np.full((1, 12), 72.0))
+
+
+class TestExternalFloatingRoofLossFactors(unittest.TestCase):
+    def test_with_wind(self) -> None:
+        wind_speed = np.array([[10.0, 0.0]])  # mph
+        rim_seal, deck_fittings = calculate_monthly_loss_factors([EXTERNAL_LOSS_FACTORS], wind_speed)
+
+        # AP 42 Chapter 7 Equation 2-2 - K_R = 5.8 + 0.3 * 10^2.1
+        np.testing.assert_allclose(rim_seal, [[43.567762353825, 5.8]])
+
+        # AP 42 Chapter 7 Equation 2-14 - K_F = 36 + 5.9 * (0.7 * 10)^1.2
+        np.testing.assert_allclose(deck_fittings, [[96.949431573855, 36.0]])
+
+    def test_tanks_with_different_fitting_counts(self) -> None:
+        # Tanks without fittings that have a wind speed term are padded out and only keep their K_Fa
+        without_wind_terms = FloatingRoofLossFactors(
+            rim_seal_k_ra=5.8,
+            rim_seal_k_rb=0.3,
+            rim_seal_n=2.1,
+            fitting_k_fa_total=31.0,
+            fitting_k_fb=(),
+            fitting_m=(),
+        )
+        wind_speed = np.full((2, 1), 10.0)
+        _, deck_fittings = calculate_monthly_loss_factors([EXTERNAL_LOSS_FACTORS, without_wind_terms], wind_speed)
+
+        np.testing.assert_allclose(deck_fittings, [[96.949431573855], [31.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
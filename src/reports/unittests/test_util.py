@@ -0,0 +1,35 @@
+import unittest
+from decimal import Decimal
+
+from src import unit_registry
+from src.reports.util import EMISSIONS_UNIT, MaterialEmission
+from src.util.enums import MaterialType
+
+__all__ = ['TestMaterialEmission']
+
+
+class TestMaterialEmission(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emission = MaterialEmission(MaterialType.PETROCHEMICAL, 1, 'Benzene', Decimal('12.5'))
+
+    def test_emissions_in_emissions_unit(self) -> None:
+        self.assertEqual(self.emission.emissions, unit_registry.Quantity(Decimal('12.5'), EMISSIONS_UNIT))
+
+    def test_setting_emissions_stores_the_magnitude(self) -> None:
+        self.emission.emissions = unit_registry.Quantity(Decimal('2'), unit_registry.ton / unit_registry.year)
+
+        self.assertIsInstance(self.emission.magnitude, Decimal)
+        self.assertAlmostEqual(self.emission.magnitude, Decimal('4000'), delta=Decimal('1e-6'))
+
+    def test_names_are_interned(self) -> None:
+        other = MaterialEmission(MaterialType.PETROCHEMICAL, 1, ''.join(['Ben', 'zene']), Decimal('1'))
+
+        self.assertIs(other.material_name, self.emission.material_name)
+
+    def test_slots(self) -> None:
+        with self.assertRaises(AttributeError):
+            self.emission.units = 'lb'
+
+
+if __name__ == '__main__':
+    unittest.main()
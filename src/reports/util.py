@@ -1,7 +1,16 @@
+import sys
 from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
 from enum import Enum, auto
 from pint import Quantity
 
+from src import unit_registry
+from src.util.enums import TankType, MaterialType
+
+# Emissions are stored as magnitudes in this unit, a Quantity is only built when one is asked for
+EMISSIONS_UNIT = unit_registry.lb / unit_registry.year
+
 
 class ReportOutputType(Enum):
     LOG = auto()
@@ -9,23 +18,70 @@ class ReportOutputType(Enum):
     EXCEL = auto()
 
 
-@dataclass
+class CalculationEngine(Enum):
+    SCALAR = auto()  # One tank and chunk at a time with Decimal quantities
+    BATCH = auto()  # All fixed roof chunks at once with NumPy arrays
+
+
+@dataclass(slots=True)
 class MaterialEmission:
+    """
+    Results are kept for every chunk of a report, so these are slotted, share interned names
+    and hold the bare magnitude of their emissions in EMISSIONS_UNIT.
+    """
+    material_type: MaterialType  # Petrochemical and petroleum liquid ids overlap
     material_id: int
     material_name: str
-    emissions: Quantity
+    magnitude: Decimal  # lb/yr
 
+    def __post_init__(self) -> None:
+        self.material_name = sys.intern(self.material_name)
 
-@dataclass
+    @property
+    def emissions(self) -> Quantity:
+        return unit_registry.Quantity(self.magnitude, EMISSIONS_UNIT)
+
+    @emissions.setter
+    def emissions(self, emissions: Quantity) -> None:
+        self.magnitude = emissions.to(EMISSIONS_UNIT).magnitude
+
+
+@dataclass(slots=True)
 class MixtureEmission:
     mixture_id: int
     mixture_name: str
     material_emissions: list[MaterialEmission]
 
+    def __post_init__(self) -> None:
+        self.mixture_name = sys.intern(self.mixture_name)
 
-@dataclass
+
+@dataclass(slots=True)
 class TankEmission:
     tank_id: int
     tank_name: str
     standing_losses: MixtureEmission
     working_losses: MixtureEmission
+    start_date: date | None = None  # Reporting chunk the emissions cover
+    end_date: date | None = None
+    tank_type: TankType | None = None  # Set by the report, tank ids are only unique within a tank type
+
+    def __post_init__(self) -> None:
+        self.tank_name = sys.intern(self.tank_name)
+
+
+@dataclass
+class TankFailure:
+    tank_type: TankType
+    tank_id: int
+    tank_name: str
+    error: str
+
+
+@dataclass
+class ReportProgress:
+    tank_name: str
+    tanks_completed: int
+    tank_count: int
+    chunks_completed: int
+    chunk_count: int
@@ -29,3 +29,12 @@ class InsulationType(StrEnum):
 class TankConstructionType(IntEnum):
     WELDED = 1
     RIVETED = 2
+
+
+class DeckConstructionType(IntEnum):
+    WELDED = 1
+    BOLTED_CONTINUOUS_SHEET_5_FT = 2
+    BOLTED_CONTINUOUS_SHEET_6_FT = 3
+    BOLTED_CONTINUOUS_SHEET_7_FT = 4
+    BOLTED_RECTANGULAR_PANEL_5_BY_7_5_FT = 5
+    BOLTED_RECTANGULAR_PANEL_5_BY_12_FT = 6
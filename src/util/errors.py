@@ -9,6 +9,10 @@ class CalculationError(Exception):
     pass
 
 
+class ReportCancelled(Exception):
+    pass
+
+
 class DataEntryResult(NamedTuple):
     valid: bool
     errors: list
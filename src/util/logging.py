@@ -4,6 +4,8 @@ from contextlib import contextmanager
 from types import TracebackType
 from typing import Type, Callable
 
+from src.util.metrics import timer
+
 logger = logging.getLogger(__name__)
 
 LOG_WIDTH = 120
@@ -16,12 +18,14 @@ class NamedLoggerAdapter(logging.LoggerAdapter):
 
 @contextmanager
 def log_block(log_func: Callable, block_name: str) -> None:
+    # Lazy arguments so nothing is formatted when the level is disabled
     half_width = (LOG_WIDTH - len(block_name) - 2) // 2
-    log_func(f'{"-" * half_width} {block_name} {"-" * half_width}')
+    log_func('%s %s %s', '-' * half_width, block_name, '-' * half_width)
     try:
-        yield
+        with timer(f'block.{block_name}'):
+            yield
     finally:
-        log_func('-' * LOG_WIDTH)
+        log_func('%s', '-' * LOG_WIDTH)
         log_func('')
 
 
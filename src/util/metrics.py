@@ -0,0 +1,188 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+
+# Latency histogram bucket upper bounds in seconds: 1 us doubling up to ~134 s
+BUCKET_BOUNDS = tuple(1e-6 * 2**power for power in range(28))
+
+
+class HistogramStats(NamedTuple):
+    name: str
+    count: int
+    total: float  # s
+    minimum: float  # s
+    maximum: float  # s
+    p50: float  # s (upper bound of the bucket)
+    p95: float  # s (upper bound of the bucket)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Histogram:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.maximum
+
+        return self.maximum
+
+    def stats(self) -> HistogramStats:
+        return HistogramStats(
+            name=self.name,
+            count=self.count,
+            total=self.total,
+            minimum=self.minimum if self.count else 0.0,
+            maximum=self.maximum,
+            p50=min(self.percentile(0.5), self.maximum),
+            p95=min(self.percentile(0.95), self.maximum),
+        )
+
+
+class MetricsSnapshot(NamedTuple):
+    counters: dict[str, int]
+    histograms: dict[str, HistogramStats]
+
+    def summary_table(self) -> str:
+        width = max([len('Timer'), *(len(name) for name in [*self.histograms, *self.counters])])
+        lines = [
+            f'{"Timer":<{width}} {"Count":>9} {"Total ms":>11} {"Mean us":>10} {"p50 us":>10} {"p95 us":>10} '
+            f'{"Max us":>10}'
+        ]
+        for stats in sorted(self.histograms.values(), key=lambda item: item.total, reverse=True):
+            lines.append(
+                f'{stats.name:<{width}} {stats.count:>9} {stats.total * 1e3:>11.2f} {stats.mean * 1e6:>10.1f} '
+                f'{stats.p50 * 1e6:>10.1f} {stats.p95 * 1e6:>10.1f} {stats.maximum * 1e6:>10.1f}'
+            )
+
+        if self.counters:
+            lines.append('')
+            lines.append(f'{"Counter":<{width}} {"Value":>9}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'{name:<{width}} {value:>9}')
+
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """
+    Counters and latency histograms, METRICS is shared by every report in the process and each report keeps its own.
+    Safe to use from multiple threads.
+    """
+    def __init__(self) -> None:
+        self._counters: dict[str, int] = {}
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            if (histogram := self._histograms.get(name)) is None:
+                histogram = self._histograms[name] = Histogram(name)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            return MetricsSnapshot(
+                counters=dict(self._counters),
+                histograms={name: histogram.stats() for name, histogram in self._histograms.items()},
+            )
+
+
+METRICS = MetricsRegistry()
+
+# Registries collecting the timings of the current thread on top of METRICS (the report being calculated)
+_collecting = threading.local()
+
+
+@contextmanager
+def collect_metrics(registry: MetricsRegistry) -> Iterator[None]:
+    registries = getattr(_collecting, 'registries', ())
+    _collecting.registries = (*registries, registry)
+    try:
+        yield
+    finally:
+        _collecting.registries = registries
+
+
+def observe(name: str, seconds: float) -> None:
+    METRICS.observe(name, seconds)
+    for registry in getattr(_collecting, 'registries', ()):
+        registry.observe(name, seconds)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def time_methods(prefix: str, method_prefix: str = '_calculate') -> Callable[[type], type]:
+    # Class decorator timing every method whose name starts with method_prefix as "<prefix>.<method name>"
+    def decorator(cls: type) -> type:
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith(method_prefix) and callable(value):
+                setattr(cls, attribute, timed(f'{prefix}.{attribute.lstrip("_")}')(value))
+
+        return cls
+
+    return decorator
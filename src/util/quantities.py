@@ -1,3 +1,4 @@
+import decimal
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
@@ -8,6 +9,11 @@ from src import unit_registry
 PI = Decimal('3.141592653589793')
 R = Decimal('10.731') * ((unit_registry.psi * unit_registry.ft**3) / (unit_registry.lb * unit_registry.mol * unit_registry.degR))
 
+# Conversions for working with plain magnitudes in AP 42 units
+MMHG_PER_PSI = unit_registry.Quantity(Decimal(1), 'psi').to('mm Hg').magnitude
+DEGR_AT_ZERO_DEGC = unit_registry.Quantity(Decimal(0), 'degC').to('degR').magnitude
+DEGR_PER_DEGC = Decimal('1.8')
+
 
 @dataclass
 class DatedQuantity:
@@ -27,3 +33,8 @@ def to_string(quantity: Quantity | None, unit: str, default: str = '0.0') -> str
         return str(quantity.to(unit).magnitude)
     else:
         return default
+
+
+def to_decimal(value: float) -> Decimal:
+    # Go through a string so the FloatOperation trap stays quiet, and round to the context precision
+    return decimal.getcontext().create_decimal(str(float(value)))